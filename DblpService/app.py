@@ -1,57 +1,91 @@
 from __future__ import annotations
 
+import asyncio
+import atexit
 import csv
+import hashlib
+import json
 import logging
 import os
+import secrets
+import socket
 import sqlite3
 import threading
 import time
-from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel, Field
 
-from dblp_builder.pipeline import PipelineConfig, run_pipeline
+from dblp_builder.pipeline import (
+    PipelineConfig,
+    db_fingerprint,
+    load_dataset_meta,
+    load_manifest,
+    manifest_path,
+    run_pipeline,
+)
+import metrics
+from query_executor import QueryContext, QueryExecutor, QueryTimeoutError, QueueFullError
+from slow_query_log import SlowQueryLog
+from response_codec import compress, dumps_bytes, negotiate_encoding, supported_encodings
+from state_store import ACTIVE_STATUSES, StateBroadcaster, StateStore
 
 APP_VERSION = "0.1.0"
 
+
+def _env_flag(name: str, default: bool) -> bool:
+    raw = os.getenv(name, "").strip().lower()
+    if not raw:
+        return default
+    return raw in {"1", "true", "yes", "on"}
+
+
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = Path(os.getenv("DATA_DIR", str(BASE_DIR / "data"))).expanduser().resolve()
 DEFAULT_DB_PATH = DATA_DIR / "dblp.sqlite"
 
 DB_PATH = Path(os.getenv("DB_PATH", str(DEFAULT_DB_PATH))).expanduser().resolve()
 DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "30000"))
+DB_IMMUTABLE = _env_flag("DB_IMMUTABLE", True)
 
 DEFAULT_XML_GZ_URL = os.getenv("DBLP_XML_GZ_URL", "https://dblp.org/xml/dblp.xml.gz")
 DEFAULT_DTD_URL = os.getenv("DBLP_DTD_URL", "https://dblp.org/xml/dblp.dtd")
 DEFAULT_BATCH_SIZE = int(os.getenv("BATCH_SIZE", "1000"))
 DEFAULT_PROGRESS_EVERY = int(os.getenv("PROGRESS_EVERY", "10000"))
+DEFAULT_CLUSTERED_PUB_AUTHORS = _env_flag("CLUSTERED_PUB_AUTHORS", False)
 MAX_LOG_LINES = int(os.getenv("MAX_LOG_LINES", "1000"))
+STATE_DB_PATH = Path(
+    os.getenv("STATE_DB_PATH", str(DATA_DIR / "service_state.sqlite"))
+).expanduser().resolve()
+PIPELINE_OWNER_TTL_SECONDS = float(os.getenv("PIPELINE_OWNER_TTL_SECONDS", "30"))
+STOP_POLL_SECONDS = 1.0
+STATE_STREAM_POLL_SECONDS = float(os.getenv("STATE_STREAM_POLL_SECONDS", "0.5"))
+STATE_STREAM_KEEPALIVE_SECONDS = 15.0
 
 MAX_LIMIT = int(os.getenv("MAX_LIMIT", "200"))
 MAX_ENTRIES_PER_SIDE = min(int(os.getenv("MAX_ENTRIES_PER_SIDE", "50")), 50)
 MAX_AUTHOR_RESOLVE = int(os.getenv("MAX_AUTHOR_RESOLVE", "800"))
 
-FULLMETA_PUBLICATION_COLUMNS = {"id", "title", "year", "venue", "pub_type", "raw_xml"}
+QUERY_CONCURRENCY = int(os.getenv("QUERY_CONCURRENCY", str(min(os.cpu_count() or 1, 8))))
+QUERY_QUEUE_SIZE = int(os.getenv("QUERY_QUEUE_SIZE", "16"))
+QUERY_TIMEOUT_MS = int(os.getenv("QUERY_TIMEOUT_MS", "60000"))
 
-templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
-
-_visit_lock = threading.Lock()
-_visit_count = 0
+RESPONSE_COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+PAIRS_CACHE_CONTROL = os.getenv("PAIRS_CACHE_CONTROL", "public, no-cache")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "1000"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "100"))
 
+FULLMETA_PUBLICATION_COLUMNS = {"id", "title", "year", "venue", "pub_type", "raw_xml"}
+INTERNED_PUBLICATION_COLUMNS = {"id", "title", "year", "venue_id", "pub_type_id", "raw_xml"}
 
-def _next_visit() -> int:
-    global _visit_count
-    with _visit_lock:
-        _visit_count += 1
-        return _visit_count
+templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 
 def _parse_cors_origins() -> list[str]:
     raw = os.getenv("CORS_ORIGINS", "http://localhost:8090").strip()
@@ -75,12 +109,62 @@ if origins:
         allow_origins=origins,
         allow_credentials=True,
         allow_methods=["GET", "POST", "OPTIONS"],
-        allow_headers=["Content-Type"],
+        allow_headers=["Content-Type", "If-None-Match"],
+        expose_headers=["Retry-After", "X-Data-Generation", "ETag"],
     )
 
 logger = logging.getLogger("dblp_service")
 logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 
+query_executor = QueryExecutor(
+    max_workers=QUERY_CONCURRENCY,
+    max_queue=QUERY_QUEUE_SIZE,
+    timeout_seconds=QUERY_TIMEOUT_MS / 1000.0,
+)
+
+slow_query_log = SlowQueryLog(threshold_ms=SLOW_QUERY_MS, capacity=SLOW_QUERY_LOG_SIZE)
+
+metrics_registry = metrics.Registry()
+HTTP_REQUEST_SECONDS = metrics_registry.histogram(
+    "dblp_http_request_duration_seconds",
+    "Time until the response starts, by route template.",
+    ("method", "route"),
+)
+HTTP_REQUESTS = metrics_registry.counter(
+    "dblp_http_requests_total", "Requests by route template and status code.", ("method", "route", "status")
+)
+PAIRS_STAGE_SECONDS = metrics_registry.histogram(
+    "dblp_pairs_stage_duration_seconds",
+    "Time per /api/coauthors/pairs request spent in each stage "
+    "(connect, resolve, pair_query, serialize, compress).",
+    ("stage",),
+)
+SQLITE_CONNECT_SECONDS = metrics_registry.histogram(
+    "dblp_sqlite_connect_duration_seconds",
+    "Time to open and configure a query connection.",
+    ("mode",),
+)
+AUTHOR_RESOLVE = metrics_registry.counter(
+    "dblp_author_resolve_total",
+    "Author name lookups by the last strategy tried (exact, fts, like) and whether it matched.",
+    ("method", "matched"),
+)
+PIPELINE_STATUS = metrics_registry.gauge(
+    "dblp_pipeline_status", "1 for the current pipeline status and step.", ("status", "step")
+)
+PIPELINE_PROGRESS = metrics_registry.gauge(
+    "dblp_pipeline_progress", "Numeric fields of the current pipeline progress.", ("field",)
+)
+QUERY_EXECUTOR = metrics_registry.gauge(
+    "dblp_query_executor", "Pair query executor state and counters.", ("field",)
+)
+
+
+@app.on_event("shutdown")
+def _shutdown_query_executor() -> None:
+    query_executor.shutdown()
+    state_store.close()
+
 
 @app.get("/", response_class=HTMLResponse)
 @app.get("/bootstrap", response_class=HTMLResponse)
@@ -90,11 +174,12 @@ def bootstrap_console(request: Request) -> HTMLResponse:
         {
             "request": request,
             "app_version": APP_VERSION,
-            "visit_count": _next_visit(),
+            "visit_count": state_store.increment_counter("visit_count"),
             "default_xml_gz_url": DEFAULT_XML_GZ_URL,
             "default_dtd_url": DEFAULT_DTD_URL,
             "default_batch_size": DEFAULT_BATCH_SIZE,
             "default_progress_every": DEFAULT_PROGRESS_EVERY,
+            "default_clustered_pub_authors": DEFAULT_CLUSTERED_PUB_AUTHORS,
             "data_dir": str(DATA_DIR),
             "api_base": "",
         },
@@ -135,24 +220,135 @@ def _fts_query_from_text(text: str, max_terms: int = 6) -> str:
     return " ".join(uniq)
 
 
+_manifest_lock = threading.Lock()
+_manifest_cache: tuple[tuple[int, int] | None, dict[str, Any] | None] = (None, None)
+
+
+def _finalized_manifest() -> dict[str, Any] | None:
+    """Return the finalize manifest if DB_PATH is still exactly the finalized file.
+
+    Opening with ``immutable=1`` skips all locking and change detection, so it
+    is only safe while the file matches the fingerprint written by the
+    pipeline's finalize stage and no WAL is present.
+    """
+    global _manifest_cache
+    marker = manifest_path(DB_PATH)
+    try:
+        st = marker.stat()
+    except OSError:
+        return None
+    key = (st.st_mtime_ns, st.st_size)
+    with _manifest_lock:
+        cached_key, manifest = _manifest_cache
+        if cached_key != key:
+            manifest = load_manifest(DB_PATH)
+            _manifest_cache = (key, manifest)
+    if not manifest:
+        return None
+    try:
+        if db_fingerprint(DB_PATH) != manifest.get("fingerprint"):
+            return None
+    except OSError:
+        return None
+    if Path(f"{DB_PATH}-wal").exists():
+        return None
+    return manifest
+
+
+def _data_generation() -> str | None:
+    """Identifier that changes whenever the served database file is replaced.
+
+    Finalized builds carry a generation id in their manifest; other databases
+    fall back to the file's inode and mtime.
+    """
+    manifest = _finalized_manifest()
+    if manifest and manifest.get("generation"):
+        return str(manifest["generation"])
+    try:
+        fingerprint = db_fingerprint(DB_PATH)
+    except OSError:
+        return None
+    return f"fp-{fingerprint['inode']:x}-{fingerprint['mtime_ns']:x}"
+
+
+class _ServiceMiddleware:
+    """Adds ``X-Data-Generation`` to ``/api/`` responses and records request metrics.
+
+    Plain ASGI, so streamed responses (``/api/state/stream``) pass through
+    untouched; only the ``http.response.start`` message is looked at.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status: int | None = None
+
+        def _observe(code: int) -> None:
+            # The route template keeps the label set bounded; unmatched paths share one label.
+            template = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, scope["method"], template)
+            HTTP_REQUESTS.inc(scope["method"], template, str(code))
+
+        async def _send(message: dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = int(message["status"])
+                if scope["path"].startswith("/api/"):
+                    generation = _data_generation()
+                    if generation:
+                        message["headers"] = [
+                            *message.get("headers", []),
+                            (b"x-data-generation", generation.encode("latin-1")),
+                        ]
+                _observe(status)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            if status is None:
+                _observe(500)
+
+
+app.add_middleware(_ServiceMiddleware)
+
+
 def _get_connection() -> sqlite3.Connection:
+    started = time.perf_counter()
     if not DB_PATH.exists():
         raise HTTPException(status_code=503, detail="Database file is not available.")
+    immutable = DB_IMMUTABLE and _finalized_manifest() is not None
     try:
-        conn = sqlite3.connect(
-            str(DB_PATH),
-            timeout=max(DB_BUSY_TIMEOUT_MS / 1000.0, 1.0),
-            check_same_thread=False,
-        )
+        if immutable:
+            conn = sqlite3.connect(
+                f"{DB_PATH.as_uri()}?immutable=1",
+                uri=True,
+                check_same_thread=False,
+            )
+        else:
+            conn = sqlite3.connect(
+                str(DB_PATH),
+                timeout=max(DB_BUSY_TIMEOUT_MS / 1000.0, 1.0),
+                check_same_thread=False,
+            )
     except sqlite3.Error as exc:
         raise HTTPException(status_code=503, detail=f"Cannot open database: {exc}") from exc
     conn.row_factory = sqlite3.Row
     conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS};")
     conn.execute("PRAGMA temp_store = MEMORY;")
+    SQLITE_CONNECT_SECONDS.observe(
+        time.perf_counter() - started, "immutable" if immutable else "normal"
+    )
     return conn
 
 
-def _ensure_fullmeta_schema(conn: sqlite3.Connection) -> None:
+def _ensure_fullmeta_schema(conn: sqlite3.Connection) -> bool:
+    """Validate the schema and return True when venues/pub types are interned."""
     cur = conn.cursor()
     cur.execute("SELECT name FROM sqlite_master WHERE type = 'table';")
     tables = {row["name"] for row in cur.fetchall()}
@@ -162,7 +358,11 @@ def _ensure_fullmeta_schema(conn: sqlite3.Connection) -> None:
 
     cur.execute("PRAGMA table_info(publications);")
     columns = {row["name"] for row in cur.fetchall()}
-    missing = FULLMETA_PUBLICATION_COLUMNS - columns
+    if FULLMETA_PUBLICATION_COLUMNS.issubset(columns):
+        return False
+    missing = INTERNED_PUBLICATION_COLUMNS - columns
+    if not missing and not {"venues", "pub_types"}.issubset(tables):
+        raise HTTPException(status_code=503, detail="Database schema is incomplete.")
     if missing:
         raise HTTPException(
             status_code=503,
@@ -171,6 +371,7 @@ def _ensure_fullmeta_schema(conn: sqlite3.Connection) -> None:
                 f"Missing columns: {', '.join(sorted(missing))}"
             ),
         )
+    return True
 
 
 def _detect_data_date() -> str:
@@ -200,8 +401,10 @@ def _resolve_author_ids(
     cur.execute("SELECT id FROM authors WHERE name = ? LIMIT 1;", (normalized,))
     row = cur.fetchone()
     if row:
+        AUTHOR_RESOLVE.inc("exact", "true")
         return [int(row["id"])]
     if exact_base_match:
+        AUTHOR_RESOLVE.inc("exact", "false")
         return []
 
     lim = MAX_AUTHOR_RESOLVE if limit is None else max(1, min(int(limit), MAX_AUTHOR_RESOLVE))
@@ -209,24 +412,99 @@ def _resolve_author_ids(
     fts = _fts_query_from_text(normalized)
     if fts:
         try:
-            cur.execute(
+            ids = _fetch_logged_ids(
+                conn,
+                "resolve_fts",
                 "SELECT rowid AS id FROM author_fts WHERE author_fts MATCH ? LIMIT ?;",
                 (fts, lim),
+                {"name": normalized, "match": fts},
             )
-            ids = [int(r["id"]) for r in cur.fetchall()]
             if ids:
+                AUTHOR_RESOLVE.inc("fts", "true")
                 return ids
         except sqlite3.Error:
             pass
 
-    cur.execute("SELECT id FROM authors WHERE name LIKE ? LIMIT ?;", (f"%{normalized}%", lim))
-    return [int(r["id"]) for r in cur.fetchall()]
+    ids = _fetch_logged_ids(
+        conn,
+        "resolve_like",
+        "SELECT id FROM authors WHERE name LIKE ? LIMIT ?;",
+        (f"%{normalized}%", lim),
+        {"name": normalized},
+    )
+    AUTHOR_RESOLVE.inc("like", "true" if ids else "false")
+    return ids
+
+
+def _fetch_logged_ids(
+    conn: sqlite3.Connection,
+    kind: str,
+    sql: str,
+    params: tuple[Any, ...],
+    context: dict[str, Any],
+) -> list[int]:
+    started = time.perf_counter()
+    ids = [int(r["id"]) for r in conn.execute(sql, params).fetchall()]
+    elapsed = time.perf_counter() - started
+    if slow_query_log.is_slow(elapsed):
+        slow_query_log.record(conn, kind, sql, params, elapsed, len(ids), context)
+    return ids
+
+
+def _posting_count(conn: sqlite3.Connection, author_ids: list[int]) -> int:
+    """Number of ``pub_authors`` rows for these authors: the work a pair join starts from."""
+    row = conn.execute(
+        f"SELECT COUNT(*) FROM pub_authors WHERE author_id IN ({_placeholders(author_ids)});",
+        author_ids,
+    ).fetchone()
+    return int(row[0])
 
 
 def _placeholders(items: list[int]) -> str:
     return ",".join("?" for _ in items) if items else "NULL"
 
 
+def _pair_query_sql(
+    interned: bool,
+    left_author_ids: list[int],
+    right_author_ids: list[int],
+    with_year_min: bool,
+    with_limit: bool,
+    as_json: bool = False,
+) -> str:
+    if interned:
+        venue_sql, pub_type_sql = "v.name", "pt.name"
+        join_meta_sql = (
+            "LEFT JOIN venues v ON v.id = p.venue_id "
+            "LEFT JOIN pub_types pt ON pt.id = p.pub_type_id"
+        )
+    else:
+        venue_sql, pub_type_sql = "p.venue", "p.pub_type"
+        join_meta_sql = ""
+    if as_json:
+        # One JSON object per row; it holds all four columns, so DISTINCT still applies to them.
+        select_sql = (
+            f"json_object('title', p.title, 'year', p.year, "
+            f"'venue', {venue_sql}, 'pub_type', {pub_type_sql}) AS item_json"
+        )
+    else:
+        select_sql = f"p.title, p.year, {venue_sql} AS venue, {pub_type_sql} AS pub_type"
+    year_filter_sql = "AND p.year >= ?" if with_year_min else ""
+    limit_sql = "LIMIT ?" if with_limit else ""
+    return f"""
+        SELECT DISTINCT {select_sql}
+        FROM pub_authors pa1
+        JOIN pub_authors pa2 ON pa1.pub_id = pa2.pub_id
+        JOIN publications p ON p.id = pa1.pub_id
+        {join_meta_sql}
+        WHERE pa1.author_id IN ({_placeholders(left_author_ids)})
+          AND pa2.author_id IN ({_placeholders(right_author_ids)})
+        {year_filter_sql}
+        ORDER BY (p.year IS NULL) ASC, p.year DESC, p.title ASC
+        {limit_sql};
+        """
+
+
 def _clamp_limit(value: int | None, default: int) -> int:
     if value is None:
         return default
@@ -252,17 +530,8 @@ class StartRequest(BaseModel):
     batch_size: int = Field(default=DEFAULT_BATCH_SIZE, ge=100)
     progress_every: int = Field(default=DEFAULT_PROGRESS_EVERY, ge=1000)
     rebuild: bool = True
-
-
-@dataclass(slots=True)
-class PipelineState:
-    status: str = "idle"
-    step: str = "idle"
-    message: str = ""
-    started_at: str | None = None
-    finished_at: str | None = None
-    progress: dict[str, Any] = field(default_factory=dict)
-    logs: list[str] = field(default_factory=list)
+    clustered_pub_authors: bool = DEFAULT_CLUSTERED_PUB_AUTHORS
+    finalize: bool = True
 
 
 def _now_iso() -> str:
@@ -270,44 +539,64 @@ def _now_iso() -> str:
 
 
 class PipelineManager:
-    def __init__(self) -> None:
+    """Runs builds in this worker while keeping their state in the shared store.
+
+    Any worker can start, stop, reset or snapshot the pipeline; the worker
+    whose ``try_acquire`` succeeds owns the build thread, heartbeats while it
+    runs and picks up stop requests issued by other workers.
+    """
+
+    def __init__(self, store: StateStore) -> None:
+        self._store = store
         self._lock = threading.Lock()
         self._stop = threading.Event()
         self._thread: threading.Thread | None = None
-        self._state = PipelineState()
-
-    def _append_log_locked(self, msg: str) -> None:
-        self._state.logs.append(msg)
-        if len(self._state.logs) > MAX_LOG_LINES:
-            self._state.logs = self._state.logs[-MAX_LOG_LINES :]
 
-    def snapshot(self) -> dict[str, Any]:
-        with self._lock:
-            return {
-                "status": self._state.status,
-                "step": self._state.step,
-                "message": self._state.message,
-                "started_at": self._state.started_at,
-                "finished_at": self._state.finished_at,
-                "progress": dict(self._state.progress),
-                "logs": list(self._state.logs),
-            }
+    def _reap_if_stale(self, status: str, heartbeat_at: float | None) -> bool:
+        if status not in ACTIVE_STATUSES:
+            return False
+        if heartbeat_at is not None and time.time() - heartbeat_at <= self._store.owner_ttl_seconds:
+            return False
+        self._store.reap_stale_owner(_now_iso())
+        return True
+
+    def version(self) -> int:
+        version, status, heartbeat_at = self._store.poll()
+        if self._reap_if_stale(status, heartbeat_at):
+            version = self._store.poll()[0]
+        return version
+
+    def status(self) -> dict[str, Any]:
+        """Status, step and progress only: no logs are read and no stale owner is reaped."""
+        state = self._store.load_status()
+        return {"status": state.status, "step": state.step, "progress": state.progress}
+
+    def snapshot(self, since: int | None = None) -> dict[str, Any]:
+        state = self._store.load(since)
+        if self._reap_if_stale(state.status, state.heartbeat_at):
+            state = self._store.load(since)
+        snapshot = {
+            "status": state.status,
+            "step": state.step,
+            "message": state.message,
+            "started_at": state.started_at,
+            "finished_at": state.finished_at,
+            "progress": state.progress,
+            "logs": state.logs,
+            "log_seq": state.log_seq,
+        }
+        if since is not None:
+            snapshot["log_reset"] = state.log_reset
+        return snapshot
 
     def start(self, req: StartRequest) -> dict[str, Any]:
         with self._lock:
             if self._thread is not None and self._thread.is_alive():
                 raise HTTPException(status_code=409, detail="Pipeline is already running.")
+            owner = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+            if not self._store.try_acquire(owner, _now_iso(), "Pipeline start requested."):
+                raise HTTPException(status_code=409, detail="Pipeline is already running.")
             self._stop.clear()
-            self._state = PipelineState(
-                status="running",
-                step="starting",
-                message="",
-                started_at=_now_iso(),
-                finished_at=None,
-                progress={},
-                logs=[],
-            )
-            self._append_log_locked("Pipeline start requested.")
 
             config = PipelineConfig(
                 xml_gz_url=req.xml_gz_url,
@@ -316,48 +605,63 @@ class PipelineManager:
                 batch_size=req.batch_size,
                 progress_every=req.progress_every,
                 rebuild=req.rebuild,
+                clustered_pub_authors=req.clustered_pub_authors,
+                finalize=req.finalize,
             )
 
             self._thread = threading.Thread(
                 target=self._run_job,
-                args=(config,),
+                args=(config, owner),
                 daemon=True,
             )
             self._thread.start()
-            return self.snapshot()
+        return self.snapshot()
 
     def stop(self) -> dict[str, Any]:
         self._stop.set()
-        with self._lock:
-            if self._state.status == "running":
-                self._state.status = "stopping"
-                self._state.message = "Stop requested."
-                self._append_log_locked("Stop requested.")
+        self._store.request_stop("Stop requested.")
         return self.snapshot()
 
     def reset(self) -> dict[str, Any]:
         with self._lock:
             if self._thread is not None and self._thread.is_alive():
                 raise HTTPException(status_code=409, detail="Cannot reset while running.")
+            if not self._store.reset("Reset."):
+                raise HTTPException(status_code=409, detail="Cannot reset while running.")
             self._stop.clear()
-            self._state = PipelineState()
-            self._append_log_locked("Reset.")
         return self.snapshot()
 
-    def _run_job(self, config: PipelineConfig) -> None:
+    def _run_job(self, config: PipelineConfig, owner: str) -> None:
+        done = threading.Event()
+        last_stop_poll = [0.0]
+
+        def _heartbeat() -> None:
+            interval = max(self._store.owner_ttl_seconds / 3.0, 1.0)
+            while not done.wait(interval):
+                try:
+                    self._store.heartbeat(owner)
+                except Exception:
+                    # A missed beat is retried next interval; a dead thread would get the build reaped.
+                    logger.exception("Pipeline heartbeat failed")
+
         def _log(msg: str) -> None:
-            with self._lock:
-                self._append_log_locked(msg)
-                self._state.message = msg
+            if not self._store.update(owner, message=msg, log_line=msg):
+                self._stop.set()
 
         def _progress(phase: str, payload: dict[str, Any]) -> None:
-            with self._lock:
-                self._state.step = phase
-                self._state.progress.update(payload)
+            if not self._store.update(owner, step=phase, progress=payload):
+                self._stop.set()
 
         def _should_stop() -> bool:
+            # Called per parsed record, so the shared flag is polled at most once a second.
+            now = time.monotonic()
+            if not self._stop.is_set() and now - last_stop_poll[0] >= STOP_POLL_SECONDS:
+                last_stop_poll[0] = now
+                if self._store.stop_requested(owner):
+                    self._stop.set()
             return self._stop.is_set()
 
+        threading.Thread(target=_heartbeat, daemon=True).start()
         try:
             result = run_pipeline(
                 config=config,
@@ -365,30 +669,50 @@ class PipelineManager:
                 progress=_progress,
                 should_stop=_should_stop,
             )
-            with self._lock:
-                self._state.status = "completed"
-                self._state.step = "completed"
-                self._state.message = "Completed."
-                self._state.finished_at = _now_iso()
-                self._state.progress.update(result)
-                self._append_log_locked("Pipeline completed.")
+            self._store.update(
+                owner,
+                status="completed",
+                step="completed",
+                message="Completed.",
+                finished_at=_now_iso(),
+                progress=result,
+                log_line="Pipeline completed.",
+            )
         except InterruptedError:
-            with self._lock:
-                self._state.status = "stopped"
-                self._state.step = "stopped"
-                self._state.message = "Stopped."
-                self._state.finished_at = _now_iso()
-                self._append_log_locked("Pipeline stopped.")
+            self._store.update(
+                owner,
+                status="stopped",
+                step="stopped",
+                message="Stopped.",
+                finished_at=_now_iso(),
+                log_line="Pipeline stopped.",
+            )
         except Exception as exc:
-            with self._lock:
-                self._state.status = "error"
-                self._state.step = "error"
-                self._state.message = str(exc)
-                self._state.finished_at = _now_iso()
-                self._append_log_locked(f"Pipeline error: {exc}")
+            self._store.update(
+                owner,
+                status="error",
+                step="error",
+                message=str(exc),
+                finished_at=_now_iso(),
+                log_line=f"Pipeline error: {exc}",
+            )
+        finally:
+            done.set()
 
 
-manager = PipelineManager()
+state_store = StateStore(
+    STATE_DB_PATH,
+    max_log_lines=MAX_LOG_LINES,
+    owner_ttl_seconds=PIPELINE_OWNER_TTL_SECONDS,
+)
+# Writes buffered counter increments even if the server exits without running shutdown handlers.
+atexit.register(state_store.close)
+manager = PipelineManager(state_store)
+state_broadcaster = StateBroadcaster(
+    manager.version,
+    manager.snapshot,
+    interval_seconds=STATE_STREAM_POLL_SECONDS,
+)
 
 
 def _safe_file_info(path: Path) -> dict[str, Any]:
@@ -426,50 +750,80 @@ def api_health() -> dict[str, Any]:
     return {"status": "ok"}
 
 
-@app.get("/api/stats")
-def api_stats() -> dict[str, Any]:
+_stats_lock = threading.Lock()
+_stats_cache: dict[str, Any] = {}
+
+
+def _load_dataset_stats() -> dict[str, Any]:
     conn = _get_connection()
     try:
-        cur = conn.cursor()
-        cur.execute("SELECT COUNT(*) AS cnt FROM publications;")
-        pub_count = int(cur.fetchone()["cnt"])
-        cur.execute("SELECT COUNT(*) AS cnt FROM authors;")
-        author_count = int(cur.fetchone()["cnt"])
+        meta = load_dataset_meta(conn)
+        if meta is None:
+            # Built before dataset_meta existed: count once per generation.
+            cur = conn.cursor()
+            cur.execute("SELECT COUNT(*) AS cnt FROM publications;")
+            pub_count = int(cur.fetchone()["cnt"])
+            cur.execute("SELECT COUNT(*) AS cnt FROM authors;")
+            author_count = int(cur.fetchone()["cnt"])
+            meta = {"counts": {"publications": pub_count, "authors": author_count}}
     finally:
         conn.close()
+    counts = meta.get("counts") or {}
     return {
-        "publications": pub_count,
-        "authors": author_count,
+        "publications": int(counts.get("publications", 0)),
+        "authors": int(counts.get("authors", 0)),
         "data_source": "DBLP",
-        "data_date": _detect_data_date(),
+        "data_date": os.getenv("DATA_DATE", "").strip() or meta.get("source_date") or _detect_data_date(),
+        "dataset": {
+            "counts": counts,
+            "pub_types": meta.get("pub_types"),
+            "year_min": meta.get("year_min"),
+            "year_max": meta.get("year_max"),
+            "built_at": meta.get("built_at"),
+            "build_seconds": meta.get("build_seconds"),
+            "source_date": meta.get("source_date"),
+            "generation": meta.get("generation"),
+        },
     }
 
 
+@app.get("/api/stats")
+def api_stats() -> dict[str, Any]:
+    """Dataset statistics from ``dataset_meta``, re-read only when the data generation changes."""
+    generation = _data_generation()
+    with _stats_lock:
+        cached = _stats_cache.get(generation) if generation else None
+    if cached is None:
+        cached = _load_dataset_stats()
+        if generation:
+            with _stats_lock:
+                _stats_cache.clear()
+                _stats_cache[generation] = cached
+    return {**cached, "generation": generation}
+
+
 @app.get("/api/pc-members")
 def api_pc_members() -> dict[str, Any]:
     return {"members": PC_MEMBERS, "count": len(PC_MEMBERS)}
 
 
-@app.post("/api/coauthors/pairs")
-def api_coauthors_pairs(
-    payload: CoauthoredPairsRequest,
-) -> dict[str, Any]:
-    left_entries = _sanitize_author_entries(payload.left)
-    right_entries = _sanitize_author_entries(payload.right)
-    if not left_entries or not right_entries:
-        raise HTTPException(status_code=400, detail="Both left and right author lists are required.")
-    if len(left_entries) > MAX_ENTRIES_PER_SIDE or len(right_entries) > MAX_ENTRIES_PER_SIDE:
-        raise HTTPException(status_code=400, detail=f"Too many authors. Max {MAX_ENTRIES_PER_SIDE} per side is allowed.")
-
-    limit_per_pair = None if payload.limit_per_pair is None else _clamp_limit(payload.limit_per_pair, default=20)
-    author_limit = payload.author_limit
-    if author_limit is not None:
-        author_limit = min(int(author_limit), MAX_AUTHOR_RESOLVE)
-    year_min = payload.year_min
-
+def _compute_coauthor_pairs(
+    ctx: QueryContext,
+    left_entries: list[str],
+    right_entries: list[str],
+    limit_per_pair: int | None,
+    author_limit: int | None,
+    exact_base_match: bool,
+    year_min: int | None,
+) -> bytes:
+    """Run every left x right pair query and return the response as JSON bytes."""
+    started = time.perf_counter()
     conn = _get_connection()
+    ctx.attach(conn)
     try:
-        _ensure_fullmeta_schema(conn)
+        interned = _ensure_fullmeta_schema(conn)
+        resolve_started = time.perf_counter()
+        PAIRS_STAGE_SECONDS.observe(resolve_started - started, "connect")
 
         left_ids: dict[str, list[int]] = {}
         right_ids: dict[str, list[int]] = {}
@@ -479,82 +833,309 @@ def api_coauthors_pairs(
                 conn,
                 entry,
                 limit=author_limit,
-                exact_base_match=payload.exact_base_match,
+                exact_base_match=exact_base_match,
             )
         for entry in right_entries:
             right_ids[entry] = _resolve_author_ids(
                 conn,
                 entry,
                 limit=author_limit,
-                exact_base_match=payload.exact_base_match,
+                exact_base_match=exact_base_match,
             )
 
+        query_seconds = 0.0
+        pairs_started = time.perf_counter()
+        PAIRS_STAGE_SECONDS.observe(pairs_started - resolve_started, "resolve")
+
         matrix: dict[str, dict[str, int]] = {left: {} for left in left_entries}
-        pair_pubs: list[dict[str, Any]] = []
+        pair_parts: list[bytes] = []
 
         cur = conn.cursor()
         for left_entry, left_author_ids in left_ids.items():
             for right_entry, right_author_ids in right_ids.items():
                 if not left_author_ids or not right_author_ids:
-                    items: list[dict[str, Any]] = []
+                    count, items_json = 0, b"[]"
                 else:
-                    limit_sql = "" if limit_per_pair is None else "LIMIT ?"
-                    year_filter_sql = "" if year_min is None else "AND p.year >= ?"
                     params: tuple[Any, ...] = (*left_author_ids, *right_author_ids)
                     if year_min is not None:
                         params = (*params, int(year_min))
                     if limit_per_pair is not None:
                         params = (*params, int(limit_per_pair))
 
-                    order_sql = "ORDER BY (p.year IS NULL) ASC, p.year DESC, p.title ASC"
-                    cur.execute(
-                        f"""
-                        SELECT DISTINCT p.title, p.year, p.venue, p.pub_type
-                        FROM pub_authors pa1
-                        JOIN pub_authors pa2 ON pa1.pub_id = pa2.pub_id
-                        JOIN publications p ON p.id = pa1.pub_id
-                        WHERE pa1.author_id IN ({_placeholders(left_author_ids)})
-                          AND pa2.author_id IN ({_placeholders(right_author_ids)})
-                        {year_filter_sql}
-                        {order_sql}
-                        {limit_sql};
-                        """,
-                        params,
+                    sql = _pair_query_sql(
+                        interned,
+                        left_author_ids,
+                        right_author_ids,
+                        with_year_min=year_min is not None,
+                        with_limit=limit_per_pair is not None,
+                        as_json=True,
                     )
+                    query_started = time.perf_counter()
+                    cur.execute(sql, params)
                     rows = cur.fetchall()
-                    items = [
-                        {
-                            "title": row["title"],
-                            "year": row["year"],
-                            "venue": row["venue"],
-                            "pub_type": row["pub_type"],
-                        }
-                        for row in rows
-                    ]
-
-                matrix[left_entry][right_entry] = len(items)
-                pair_pubs.append(
-                    {
-                        "left": left_entry,
-                        "right": right_entry,
-                        "count": len(items),
-                        "items": items,
-                    }
+                    elapsed = time.perf_counter() - query_started
+                    query_seconds += elapsed
+                    count = len(rows)
+                    items_json = ("[" + ",".join(row[0] for row in rows) + "]").encode("utf-8")
+                    if slow_query_log.is_slow(elapsed):
+                        slow_query_log.record(
+                            conn,
+                            "pair_query",
+                            sql,
+                            params,
+                            elapsed,
+                            count,
+                            {
+                                "left": left_entry,
+                                "right": right_entry,
+                                "left_ids": len(left_author_ids),
+                                "right_ids": len(right_author_ids),
+                                "left_postings": _posting_count(conn, left_author_ids),
+                                "right_postings": _posting_count(conn, right_author_ids),
+                                "year_min": year_min,
+                                "limit_per_pair": limit_per_pair,
+                            },
+                        )
+
+                matrix[left_entry][right_entry] = count
+                pair_parts.append(
+                    dumps_bytes({"left": left_entry, "right": right_entry, "count": count})[:-1]
+                    + b',"items":'
+                    + items_json
+                    + b"}"
                 )
 
-        return {
-            "limit_per_pair": limit_per_pair,
-            "exact_base_match": payload.exact_base_match,
-            "left_authors": left_entries,
-            "right_authors": right_entries,
-            "matrix": matrix,
-            "pair_pubs": pair_pubs,
-            "pair_count": len(pair_pubs),
-        }
+        # Same document and key order as before; the SQL-encoded items are
+        # spliced in as bytes instead of being parsed and re-encoded.
+        head = dumps_bytes(
+            {
+                "limit_per_pair": limit_per_pair,
+                "exact_base_match": exact_base_match,
+                "left_authors": left_entries,
+                "right_authors": right_entries,
+                "matrix": matrix,
+            }
+        )
+        body = b"".join(
+            (
+                head[:-1],
+                b',"pair_pubs":[',
+                b",".join(pair_parts),
+                b'],"pair_count":',
+                str(len(pair_parts)).encode("ascii"),
+                b"}",
+            )
+        )
+        PAIRS_STAGE_SECONDS.observe(query_seconds, "pair_query")
+        PAIRS_STAGE_SECONDS.observe(time.perf_counter() - pairs_started - query_seconds, "serialize")
+        return body
+    except sqlite3.OperationalError as exc:
+        if ctx.cancelled:
+            raise QueryTimeoutError("Query interrupted at deadline.") from exc
+        raise
     finally:
+        ctx.detach()
         conn.close()
 
 
+def _pairs_args(
+    left: list[str],
+    right: list[str],
+    limit_per_pair: int | None,
+    author_limit: int | None,
+    exact_base_match: bool,
+    year_min: int | None,
+) -> dict[str, Any]:
+    """Validate a pairs request and return it in canonical form (the arguments of the query)."""
+    left_entries = _sanitize_author_entries(left)
+    right_entries = _sanitize_author_entries(right)
+    if not left_entries or not right_entries:
+        raise HTTPException(status_code=400, detail="Both left and right author lists are required.")
+    if len(left_entries) > MAX_ENTRIES_PER_SIDE or len(right_entries) > MAX_ENTRIES_PER_SIDE:
+        raise HTTPException(status_code=400, detail=f"Too many authors. Max {MAX_ENTRIES_PER_SIDE} per side is allowed.")
+
+    if author_limit is not None:
+        author_limit = min(int(author_limit), MAX_AUTHOR_RESOLVE)
+    return {
+        "left_entries": left_entries,
+        "right_entries": right_entries,
+        "limit_per_pair": None if limit_per_pair is None else _clamp_limit(limit_per_pair, default=20),
+        "author_limit": author_limit,
+        "exact_base_match": bool(exact_base_match),
+        "year_min": None if year_min is None else int(year_min),
+    }
+
+
+def _pairs_etag(generation: str | None, args: dict[str, Any]) -> str | None:
+    """Strong validator for a pairs result: the data generation plus a hash of the canonical request."""
+    if not generation:
+        return None
+    canonical = json.dumps(args, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+    return f'"{generation}-{digest}"'
+
+
+def _encoded_etag(etag: str, encoding: str | None) -> str:
+    # Each content coding is its own representation, so it gets its own strong tag.
+    return etag if encoding is None else f'{etag[:-1]}-{encoding}"'
+
+
+def _matching_etag(if_none_match: str | None, etag: str) -> str | None:
+    """The tag from ``If-None-Match`` that names a representation of ``etag``, if any."""
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    candidates = {etag, *(_encoded_etag(etag, encoding) for encoding in supported_encodings())}
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag in candidates:
+            return tag
+    return None
+
+
+async def _serve_pairs(request: Request, args: dict[str, Any]) -> Response:
+    generation = _data_generation()
+    etag = _pairs_etag(generation, args)
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    headers = {"Vary": "Accept-Encoding"}
+    if etag is not None:
+        headers["Cache-Control"] = PAIRS_CACHE_CONTROL
+        matched = _matching_etag(request.headers.get("if-none-match"), etag)
+        if matched is not None:
+            headers["ETag"] = matched
+            return Response(status_code=304, headers=headers)
+
+    try:
+        body = await query_executor.run(
+            _compute_coauthor_pairs,
+            args["left_entries"],
+            args["right_entries"],
+            args["limit_per_pair"],
+            args["author_limit"],
+            args["exact_base_match"],
+            args["year_min"],
+        )
+    except QueueFullError as exc:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many concurrent queries. Retry later.",
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
+    except QueryTimeoutError as exc:
+        raise HTTPException(
+            status_code=504,
+            detail=f"Query exceeded the {QUERY_TIMEOUT_MS} ms deadline.",
+        ) from exc
+
+    if etag is not None and _data_generation() != generation:
+        # The database was swapped while the query ran; the body may belong to either generation.
+        etag = None
+        headers.pop("Cache-Control")
+    if len(body) < RESPONSE_COMPRESS_MIN_BYTES:
+        encoding = None
+    if encoding:
+        compress_started = time.perf_counter()
+        body = await asyncio.to_thread(compress, body, encoding)
+        PAIRS_STAGE_SECONDS.observe(time.perf_counter() - compress_started, "compress")
+        headers["Content-Encoding"] = encoding
+    if etag is not None:
+        headers["ETag"] = _encoded_etag(etag, encoding)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.post("/api/coauthors/pairs")
+async def api_coauthors_pairs(
+    payload: CoauthoredPairsRequest,
+    request: Request,
+) -> Response:
+    args = _pairs_args(
+        payload.left,
+        payload.right,
+        payload.limit_per_pair,
+        payload.author_limit,
+        payload.exact_base_match,
+        payload.year_min,
+    )
+    return await _serve_pairs(request, args)
+
+
+@app.get("/api/coauthors/pairs")
+async def api_coauthors_pairs_get(
+    request: Request,
+    left: list[str] = Query(default=[]),
+    right: list[str] = Query(default=[]),
+    limit_per_pair: int | None = None,
+    author_limit: int | None = None,
+    exact_base_match: bool = True,
+    year_min: int | None = None,
+) -> Response:
+    """Cacheable form of the POST endpoint; repeat ``left``/``right`` once per author."""
+    args = _pairs_args(left, right, limit_per_pair, author_limit, exact_base_match, year_min)
+    return await _serve_pairs(request, args)
+
+
+def _collect_pipeline_metrics() -> None:
+    # Scrapes only read the state row; logs and reaping are left to /api/state.
+    snapshot = manager.status()
+    PIPELINE_STATUS.replace({(str(snapshot["status"]), str(snapshot["step"] or "")): 1})
+    PIPELINE_PROGRESS.replace(
+        {
+            (field,): value
+            for field, value in (snapshot["progress"] or {}).items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        }
+    )
+
+
+def _collect_executor_metrics() -> None:
+    snapshot = query_executor.snapshot()
+    QUERY_EXECUTOR.replace(
+        {
+            (field,): snapshot[field]
+            for field in (
+                "max_workers",
+                "max_queue",
+                "queued",
+                "running",
+                "submitted",
+                "completed",
+                "failed",
+                "rejected",
+                "timed_out",
+            )
+        }
+    )
+
+
+metrics_registry.add_collector(_collect_pipeline_metrics)
+metrics_registry.add_collector(_collect_executor_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics() -> PlainTextResponse:
+    return PlainTextResponse(metrics_registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/api/query/executor")
+def api_query_executor() -> dict[str, Any]:
+    return query_executor.snapshot()
+
+
+@app.get("/api/query/slow")
+def api_query_slow(limit: int | None = None) -> dict[str, Any]:
+    if limit is not None and limit < 0:
+        raise HTTPException(status_code=400, detail="limit must be >= 0")
+    return slow_query_log.snapshot(limit)
+
+
+@app.post("/api/query/slow/clear")
+def api_query_slow_clear() -> dict[str, Any]:
+    return {"cleared": slow_query_log.clear()}
+
+
 @app.get("/api/config")
 def api_config() -> dict[str, Any]:
     return {
@@ -562,13 +1143,58 @@ def api_config() -> dict[str, Any]:
         "default_dtd_url": DEFAULT_DTD_URL,
         "default_batch_size": DEFAULT_BATCH_SIZE,
         "default_progress_every": DEFAULT_PROGRESS_EVERY,
+        "default_clustered_pub_authors": DEFAULT_CLUSTERED_PUB_AUTHORS,
         "data_dir": str(DATA_DIR),
     }
 
 
 @app.get("/api/state")
-def api_state() -> dict[str, Any]:
-    return manager.snapshot()
+def api_state(since: int | None = None) -> dict[str, Any]:
+    if since is not None and since < 0:
+        raise HTTPException(status_code=400, detail="since must be >= 0")
+    return manager.snapshot(since)
+
+
+def _sse_event(payload: dict[str, Any]) -> str:
+    return f"event: state\ndata: {json.dumps(payload, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+
+@app.get("/api/state/stream")
+async def api_state_stream(request: Request) -> StreamingResponse:
+    # Subscribe before the initial snapshot so no change falls in between.
+    queue = state_broadcaster.subscribe()
+
+    async def _events() -> Any:
+        try:
+            snapshot = await asyncio.to_thread(manager.snapshot)
+            snapshot["log_reset"] = True
+            cursor = int(snapshot["log_seq"])
+            yield f"retry: 3000\n{_sse_event(snapshot)}"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), timeout=STATE_STREAM_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    break
+                payload = StateBroadcaster.catch_up(event, cursor)
+                if payload is None:
+                    payload = await asyncio.to_thread(manager.snapshot)
+                    payload["log_reset"] = True
+                payload.pop("log_base", None)
+                cursor = int(payload["log_seq"])
+                yield _sse_event(payload)
+        finally:
+            state_broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/api/files")
@@ -582,6 +1208,7 @@ def api_files() -> dict[str, Any]:
             "db": _safe_file_info(DATA_DIR / "dblp.sqlite"),
             "db_wal": _safe_file_info(DATA_DIR / "dblp.sqlite-wal"),
             "db_shm": _safe_file_info(DATA_DIR / "dblp.sqlite-shm"),
+            "db_manifest": _safe_file_info(manifest_path(DATA_DIR / "dblp.sqlite")),
         },
     }
 
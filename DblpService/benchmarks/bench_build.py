@@ -0,0 +1,190 @@
+"""Benchmark the build pipeline offline on synthetic DBLP XML.
+
+Generates a dump with ``benchmarks.synthetic_dblp`` (reused across runs with
+the same parameters), serves it from a local HTTP server standing in for
+dblp.org, and runs ``run_pipeline`` end to end in a fresh process per round.
+Reports records/sec, wall time per phase, peak RSS of the build process and
+the size of the resulting database.
+
+    python -m benchmarks.bench_build --records 200000 --rounds 3 --output bench/build.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import hashlib
+import http.server
+import json
+import multiprocessing
+import resource
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable
+
+from benchmarks.common import db_size_bytes, summarize_ms, write_results
+from benchmarks.synthetic_dblp import add_generator_arguments, generate, generator_kwargs
+
+# Pipeline step functions timed as phases, in pipeline order.
+PHASES = (
+    ("download", "_download_file"),
+    ("decompress_xml", "_decompress_xml"),
+    ("build_db", "_build_db"),
+    ("dataset_meta", "_write_dataset_meta"),
+    ("finalize_db", "_finalize_db"),
+)
+
+
+def serve_directory(directory: Path) -> http.server.ThreadingHTTPServer:
+    """Serve ``directory`` on an ephemeral 127.0.0.1 port from a daemon thread."""
+    handler = functools.partial(_QuietHandler, directory=str(directory))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def _timed(func: Callable[..., Any], phase: str, timings: dict[str, float]) -> Callable[..., Any]:
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - started
+
+    return wrapper
+
+
+def run_round(
+    base_url: str,
+    data_dir: str,
+    batch_size: int,
+    clustered: bool,
+    finalize: bool,
+) -> dict[str, Any]:
+    """One pipeline run; executed in a child process so ``ru_maxrss`` is the build's alone."""
+    from dblp_builder import pipeline
+
+    timings: dict[str, float] = {}
+    for phase, name in PHASES:
+        setattr(pipeline, name, _timed(getattr(pipeline, name), phase, timings))
+
+    config = pipeline.PipelineConfig(
+        xml_gz_url=f"{base_url}/dblp.xml.gz",
+        dtd_url=f"{base_url}/dblp.dtd",
+        data_dir=Path(data_dir),
+        batch_size=batch_size,
+        clustered_pub_authors=clustered,
+        finalize=finalize,
+        allowed_download_hosts=frozenset({"127.0.0.1"}),
+    )
+    started = time.perf_counter()
+    result = pipeline.run_pipeline(
+        config=config,
+        log=lambda _msg: None,
+        progress=lambda _phase, _payload: None,
+        should_stop=lambda: False,
+    )
+    elapsed = time.perf_counter() - started
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "processed_records": result["processed_records"],
+        "records_per_sec": result["records_per_sec"],
+        "phase_seconds": {phase: round(seconds, 3) for phase, seconds in timings.items()},
+        # Linux reports ru_maxrss in KiB.
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "db_size_bytes": db_size_bytes(config.db_path),
+    }
+
+
+def prepare_dump(workdir: Path, kwargs: dict[str, Any]) -> tuple[Path, dict[str, Any]]:
+    """Generate a synthetic dump under ``workdir``, reusing one made with the same arguments."""
+    digest = hashlib.sha256(json.dumps(kwargs, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    source_dir = workdir / f"synthetic-{kwargs['records']}-{digest}"
+    summary_path = source_dir / "summary.json"
+    if summary_path.exists():
+        print(f"Reusing synthetic dump in {source_dir}")
+        return source_dir, json.loads(summary_path.read_text(encoding="utf-8"))
+    started = time.perf_counter()
+    dataset = generate(source_dir, **kwargs)
+    summary_path.write_text(json.dumps(dataset, indent=2), encoding="utf-8")
+    print(f"Generated {kwargs['records']} records in {time.perf_counter() - started:.1f}s -> {source_dir}")
+    return source_dir, dataset
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_generator_arguments(parser)
+    parser.add_argument("--workdir", type=Path, default=None, help="keeps generated dumps between runs")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--clustered", action="store_true", help="build a clustered pub_authors table")
+    parser.add_argument("--no-finalize", action="store_true")
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="dblp-bench-build-"))
+    source_dir, dataset = prepare_dump(workdir, generator_kwargs(args))
+
+    server = serve_directory(source_dir)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    rounds: list[dict[str, Any]] = []
+    try:
+        for index in range(args.rounds):
+            data_dir = Path(tempfile.mkdtemp(prefix=f"round{index}-", dir=workdir))
+            # spawn, not fork: the child starts without this process's memory.
+            with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                result = pool.submit(
+                    run_round,
+                    base_url,
+                    str(data_dir),
+                    args.batch_size,
+                    args.clustered,
+                    not args.no_finalize,
+                ).result()
+            shutil.rmtree(data_dir, ignore_errors=True)
+            rounds.append(result)
+            print(
+                f"Round {index + 1}/{args.rounds}: {result['elapsed_seconds']}s, "
+                f"{result['records_per_sec']} rec/s, peak RSS {result['peak_rss_bytes'] // 2**20} MiB"
+            )
+    finally:
+        server.shutdown()
+
+    phases = sorted({phase for result in rounds for phase in result["phase_seconds"]})
+    write_results(
+        args.output,
+        {
+            "benchmark": "build_pipeline",
+            "dataset": dataset,
+            "batch_size": args.batch_size,
+            "clustered_pub_authors": args.clustered,
+            "finalize": not args.no_finalize,
+            "rounds": rounds,
+            "summary": {
+                "elapsed": summarize_ms([r["elapsed_seconds"] * 1000.0 for r in rounds]),
+                "records_per_sec_max": max((r["records_per_sec"] for r in rounds), default=None),
+                "phase_ms": {
+                    phase: summarize_ms(
+                        [r["phase_seconds"][phase] * 1000.0 for r in rounds if phase in r["phase_seconds"]]
+                    )
+                    for phase in phases
+                },
+                "peak_rss_bytes_max": max((r["peak_rss_bytes"] for r in rounds), default=None),
+                "db_size_bytes": rounds[-1]["db_size_bytes"] if rounds else None,
+            },
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
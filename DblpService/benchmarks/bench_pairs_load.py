@@ -0,0 +1,381 @@
+"""Load-test ``/api/coauthors/pairs``: throughput, tail latency and SQLite time share.
+
+Uses ``--source`` or builds (and caches under ``--workdir``) a database from a
+``benchmarks.synthetic_dblp`` dump, then replays one deterministic request mix
+with ``--concurrency`` closed-loop clients:
+
+- ``inproc``: ``_compute_coauthor_pairs`` through the app's query executor,
+  so admission limits apply but the HTTP stack and compression do not.
+- ``http``: JSON POSTs over keep-alive connections to ``--url``, or to a
+  single-worker ``uvicorn`` started on the same database when it is omitted.
+
+Each request draws a matrix size from ``--sizes`` (capped at ``--max-side``)
+and one combination of ``exact_base_match``, ``year_min`` and
+``limit_per_pair``. Authors are sampled from the most prolific ones, so pairs
+actually share publications. SQLite share is the time the pairs stage
+histogram spends in connect, resolve and pair_query, divided by the summed
+request latency (``sqlite_share``) or by the time in all stages
+(``sqlite_share_of_work``, which leaves out executor queue wait). In ``http``
+mode the histogram is read from ``/metrics``, so the server must run a single
+worker.
+
+    python -m benchmarks.bench_pairs_load --records 200000 --mode both --concurrency 8 --output bench/pairs_load.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import http.client
+import itertools
+import json
+import os
+import random
+import re
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+
+from benchmarks.bench_build import prepare_dump, serve_directory
+from benchmarks.common import (
+    SERVICE_DIR,
+    import_service_app,
+    pick_prolific_authors,
+    summarize_ms,
+    write_results,
+)
+from benchmarks.synthetic_dblp import add_generator_arguments, generator_kwargs
+
+# Stages of dblp_pairs_stage_duration_seconds that are spent inside SQLite.
+SQLITE_STAGES = ("connect", "resolve", "pair_query")
+_STAGE_SUM = re.compile(r'^dblp_pairs_stage_duration_seconds_sum\{stage="([^"]+)"\} (\S+)$', re.M)
+
+# (status, scenario, latency in ms, response bytes)
+Sample = tuple[int, str, float, int]
+
+
+def build_database(workdir: Path, kwargs: dict[str, Any]) -> Path:
+    """Build the synthetic dump into a finalized database once; later runs reuse it."""
+    from dblp_builder.pipeline import PipelineConfig, load_manifest, run_pipeline
+
+    source_dir, _ = prepare_dump(workdir, kwargs)
+    data_dir = source_dir / "db"
+    config = PipelineConfig(
+        xml_gz_url="",
+        dtd_url="",
+        data_dir=data_dir,
+        allowed_download_hosts=frozenset({"127.0.0.1"}),
+    )
+    if load_manifest(config.db_path) is not None:
+        print(f"Reusing database {config.db_path}")
+        return config.db_path
+
+    server = serve_directory(source_dir)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    config.xml_gz_url = f"{base_url}/dblp.xml.gz"
+    config.dtd_url = f"{base_url}/dblp.dtd"
+    started = time.perf_counter()
+    try:
+        run_pipeline(
+            config=config,
+            log=lambda _msg: None,
+            progress=lambda _phase, _payload: None,
+            should_stop=lambda: False,
+        )
+    finally:
+        server.shutdown()
+    print(f"Built {config.db_path} in {time.perf_counter() - started:.1f}s")
+    return config.db_path
+
+
+def build_workload(
+    db_path: Path,
+    count: int,
+    sizes: list[int],
+    year_min: int,
+    limit_per_pair: int,
+    seed: int,
+) -> list[dict[str, Any]]:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        pool = [name for _, name in pick_prolific_authors(conn, 5000, seed)]
+    finally:
+        conn.close()
+    settings = list(
+        itertools.product((True, False), (None, year_min), (None, limit_per_pair))
+    )
+    rng = random.Random(seed)
+    workload: list[dict[str, Any]] = []
+    for _ in range(count):
+        side = min(rng.choice(sizes), len(pool) // 2)
+        names = rng.sample(pool, side * 2)
+        exact_base_match, year, limit = rng.choice(settings)
+        workload.append(
+            {
+                "left": names[:side],
+                "right": names[side:],
+                "exact_base_match": exact_base_match,
+                "year_min": year,
+                "limit_per_pair": limit,
+            }
+        )
+    return workload
+
+
+def scenario(payload: dict[str, Any]) -> str:
+    return f"{len(payload['left'])}x{len(payload['right'])}"
+
+
+def stage_seconds(metrics_text: str) -> dict[str, float]:
+    return {stage: float(value) for stage, value in _STAGE_SUM.findall(metrics_text)}
+
+
+async def _run_inproc(
+    service_app: Any, workload: list[dict[str, Any]], concurrency: int
+) -> list[Sample]:
+    from fastapi import HTTPException
+
+    from query_executor import QueryTimeoutError, QueueFullError
+
+    requests = iter(workload)
+    samples: list[Sample] = []
+
+    async def client() -> None:
+        for payload in requests:
+            started = time.perf_counter()
+            size = 0
+            try:
+                args = service_app._pairs_args(
+                    payload["left"],
+                    payload["right"],
+                    payload["limit_per_pair"],
+                    None,
+                    payload["exact_base_match"],
+                    payload["year_min"],
+                )
+                body = await service_app.query_executor.run(
+                    service_app._compute_coauthor_pairs,
+                    args["left_entries"],
+                    args["right_entries"],
+                    args["limit_per_pair"],
+                    args["author_limit"],
+                    args["exact_base_match"],
+                    args["year_min"],
+                )
+                status, size = 200, len(body)
+            except HTTPException as exc:
+                status = exc.status_code
+            except QueueFullError:
+                status = 429
+            except QueryTimeoutError:
+                status = 504
+            samples.append((status, scenario(payload), (time.perf_counter() - started) * 1000.0, size))
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return samples
+
+
+def run_inproc(
+    service_app: Any, workload: list[dict[str, Any]], concurrency: int
+) -> tuple[list[Sample], dict[str, float]]:
+    before = stage_seconds(service_app.metrics_registry.render())
+    samples = asyncio.run(_run_inproc(service_app, workload, concurrency))
+    after = stage_seconds(service_app.metrics_registry.render())
+    return samples, _delta(before, after)
+
+
+def _get(base_url: str, path: str, timeout: float = 10.0) -> tuple[int, bytes]:
+    parsed = urlparse(base_url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=timeout)
+    try:
+        conn.request("GET", f"{parsed.path.rstrip('/')}{path}")
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+
+def run_http(
+    base_url: str,
+    workload: list[dict[str, Any]],
+    concurrency: int,
+    accept_encoding: str,
+) -> tuple[list[Sample], dict[str, float]]:
+    parsed = urlparse(base_url)
+    requests = iter(workload)
+    lock = threading.Lock()
+    samples: list[Sample] = []
+
+    def client() -> None:
+        conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=300)
+        headers = {"Content-Type": "application/json", "Accept-Encoding": accept_encoding}
+        try:
+            while True:
+                with lock:
+                    payload = next(requests, None)
+                if payload is None:
+                    return
+                body = json.dumps(payload).encode("utf-8")
+                started = time.perf_counter()
+                conn.request("POST", f"{parsed.path.rstrip('/')}/api/coauthors/pairs", body, headers)
+                response = conn.getresponse()
+                size = len(response.read())
+                elapsed = (time.perf_counter() - started) * 1000.0
+                with lock:
+                    samples.append((response.status, scenario(payload), elapsed, size))
+        finally:
+            conn.close()
+
+    before = stage_seconds(_get(base_url, "/metrics")[1].decode("utf-8"))
+    with ThreadPoolExecutor(concurrency) as pool:
+        for future in [pool.submit(client) for _ in range(concurrency)]:
+            future.result()
+    after = stage_seconds(_get(base_url, "/metrics")[1].decode("utf-8"))
+    return samples, _delta(before, after)
+
+
+def _delta(before: dict[str, float], after: dict[str, float]) -> dict[str, float]:
+    return {stage: round(after[stage] - before.get(stage, 0.0), 4) for stage in sorted(after)}
+
+
+def start_server(db_path: Path, data_dir: Path) -> tuple[subprocess.Popen[bytes], str]:
+    """Run the app under a single uvicorn worker on a free local port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", "1", "--log-level", "warning"],
+        cwd=SERVICE_DIR,
+        env={**os.environ, "DB_PATH": str(db_path), "DATA_DIR": str(data_dir)},
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"uvicorn exited with status {process.returncode}")
+        try:
+            if _get(base_url, "/api/health", timeout=2.0)[0] == 200:
+                return process, base_url
+        except OSError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("uvicorn did not become healthy within 60s")
+
+
+def report(samples: list[Sample], elapsed: float, stages: dict[str, float], concurrency: int) -> dict[str, Any]:
+    ok = [sample for sample in samples if sample[0] == 200]
+    latencies = [sample[2] for sample in ok]
+    by_scenario: dict[str, list[float]] = {}
+    for _, name, latency, _ in ok:
+        by_scenario.setdefault(name, []).append(latency)
+    sqlite_seconds = sum(stages.get(stage, 0.0) for stage in SQLITE_STAGES)
+    work_seconds = sum(stages.values())
+    return {
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "elapsed_seconds": round(elapsed, 3),
+        "qps": round(len(ok) / elapsed, 2) if elapsed else None,
+        "status": dict(sorted(Counter(str(sample[0]) for sample in samples).items())),
+        "latency": summarize_ms(latencies),
+        "by_matrix": {
+            name: summarize_ms(values)
+            for name, values in sorted(by_scenario.items(), key=lambda item: int(item[0].split("x")[0]))
+        },
+        "response_bytes_mean": round(sum(sample[3] for sample in ok) / len(ok)) if ok else None,
+        "stage_seconds": stages,
+        "sqlite_share": round(sqlite_seconds / (sum(latencies) / 1000.0), 3) if latencies else None,
+        # Excludes executor queue wait and the HTTP stack.
+        "sqlite_share_of_work": round(sqlite_seconds / work_seconds, 3) if work_seconds else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_generator_arguments(parser)
+    parser.add_argument("--source", type=Path, default=None, help="existing dblp.sqlite; skips generation")
+    parser.add_argument("--workdir", type=Path, default=None, help="keeps generated dumps and databases between runs")
+    parser.add_argument("--mode", choices=("inproc", "http", "both"), default="both")
+    parser.add_argument("--url", default=None, help="running service for --mode http; default starts uvicorn")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--sizes", default="1,5,10,25,50", help="comma-separated matrix sides")
+    parser.add_argument("--max-side", type=int, default=50, help="the server's MAX_ENTRIES_PER_SIDE")
+    parser.add_argument("--year-min", type=int, default=2020)
+    parser.add_argument("--limit-per-pair", type=int, default=20)
+    parser.add_argument("--accept-encoding", default="gzip", help="sent by the http clients")
+    parser.add_argument("--workload-seed", type=int, default=11)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="dblp-bench-load-"))
+    db_path = args.source.resolve() if args.source else build_database(workdir, generator_kwargs(args))
+    sizes = sorted({min(int(size), args.max_side) for size in args.sizes.split(",") if size.strip()})
+    workload = build_workload(
+        db_path,
+        args.warmup + args.requests,
+        sizes,
+        args.year_min,
+        args.limit_per_pair,
+        args.workload_seed,
+    )
+    warmup, measured = workload[: args.warmup], workload[args.warmup :]
+    scratch = Path(tempfile.mkdtemp(prefix="state-", dir=workdir))
+    results: dict[str, Any] = {}
+
+    if args.mode in ("inproc", "both"):
+        os.environ["DB_PATH"] = str(db_path)
+        service_app = import_service_app(scratch)
+        run_inproc(service_app, warmup, args.concurrency)
+        started = time.perf_counter()
+        samples, stages = run_inproc(service_app, measured, args.concurrency)
+        results["inproc"] = report(samples, time.perf_counter() - started, stages, args.concurrency)
+        results["inproc"]["query_executor"] = service_app.query_executor.snapshot()
+        print(f"inproc: {results['inproc']['qps']} req/s, p99 {results['inproc']['latency']['p99_ms']} ms")
+
+    if args.mode in ("http", "both"):
+        process = None
+        base_url = args.url
+        if base_url is None:
+            process, base_url = start_server(db_path, scratch)
+        try:
+            run_http(base_url, warmup, args.concurrency, args.accept_encoding)
+            started = time.perf_counter()
+            samples, stages = run_http(base_url, measured, args.concurrency, args.accept_encoding)
+            results["http"] = report(samples, time.perf_counter() - started, stages, args.concurrency)
+            results["http"]["query_executor"] = json.loads(_get(base_url, "/api/query/executor")[1])
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=30)
+        print(f"http: {results['http']['qps']} req/s, p99 {results['http']['latency']['p99_ms']} ms")
+
+    write_results(
+        args.output,
+        {
+            "benchmark": "pairs_load",
+            "source": str(db_path),
+            "sizes": sizes,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "year_min": args.year_min,
+            "limit_per_pair": args.limit_per_pair,
+            "workload_seed": args.workload_seed,
+            **results,
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
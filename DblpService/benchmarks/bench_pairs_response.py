@@ -0,0 +1,163 @@
+"""Compare the old and new ways of producing a pairs API response body.
+
+Runs the same ``--side`` x ``--side`` matrix of prolific authors through:
+
+- ``legacy``: per-publication row dicts, FastAPI's ``jsonable_encoder`` and
+  ``json.dumps`` (what ``/api/coauthors/pairs`` did before bytes encoding).
+- ``bytes``: ``_compute_coauthor_pairs`` as served now: SQLite encodes each
+  item row with ``json_object``, the rows are joined into the item arrays
+  as bytes and the rest is encoded by ``response_codec``.
+
+and reports query/encode latency, body size and compressed sizes. Both bodies
+are parsed once and compared so the numbers are for identical documents.
+
+    python -m benchmarks.bench_pairs_response --source data/dblp.sqlite --output bench/pairs_response.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from benchmarks.common import import_service_app, pick_prolific_authors, summarize_ms, write_results
+
+
+def legacy_document(service_app: Any, left: list[str], right: list[str]) -> dict[str, Any]:
+    conn = service_app._get_connection()
+    try:
+        interned = service_app._ensure_fullmeta_schema(conn)
+        left_ids = {entry: service_app._resolve_author_ids(conn, entry) for entry in left}
+        right_ids = {entry: service_app._resolve_author_ids(conn, entry) for entry in right}
+        matrix: dict[str, dict[str, int]] = {entry: {} for entry in left}
+        pair_pubs: list[dict[str, Any]] = []
+        for left_entry, left_author_ids in left_ids.items():
+            for right_entry, right_author_ids in right_ids.items():
+                items: list[dict[str, Any]] = []
+                if left_author_ids and right_author_ids:
+                    sql = service_app._pair_query_sql(
+                        interned, left_author_ids, right_author_ids, False, False
+                    )
+                    rows = conn.execute(sql, (*left_author_ids, *right_author_ids)).fetchall()
+                    items = [
+                        {
+                            "title": row["title"],
+                            "year": row["year"],
+                            "venue": row["venue"],
+                            "pub_type": row["pub_type"],
+                        }
+                        for row in rows
+                    ]
+                matrix[left_entry][right_entry] = len(items)
+                pair_pubs.append(
+                    {"left": left_entry, "right": right_entry, "count": len(items), "items": items}
+                )
+    finally:
+        conn.close()
+    return {
+        "limit_per_pair": None,
+        "exact_base_match": True,
+        "left_authors": left,
+        "right_authors": right,
+        "matrix": matrix,
+        "pair_pubs": pair_pubs,
+        "pair_count": len(pair_pubs),
+    }
+
+
+def legacy_body(service_app: Any, left: list[str], right: list[str]) -> tuple[bytes, float]:
+    from fastapi.encoders import jsonable_encoder
+
+    document = legacy_document(service_app, left, right)
+    started = time.perf_counter()
+    body = json.dumps(
+        jsonable_encoder(document), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+    return body, (time.perf_counter() - started) * 1000.0
+
+
+def bytes_body(service_app: Any, left: list[str], right: list[str]) -> tuple[bytes, None]:
+    from query_executor import QueryContext
+
+    body = service_app._compute_coauthor_pairs(QueryContext(), left, right, None, None, True, None)
+    # Encoding is interleaved with the queries here, so only the total is reported.
+    return body, None
+
+
+def measure(
+    produce: Any, service_app: Any, left: list[str], right: list[str], rounds: int
+) -> tuple[bytes, dict[str, Any]]:
+    import response_codec
+
+    totals: list[float] = []
+    encodes: list[float] = []
+    body = b""
+    for _ in range(rounds):
+        started = time.perf_counter()
+        body, encode_ms = produce(service_app, left, right)
+        totals.append((time.perf_counter() - started) * 1000.0)
+        if encode_ms is not None:
+            encodes.append(encode_ms)
+    compressed: dict[str, Any] = {}
+    for encoding in response_codec.supported_encodings():
+        started = time.perf_counter()
+        size = len(response_codec.compress(body, encoding))
+        compressed[encoding] = {
+            "bytes": size,
+            "ms": round((time.perf_counter() - started) * 1000.0, 3),
+        }
+    return body, {
+        "body_bytes": len(body),
+        "total_latency": summarize_ms(totals),
+        "encode_latency": summarize_ms(encodes) if encodes else None,
+        "compressed": compressed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", type=Path, required=True, help="existing dblp.sqlite")
+    parser.add_argument("--side", type=int, default=50, help="authors per matrix side")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    os.environ["DB_PATH"] = str(args.source.resolve())
+    service_app = import_service_app(Path(tempfile.mkdtemp(prefix="dblp-bench-pairs-")))
+    import response_codec
+
+    probe = service_app._get_connection()
+    try:
+        sample = pick_prolific_authors(probe, args.side * 2, args.seed)
+    finally:
+        probe.close()
+    left = [name for _, name in sample[: args.side]]
+    right = [name for _, name in sample[args.side :]]
+
+    legacy, legacy_stats = measure(legacy_body, service_app, left, right, args.rounds)
+    current, current_stats = measure(bytes_body, service_app, left, right, args.rounds)
+    if json.loads(legacy) != json.loads(current):
+        raise SystemExit("legacy and bytes responses differ")
+
+    write_results(
+        args.output,
+        {
+            "benchmark": "pairs_response",
+            "source": str(args.source),
+            "matrix": f"{len(left)}x{len(right)}",
+            "rounds": args.rounds,
+            "json_backend": response_codec.json_backend(),
+            "rows": sum(pair["count"] for pair in json.loads(current)["pair_pubs"]),
+            "legacy": legacy_stats,
+            "bytes": current_stats,
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
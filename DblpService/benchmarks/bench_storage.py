@@ -0,0 +1,261 @@
+"""Compare on-disk size and pair-query cost across database layouts.
+
+Copies an existing ``dblp.sqlite`` (optionally truncated to the first
+``--max-pubs`` publications) into one database per layout, then runs the same
+PC-matrix style pair queries against each and reports file size, pages read
+per matrix and latency. Layouts:
+
+- ``legacy``: inline venue/pub_type strings, rowid ``pub_authors``.
+- ``interned``: venue/pub_type dictionary tables, rowid ``pub_authors``.
+- ``clustered``: interned, plus ``WITHOUT ROWID`` ``pub_authors``.
+
+    python -m benchmarks.bench_storage --source data/dblp.sqlite --output bench/storage.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from benchmarks.common import (
+    db_size_bytes,
+    import_service_app,
+    pick_prolific_authors,
+    read_io_bytes,
+    summarize_ms,
+    write_results,
+)
+from dblp_builder.pipeline import _init_db, _load_clustered_pub_authors
+
+LEGACY_SCHEMA = """
+CREATE TABLE publications (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    year INTEGER,
+    venue TEXT,
+    pub_type TEXT,
+    raw_xml TEXT
+);
+CREATE TABLE authors (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE pub_authors (
+    pub_id INTEGER NOT NULL,
+    author_id INTEGER NOT NULL
+);
+CREATE INDEX idx_pub_authors_pub ON pub_authors(pub_id);
+CREATE INDEX idx_pub_authors_author ON pub_authors(author_id);
+"""
+
+# layout name -> (interned venues, clustered pub_authors)
+LAYOUTS: dict[str, tuple[bool, bool]] = {
+    "legacy": (False, False),
+    "interned": (True, False),
+    "clustered": (True, True),
+}
+
+
+def _source_is_interned(conn: sqlite3.Connection) -> bool:
+    columns = {row[1] for row in conn.execute("PRAGMA src.table_info(publications);")}
+    return "venue_id" in columns
+
+
+def _copy_legacy(conn: sqlite3.Connection, max_pubs: int) -> None:
+    if _source_is_interned(conn):
+        conn.execute(
+            """
+            INSERT INTO publications(id, title, year, venue, pub_type, raw_xml)
+            SELECT p.id, p.title, p.year, v.name, pt.name, p.raw_xml
+            FROM src.publications p
+            LEFT JOIN src.venues v ON v.id = p.venue_id
+            LEFT JOIN src.pub_types pt ON pt.id = p.pub_type_id
+            WHERE p.id <= ?;
+            """,
+            (max_pubs,),
+        )
+    else:
+        conn.execute(
+            """
+            INSERT INTO publications(id, title, year, venue, pub_type, raw_xml)
+            SELECT id, title, year, venue, pub_type, raw_xml
+            FROM src.publications WHERE id <= ?;
+            """,
+            (max_pubs,),
+        )
+
+
+def _copy_interned(conn: sqlite3.Connection, max_pubs: int) -> None:
+    if _source_is_interned(conn):
+        conn.execute("INSERT INTO venues(id, name) SELECT id, name FROM src.venues;")
+        conn.execute("INSERT INTO pub_types(id, name) SELECT id, name FROM src.pub_types;")
+        conn.execute(
+            """
+            INSERT INTO publications(id, title, year, venue_id, pub_type_id, raw_xml)
+            SELECT id, title, year, venue_id, pub_type_id, raw_xml
+            FROM src.publications WHERE id <= ?;
+            """,
+            (max_pubs,),
+        )
+    else:
+        conn.execute(
+            "INSERT INTO venues(name) SELECT DISTINCT venue FROM src.publications "
+            "WHERE venue IS NOT NULL;"
+        )
+        conn.execute(
+            "INSERT INTO pub_types(name) SELECT DISTINCT pub_type FROM src.publications "
+            "WHERE pub_type IS NOT NULL;"
+        )
+        conn.execute(
+            """
+            INSERT INTO publications(id, title, year, venue_id, pub_type_id, raw_xml)
+            SELECT p.id, p.title, p.year, v.id, pt.id, p.raw_xml
+            FROM src.publications p
+            LEFT JOIN venues v ON v.name = p.venue
+            LEFT JOIN pub_types pt ON pt.name = p.pub_type
+            WHERE p.id <= ?;
+            """,
+            (max_pubs,),
+        )
+
+
+def build_layout(source: Path, target: Path, layout: str, max_pubs: int) -> None:
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{target}{suffix}").unlink(missing_ok=True)
+    conn = sqlite3.connect(str(target))
+    try:
+        # Create the schema before attaching the source so unqualified names
+        # cannot resolve to the source's tables.
+        interned, clustered = LAYOUTS[layout]
+        if not interned:
+            conn.executescript(LEGACY_SCHEMA)
+        else:
+            _init_db(conn, clustered_pub_authors=clustered)
+        if clustered:
+            conn.execute(
+                "CREATE TABLE pub_authors_stage (pub_id INTEGER NOT NULL, author_id INTEGER NOT NULL);"
+            )
+        conn.execute("ATTACH DATABASE ? AS src;", (str(source),))
+        if interned:
+            _copy_interned(conn, max_pubs)
+        else:
+            _copy_legacy(conn, max_pubs)
+        conn.execute("INSERT INTO authors(id, name) SELECT id, name FROM src.authors;")
+        conn.execute(
+            f"INSERT INTO {'pub_authors_stage' if clustered else 'pub_authors'}(pub_id, author_id) "
+            "SELECT pub_id, author_id FROM src.pub_authors WHERE pub_id <= ?;",
+            (max_pubs,),
+        )
+        conn.commit()
+        conn.execute("DETACH DATABASE src;")
+        if clustered:
+            _load_clustered_pub_authors(conn, print)
+        conn.execute("PRAGMA journal_mode = DELETE;")
+        conn.execute("VACUUM;")
+    finally:
+        conn.close()
+
+
+def measure_layout(
+    service_app: Any,
+    db_path: Path,
+    interned: bool,
+    left: list[int],
+    right: list[int],
+    rounds: int,
+) -> dict[str, Any]:
+    latencies: list[float] = []
+    page_reads: list[int] = []
+    rows_total = 0
+    page_size = 4096
+    for _ in range(rounds):
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            conn.execute("PRAGMA mmap_size = 0;")
+            page_size = int(conn.execute("PRAGMA page_size;").fetchone()[0])
+            io_before = read_io_bytes()
+            started = time.perf_counter()
+            rows_total = 0
+            for left_id in left:
+                for right_id in right:
+                    sql = service_app._pair_query_sql(interned, [left_id], [right_id], False, False)
+                    rows_total += len(conn.execute(sql, (left_id, right_id)).fetchall())
+            latencies.append((time.perf_counter() - started) * 1000.0)
+            io_after = read_io_bytes()
+            if io_before is not None and io_after is not None:
+                page_reads.append((io_after - io_before) // page_size)
+        finally:
+            conn.close()
+
+    return {
+        "db_size_bytes": db_size_bytes(db_path),
+        "page_size": page_size,
+        "rows_per_matrix": rows_total,
+        "pages_read_per_matrix": (
+            round(sum(page_reads) / len(page_reads), 1) if page_reads else None
+        ),
+        "matrix_latency": summarize_ms(latencies),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", type=Path, required=True, help="existing dblp.sqlite")
+    parser.add_argument("--workdir", type=Path, default=None)
+    parser.add_argument("--max-pubs", type=int, default=2_000_000)
+    parser.add_argument("--side", type=int, default=20, help="authors per matrix side")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument(
+        "--layouts",
+        default=",".join(LAYOUTS),
+        help=f"comma-separated subset of {', '.join(LAYOUTS)}",
+    )
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    layouts = [name.strip() for name in args.layouts.split(",") if name.strip()]
+    unknown = set(layouts) - set(LAYOUTS)
+    if unknown:
+        parser.error(f"unknown layouts: {', '.join(sorted(unknown))}")
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="dblp-bench-storage-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    service_app = import_service_app(workdir)
+
+    paths = {name: workdir / f"{name}.sqlite" for name in layouts}
+    for name, path in paths.items():
+        started = time.perf_counter()
+        build_layout(args.source.resolve(), path, name, args.max_pubs)
+        print(f"Built {name} layout in {time.perf_counter() - started:.1f}s -> {path}")
+
+    probe = sqlite3.connect(str(paths[layouts[0]]))
+    try:
+        sample = pick_prolific_authors(probe, args.side * 2, args.seed)
+    finally:
+        probe.close()
+    left = [author_id for author_id, _ in sample[: args.side]]
+    right = [author_id for author_id, _ in sample[args.side :]]
+
+    results = {
+        name: measure_layout(service_app, paths[name], LAYOUTS[name][0], left, right, args.rounds)
+        for name in layouts
+    }
+    write_results(
+        args.output,
+        {
+            "benchmark": "storage_layout",
+            "source": str(args.source),
+            "max_pubs": args.max_pubs,
+            "matrix": f"{len(left)}x{len(right)}",
+            "rounds": args.rounds,
+            "layouts": results,
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
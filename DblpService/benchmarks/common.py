@@ -0,0 +1,79 @@
+"""Shared helpers for the DblpService benchmark scripts."""
+
+from __future__ import annotations
+
+import os
+import random
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any
+
+# Re-exported so the scripts keep importing everything from here.
+from benchmarks.reporting import db_size_bytes, percentile, summarize_ms, write_results
+
+__all__ = [
+    "SERVICE_DIR",
+    "db_size_bytes",
+    "import_service_app",
+    "percentile",
+    "pick_prolific_authors",
+    "read_io_bytes",
+    "summarize_ms",
+    "write_results",
+]
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+
+
+def import_service_app(data_dir: Path) -> Any:
+    """Import DblpService's app module with DATA_DIR pointed at a scratch directory."""
+    os.environ.setdefault("DATA_DIR", str(data_dir))
+    if str(SERVICE_DIR) not in sys.path:
+        sys.path.insert(0, str(SERVICE_DIR))
+    import app as service_app
+
+    return service_app
+
+
+def read_io_bytes() -> int | None:
+    """Bytes read through read()/pread() by this process (Linux only).
+
+    SQLite reads every page it does not already hold in its own cache with
+    pread(), so with mmap disabled the delta divided by the page size is the
+    number of pages the query touched, whether or not the OS cache served them.
+    """
+    try:
+        with open("/proc/self/io", "rb") as fh:
+            for line in fh:
+                if line.startswith(b"rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def pick_prolific_authors(
+    conn: sqlite3.Connection,
+    count: int,
+    seed: int,
+    pool: int = 5000,
+) -> list[tuple[int, str]]:
+    """Deterministically sample authors from the most prolific ``pool`` authors."""
+    rows = conn.execute(
+        """
+        SELECT a.id, a.name
+        FROM (
+            SELECT author_id, COUNT(*) AS c
+            FROM pub_authors
+            GROUP BY author_id
+            ORDER BY c DESC
+            LIMIT ?
+        ) top
+        JOIN authors a ON a.id = top.author_id
+        ORDER BY a.id;
+        """,
+        (pool,),
+    ).fetchall()
+    rng = random.Random(seed)
+    return rng.sample([(int(r[0]), str(r[1])) for r in rows], min(count, len(rows)))
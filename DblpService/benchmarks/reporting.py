@@ -0,0 +1,64 @@
+"""Latency summaries and JSON reports shared by every benchmark script.
+
+Standard library only: the frontend's ``benchmarks/common.py`` loads this file
+by path, so it must not import anything from the DblpService tree.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import platform
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+
+def db_size_bytes(path: Path) -> int:
+    total = 0
+    for suffix in ("", "-wal"):
+        try:
+            total += Path(f"{path}{suffix}").stat().st_size
+        except OSError:
+            pass
+    return total
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize_ms(values: list[float]) -> dict[str, Any]:
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 3) if values else None,
+        "p50_ms": _round(percentile(values, 50)),
+        "p95_ms": _round(percentile(values, 95)),
+        "p99_ms": _round(percentile(values, 99)),
+        "max_ms": _round(max(values) if values else None),
+    }
+
+
+def _round(value: float | None) -> float | None:
+    return None if value is None else round(value, 3)
+
+
+def write_results(path: Path | None, payload: dict[str, Any]) -> None:
+    payload = {
+        "generated_at": datetime.now(tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        **payload,
+    }
+    text = json.dumps(payload, indent=2, ensure_ascii=False)
+    if path is None:
+        print(text)
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text + "\n", encoding="utf-8")
+    print(f"Wrote {path}")
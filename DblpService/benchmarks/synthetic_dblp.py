@@ -0,0 +1,320 @@
+"""Deterministic generator for DBLP-shaped XML and a matching DTD.
+
+Produces ``dblp.xml`` (and ``dblp.xml.gz``) plus ``dblp.dtd`` with the
+features the build pipeline has to cope with: the DBLP record types,
+Zipf-distributed author popularity, homonyms disambiguated the DBLP way
+(``Wei Wang 0001``), names and titles written with DTD character entities,
+``proceedings`` that list editors instead of authors, and ``www`` person
+records. The same arguments and seed always give byte-identical files.
+
+    python -m benchmarks.synthetic_dblp --records 200000 --output-dir bench/synthetic
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import gzip
+import itertools
+import json
+import random
+import shutil
+from pathlib import Path
+from typing import Any, TextIO
+
+DEFAULT_TYPE_WEIGHTS = {
+    "article": 0.37,
+    "inproceedings": 0.50,
+    "proceedings": 0.01,
+    "incollection": 0.02,
+    "book": 0.005,
+    "phdthesis": 0.01,
+    "mastersthesis": 0.001,
+    "www": 0.085,
+}
+
+# Entity name -> code point, declared in the generated DTD.
+ENTITIES = {
+    "auml": 228,
+    "ouml": 246,
+    "uuml": 252,
+    "Auml": 196,
+    "Ouml": 214,
+    "Uuml": 220,
+    "szlig": 223,
+    "eacute": 233,
+    "egrave": 232,
+    "aacute": 225,
+    "iacute": 237,
+    "oacute": 243,
+    "ccedil": 231,
+    "ntilde": 241,
+    "oslash": 248,
+    "aring": 229,
+    "Aring": 197,
+    "euml": 235,
+    "iuml": 239,
+    "uacute": 250,
+}
+
+FIRST_NAMES = [
+    "Wei", "Li", "Jun", "Yang", "Hao", "Xin", "Lei", "Ming", "Anna", "Maria", "John", "David",
+    "Michael", "Sarah", "Thomas", "Peter", "Andreas", "Stefan", "Laura", "Elena", "Carlos",
+    "Luis", "Hiroshi", "Takashi", "Yuki", "Kenji", "Raj", "Amit", "Priya", "Sanjay", "Olga",
+    "Ivan", "Dmitri", "Fatima", "Omar", "Ahmed", "Sofia", "Marco", "Giulia", "Pierre",
+    "Claire", "Lars", "Ingrid", "Mehmet", "Ayse", "Kim", "Min-jun", "Seo-yeon", "Paulo", "Ana",
+]
+ENTITY_FIRST_NAMES = [
+    "J&uuml;rgen", "J&ouml;rg", "Ren&eacute;", "Jos&eacute;", "Fran&ccedil;ois", "Bj&ouml;rn",
+    "S&oslash;ren", "Ra&uacute;l", "In&eacute;s", "Ga&euml;l",
+]
+LAST_NAMES = [
+    "Wang", "Li", "Zhang", "Liu", "Chen", "Yang", "Huang", "Zhao", "Wu", "Zhou", "Smith",
+    "Johnson", "Brown", "Miller", "Davis", "Garcia", "Rodriguez", "Martinez", "Schmidt",
+    "Schneider", "Fischer", "Weber", "Meyer", "Wagner", "Rossi", "Russo", "Ferrari", "Tanaka",
+    "Suzuki", "Takahashi", "Sato", "Kumar", "Singh", "Sharma", "Gupta", "Ivanov", "Petrov",
+    "Nguyen", "Tran", "Kim", "Lee", "Park", "Silva", "Santos", "Dubois", "Martin", "Bernard",
+    "Jensen", "Nielsen", "Yilmaz",
+]
+ENTITY_LAST_NAMES = [
+    "M&uuml;ller", "Sch&auml;fer", "Kr&auml;mer", "Gro&szlig;", "L&oacute;pez", "G&oacute;mez",
+    "Nu&ntilde;ez", "J&oslash;rgensen", "&Ouml;zt&uuml;rk", "Ca&ntilde;ete",
+]
+TITLE_WORDS = [
+    "learning", "graph", "neural", "efficient", "scalable", "distributed", "query", "index",
+    "optimization", "networks", "privacy", "secure", "analysis", "model", "models", "data",
+    "systems", "towards", "approach", "framework", "adaptive", "robust", "federated", "stream",
+    "processing", "database", "transactions", "verification", "formal", "semantics", "memory",
+    "storage", "compression", "inference", "language", "vision", "retrieval", "ranking",
+    "embedding", "temporal", "spatial", "parallel", "GPU", "cache", "benchmark", "evaluation",
+]
+ENTITY_TITLE_WORDS = ["na&iuml;ve", "r&eacute;sum&eacute;", "caf&eacute;", "&Aring;ngstr&ouml;m"]
+
+# DBLP-style venue name fragments.
+JOURNAL_PREFIXES = ["IEEE Trans.", "ACM Trans.", "J.", "Int. J.", "Proc. VLDB", "Inf. Syst."]
+TOPICS = [
+    "Knowl. Data Eng.", "Softw. Eng.", "Comput.", "Netw.", "Database Syst.", "Graph.",
+    "Inf. Theory", "Parallel Distributed Syst.", "Mach. Learn. Res.", "Artif. Intell.",
+]
+CONFERENCES = [
+    "SIGMOD", "VLDB", "ICDE", "KDD", "NeurIPS", "ICML", "CVPR", "ACL", "SOSP", "OSDI", "NSDI",
+    "CCS", "USENIX Security", "ICSE", "FSE", "PLDI", "POPL", "STOC", "FOCS", "WWW", "SIGIR",
+    "CIKM", "AAAI", "IJCAI", "EuroSys", "ATC", "FAST", "MobiCom", "INFOCOM", "CHI",
+]
+
+
+def write_dtd(path: Path) -> None:
+    lines = [f"<!ELEMENT dblp ({'|'.join(DEFAULT_TYPE_WEIGHTS)})*>"]
+    fields = (
+        "author|editor|title|booktitle|pages|year|journal|volume|number|"
+        "publisher|school|ee|url|note|crossref|isbn"
+    )
+    for tag in DEFAULT_TYPE_WEIGHTS:
+        lines.append(f"<!ELEMENT {tag} ({fields})*>")
+        lines.append(f"<!ATTLIST {tag} key CDATA #REQUIRED mdate CDATA #IMPLIED>")
+    for field in fields.split("|"):
+        lines.append(f"<!ELEMENT {field} (#PCDATA)>")
+    for name, code in sorted(ENTITIES.items()):
+        lines.append(f'<!ENTITY {name} "&#{code};">')
+    path.write_text("\n".join(lines) + "\n", encoding="ascii")
+
+
+class _Persons:
+    """Author names ranked by popularity; rank ``r`` is drawn with weight ``1 / r**skew``."""
+
+    def __init__(
+        self,
+        rng: random.Random,
+        count: int,
+        skew: float,
+        homonym_rate: float,
+        entity_rate: float,
+    ) -> None:
+        self.names: list[str] = []
+        self.homonyms = 0
+        bases: list[str] = []
+        used: dict[str, int] = {}
+        for _ in range(count):
+            if bases and rng.random() < homonym_rate:
+                # Another person with an existing base name: DBLP appends a 4-digit number.
+                base = rng.choice(bases)
+            else:
+                first = rng.choice(ENTITY_FIRST_NAMES if rng.random() < entity_rate else FIRST_NAMES)
+                last = rng.choice(ENTITY_LAST_NAMES if rng.random() < entity_rate else LAST_NAMES)
+                middle = f" {chr(65 + rng.randrange(26))}." if rng.random() < 0.3 else ""
+                base = f"{first}{middle} {last}"
+            seen = used.get(base, 0)
+            used[base] = seen + 1
+            bases.append(base)
+            if seen:
+                # Counts chance collisions within the finite name pools as well.
+                self.homonyms += 1
+            self.names.append(base if seen == 0 else f"{base} {seen:04d}")
+        weights = (1.0 / (rank ** skew) for rank in range(1, count + 1))
+        self._cumulative = list(itertools.accumulate(weights))
+        self._rng = rng
+
+    def sample(self, k: int) -> list[str]:
+        total = self._cumulative[-1]
+        picked: dict[str, None] = {}
+        for _ in range(k * 2):
+            if len(picked) == k:
+                break
+            index = bisect.bisect_left(self._cumulative, self._rng.random() * total)
+            picked[self.names[min(index, len(self.names) - 1)]] = None
+        return list(picked)
+
+
+def _title(rng: random.Random, entity_rate: float) -> str:
+    words = [rng.choice(TITLE_WORDS) for _ in range(rng.randint(4, 11))]
+    if rng.random() < entity_rate:
+        words.insert(rng.randrange(len(words)), rng.choice(ENTITY_TITLE_WORDS))
+    words[0] = words[0][:1].upper() + words[0][1:]
+    return " ".join(words) + "."
+
+
+def _write_records(
+    out: TextIO,
+    rng: random.Random,
+    records: int,
+    persons: _Persons,
+    type_weights: dict[str, float],
+    authors_per_record: float,
+    entity_rate: float,
+) -> dict[str, int]:
+    tags = list(type_weights)
+    cumulative = list(itertools.accumulate(type_weights[tag] for tag in tags))
+    journals = [f"{prefix} {topic}" for prefix in JOURNAL_PREFIXES for topic in TOPICS]
+    counts = {tag: 0 for tag in tags}
+    for index in range(records):
+        tag = tags[bisect.bisect_left(cumulative, rng.random() * cumulative[-1])]
+        counts[tag] += 1
+        year = max(1936, 2025 - int(rng.expovariate(1 / 9.0)))
+        if tag == "www":
+            name = persons.sample(1)[0]
+            out.write(
+                f'<www key="homepages/{index % 997}/{index}" mdate="{year}-01-01">\n'
+                f"<author>{name}</author>\n<title>Home Page</title>\n</www>\n"
+            )
+            continue
+        role = "editor" if tag == "proceedings" else "author"
+        extra = max(0.0, authors_per_record - 1.0)
+        count = 1 + (int(rng.expovariate(1 / extra)) if extra > 0 else 0)
+        people = persons.sample(min(count, 60))
+        lines = [f'<{tag} key="{tag}/{index % 9973}/{index}" mdate="{year}-06-30">']
+        lines.extend(f"<{role}>{name}</{role}>" for name in people)
+        lines.append(f"<title>{_title(rng, entity_rate)}</title>")
+        if tag == "article":
+            lines.append(f"<journal>{rng.choice(journals)}</journal>")
+            lines.append(f"<volume>{rng.randint(1, 60)}</volume>")
+        elif tag in ("inproceedings", "incollection", "proceedings"):
+            lines.append(f"<booktitle>{rng.choice(CONFERENCES)}</booktitle>")
+        elif tag in ("phdthesis", "mastersthesis"):
+            lines.append(f"<school>{rng.choice(LAST_NAMES)} University</school>")
+        lines.append(f"<year>{year}</year>")
+        if tag != "proceedings":
+            first_page = rng.randint(1, 900)
+            lines.append(f"<pages>{first_page}-{first_page + rng.randint(3, 30)}</pages>")
+        lines.append(f"<ee>https://doi.org/10.0000/{index}</ee>")
+        lines.append(f"</{tag}>")
+        out.write("\n".join(lines) + "\n")
+    return counts
+
+
+def generate(
+    output_dir: Path,
+    records: int,
+    seed: int = 1,
+    authors: int | None = None,
+    author_skew: float = 1.05,
+    authors_per_record: float = 3.0,
+    homonym_rate: float = 0.02,
+    entity_rate: float = 0.05,
+    type_weights: dict[str, float] | None = None,
+    gzip_level: int = 1,
+) -> dict[str, Any]:
+    """Write ``dblp.xml``, ``dblp.xml.gz`` and ``dblp.dtd`` into ``output_dir``."""
+    type_weights = dict(type_weights or DEFAULT_TYPE_WEIGHTS)
+    unknown = set(type_weights) - set(DEFAULT_TYPE_WEIGHTS)
+    if unknown:
+        raise ValueError(f"Unknown record types: {', '.join(sorted(unknown))}")
+    authors = authors or max(10, records // 2)
+    rng = random.Random(seed)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    xml_path = output_dir / "dblp.xml"
+    write_dtd(output_dir / "dblp.dtd")
+
+    persons = _Persons(rng, authors, author_skew, homonym_rate, entity_rate)
+    with xml_path.open("w", encoding="ascii", newline="\n", buffering=1024 * 1024) as out:
+        out.write('<?xml version="1.0" encoding="ISO-8859-1"?>\n<!DOCTYPE dblp SYSTEM "dblp.dtd">\n<dblp>\n')
+        counts = _write_records(out, rng, records, persons, type_weights, authors_per_record, entity_rate)
+        out.write("</dblp>\n")
+
+    gz_path = output_dir / "dblp.xml.gz"
+    with xml_path.open("rb") as src, gzip.GzipFile(gz_path, "wb", compresslevel=gzip_level, mtime=0) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+    return {
+        "records": records,
+        "seed": seed,
+        "record_types": counts,
+        "persons": authors,
+        "homonyms": persons.homonyms,
+        "author_skew": author_skew,
+        "authors_per_record": authors_per_record,
+        "entity_rate": entity_rate,
+        "xml_bytes": xml_path.stat().st_size,
+        "xml_gz_bytes": gz_path.stat().st_size,
+    }
+
+
+def parse_type_weights(text: str) -> dict[str, float]:
+    """``article=0.4,inproceedings=0.6`` -> weights."""
+    weights: dict[str, float] = {}
+    for part in text.split(","):
+        if part.strip():
+            tag, _, weight = part.partition("=")
+            weights[tag.strip()] = float(weight)
+    return weights
+
+
+def add_generator_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--authors", type=int, default=None, help="distinct persons (default records/2)")
+    parser.add_argument("--author-skew", type=float, default=1.05, help="Zipf exponent of author popularity")
+    parser.add_argument("--authors-per-record", type=float, default=3.0, help="mean authors per record")
+    parser.add_argument("--homonym-rate", type=float, default=0.02)
+    parser.add_argument("--entity-rate", type=float, default=0.05)
+    parser.add_argument(
+        "--types",
+        type=parse_type_weights,
+        default=None,
+        help="record type weights, e.g. article=0.4,inproceedings=0.6",
+    )
+
+
+def generator_kwargs(args: argparse.Namespace) -> dict[str, Any]:
+    return {
+        "records": args.records,
+        "seed": args.seed,
+        "authors": args.authors,
+        "author_skew": args.author_skew,
+        "authors_per_record": args.authors_per_record,
+        "homonym_rate": args.homonym_rate,
+        "entity_rate": args.entity_rate,
+        "type_weights": args.types,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_generator_arguments(parser)
+    parser.add_argument("--output-dir", type=Path, required=True)
+    args = parser.parse_args()
+    summary = generate(args.output_dir, **generator_kwargs(args))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
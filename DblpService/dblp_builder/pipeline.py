@@ -1,9 +1,15 @@
 from __future__ import annotations
 
 import gzip
+import json
+import os
+import secrets
 import sqlite3
+import stat
 import time
 from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from pathlib import Path
 from typing import Any, Callable
 from urllib.parse import urlparse
@@ -23,20 +29,23 @@ PUB_TAGS = {
     "www",
 }
 
+MANIFEST_SUFFIX = ".manifest.json"
+STAGING_SUFFIX = ".building"
+
 ProgressCallback = Callable[[str, dict[str, Any]], None]
 LogCallback = Callable[[str], None]
 ShouldStopCallback = Callable[[], bool]
 
 
-def _validate_download_url(url: str) -> None:
+def _validate_download_url(url: str, allowed_hosts: frozenset[str]) -> None:
     """Only allow downloads from trusted DBLP hosts to reduce SSRF risk."""
     parsed = urlparse(url)
     if parsed.scheme not in ("http", "https"):
         raise ValueError(f"Unsupported URL scheme: {parsed.scheme}")
-    if parsed.hostname not in ALLOWED_DOWNLOAD_HOSTS:
+    if parsed.hostname not in allowed_hosts:
         raise ValueError(
             f"Download host not allowed: {parsed.hostname}. "
-            f"Only {ALLOWED_DOWNLOAD_HOSTS} are permitted."
+            f"Only {set(allowed_hosts)} are permitted."
         )
 
 
@@ -52,6 +61,10 @@ class PipelineConfig:
     batch_size: int = 1000
     progress_every: int = 10000
     rebuild: bool = True
+    clustered_pub_authors: bool = False
+    finalize: bool = True
+    # Not settable through the HTTP API; benchmarks point it at a local server.
+    allowed_download_hosts: frozenset[str] = frozenset(ALLOWED_DOWNLOAD_HOSTS)
 
     @property
     def xml_gz_path(self) -> Path:
@@ -69,6 +82,10 @@ class PipelineConfig:
     def db_path(self) -> Path:
         return self.data_dir / self.db_name
 
+    @property
+    def staging_db_path(self) -> Path:
+        return Path(f"{self.db_path}{STAGING_SUFFIX}")
+
 
 def _normalize(text: str) -> str:
     return " ".join(text.split())
@@ -86,15 +103,17 @@ def _download_file(
     log: LogCallback,
     progress: ProgressCallback,
     should_stop: ShouldStopCallback,
+    allowed_hosts: frozenset[str] = frozenset(ALLOWED_DOWNLOAD_HOSTS),
 ) -> None:
     log(f"Downloading {url} -> {target_path}")
-    _validate_download_url(url)
+    _validate_download_url(url, allowed_hosts)
     target_path.parent.mkdir(parents=True, exist_ok=True)
 
     with requests.get(url, stream=True, timeout=(20, 120)) as response:
         response.raise_for_status()
         total_raw = response.headers.get("content-length")
         total = int(total_raw) if total_raw and total_raw.isdigit() else None
+        last_modified = response.headers.get("last-modified")
         downloaded = 0
         last_report = 0
 
@@ -123,6 +142,14 @@ def _download_file(
             },
         )
 
+    if last_modified:
+        # Keep the server's timestamp so the dump date can be read back from the file.
+        try:
+            modified_at = parsedate_to_datetime(last_modified).timestamp()
+            os.utime(target_path, (modified_at, modified_at))
+        except (TypeError, ValueError, OSError):
+            pass
+
     log(f"Download complete: {target_path} ({downloaded} bytes)")
 
 
@@ -154,29 +181,34 @@ def _decompress_xml(
     log(f"Decompression complete: {target_xml} ({written} bytes)")
 
 
-def _init_db(conn: sqlite3.Connection) -> None:
+def _init_db(conn: sqlite3.Connection, clustered_pub_authors: bool = False) -> None:
     cur = conn.cursor()
     cur.execute("PRAGMA journal_mode = WAL;")
     cur.execute("PRAGMA synchronous = NORMAL;")
     cur.execute("PRAGMA temp_store = MEMORY;")
     cur.execute("PRAGMA foreign_keys = ON;")
 
+    cur.execute("PRAGMA main.table_info(publications);")
+    existing_columns = {row[1] for row in cur.fetchall()}
+    if existing_columns and "venue_id" not in existing_columns:
+        raise RuntimeError(
+            "Existing database uses the legacy publications layout (inline venue/pub_type). "
+            "Enable rebuild to recreate it."
+        )
+
+    # Venue and publication type strings repeat millions of times, so they are
+    # interned into small dictionary tables and referenced by id.
     cur.execute(
         """
-        CREATE TABLE IF NOT EXISTS publications (
+        CREATE TABLE IF NOT EXISTS venues (
             id INTEGER PRIMARY KEY,
-            title TEXT NOT NULL,
-            year INTEGER,
-            venue TEXT,
-            pub_type TEXT,
-            raw_xml TEXT
+            name TEXT NOT NULL UNIQUE
         );
         """
     )
-
     cur.execute(
         """
-        CREATE TABLE IF NOT EXISTS authors (
+        CREATE TABLE IF NOT EXISTS pub_types (
             id INTEGER PRIMARY KEY,
             name TEXT NOT NULL UNIQUE
         );
@@ -184,16 +216,56 @@ def _init_db(conn: sqlite3.Connection) -> None:
     )
     cur.execute(
         """
-        CREATE TABLE IF NOT EXISTS pub_authors (
-            pub_id INTEGER NOT NULL,
-            author_id INTEGER NOT NULL,
-            FOREIGN KEY(pub_id) REFERENCES publications(id),
-            FOREIGN KEY(author_id) REFERENCES authors(id)
+        CREATE TABLE IF NOT EXISTS publications (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            year INTEGER,
+            venue_id INTEGER,
+            pub_type_id INTEGER,
+            raw_xml TEXT,
+            FOREIGN KEY(venue_id) REFERENCES venues(id),
+            FOREIGN KEY(pub_type_id) REFERENCES pub_types(id)
         );
         """
     )
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_pub_authors_pub ON pub_authors(pub_id);")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_pub_authors_author ON pub_authors(author_id);")
+
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS authors (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        );
+        """
+    )
+    if clustered_pub_authors:
+        # Clustered on (author_id, pub_id) with a reverse (pub_id, author_id)
+        # index, so both directions of the pair self-join are index-only and
+        # each pair is stored twice instead of three times. The reverse index
+        # is created after the bulk load in _load_clustered_pub_authors().
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pub_authors (
+                author_id INTEGER NOT NULL,
+                pub_id INTEGER NOT NULL,
+                PRIMARY KEY(author_id, pub_id),
+                FOREIGN KEY(pub_id) REFERENCES publications(id),
+                FOREIGN KEY(author_id) REFERENCES authors(id)
+            ) WITHOUT ROWID;
+            """
+        )
+    else:
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pub_authors (
+                pub_id INTEGER NOT NULL,
+                author_id INTEGER NOT NULL,
+                FOREIGN KEY(pub_id) REFERENCES publications(id),
+                FOREIGN KEY(author_id) REFERENCES authors(id)
+            );
+            """
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_pub_authors_pub ON pub_authors(pub_id);")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_pub_authors_author ON pub_authors(author_id);")
 
     cur.execute(
         """
@@ -231,6 +303,49 @@ def _extract_year_venue(elem: Any) -> tuple[int | None, str | None]:
     return year, venue
 
 
+def _intern(
+    cur: sqlite3.Cursor,
+    table: str,
+    cache: dict[str, int],
+    value: str | None,
+) -> int | None:
+    if value is None:
+        return None
+    value_id = cache.get(value)
+    if value_id is None:
+        cur.execute(f"INSERT OR IGNORE INTO {table}(name) VALUES (?);", (value,))
+        cur.execute(f"SELECT id FROM {table} WHERE name = ?;", (value,))
+        value_id = int(cur.fetchone()[0])
+        cache[value] = value_id
+    return value_id
+
+
+def _is_without_rowid(conn: sqlite3.Connection, table: str) -> bool:
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?;",
+        (table,),
+    ).fetchone()
+    return bool(row and row[0] and "WITHOUT ROWID" in row[0].upper())
+
+
+def _load_clustered_pub_authors(conn: sqlite3.Connection, log: LogCallback) -> None:
+    """Move staged pairs into the clustered table in key order, then index them."""
+    log("Loading clustered pub_authors from staging table")
+    cur = conn.cursor()
+    cur.execute(
+        """
+        INSERT OR IGNORE INTO pub_authors(author_id, pub_id)
+        SELECT author_id, pub_id FROM pub_authors_stage
+        ORDER BY author_id, pub_id;
+        """
+    )
+    cur.execute("DROP TABLE pub_authors_stage;")
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_pub_authors_pub_author ON pub_authors(pub_id, author_id);"
+    )
+    conn.commit()
+
+
 def _build_db(
     xml_path: Path,
     db_path: Path,
@@ -239,6 +354,7 @@ def _build_db(
     log: LogCallback,
     progress: ProgressCallback,
     should_stop: ShouldStopCallback,
+    clustered_pub_authors: bool = False,
 ) -> dict[str, Any]:
     try:
         from lxml import etree as ET
@@ -249,20 +365,38 @@ def _build_db(
 
     log(f"Building sqlite db from {xml_path} -> {db_path}")
     conn = sqlite3.connect(str(db_path))
-    _init_db(conn)
+    _init_db(conn, clustered_pub_authors=clustered_pub_authors)
     cur = conn.cursor()
+    existing_clustered = _is_without_rowid(conn, "pub_authors")
+    if existing_clustered != clustered_pub_authors:
+        log("Existing pub_authors layout differs from the requested one; keeping the existing layout.")
+        clustered_pub_authors = existing_clustered
 
     insert_pub = (
-        "INSERT INTO publications(title, year, venue, pub_type, raw_xml) "
+        "INSERT INTO publications(title, year, venue_id, pub_type_id, raw_xml) "
         "VALUES (?, ?, ?, ?, ?);"
     )
 
     insert_author = "INSERT OR IGNORE INTO authors(name) VALUES (?);"
     insert_pub_author = "INSERT INTO pub_authors(pub_id, author_id) VALUES (?, ?);"
+    if clustered_pub_authors:
+        # Appending to a rowid staging table keeps the parse loop fast; the
+        # clustered table is filled in key order once parsing is done.
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pub_authors_stage (
+                pub_id INTEGER NOT NULL,
+                author_id INTEGER NOT NULL
+            );
+            """
+        )
+        insert_pub_author = "INSERT INTO pub_authors_stage(pub_id, author_id) VALUES (?, ?);"
     insert_title_fts = "INSERT INTO title_fts(rowid, title) VALUES (?, ?);"
     insert_author_fts = "INSERT INTO author_fts(rowid, name) VALUES (?, ?);"
 
     author_cache: dict[str, int] = {}
+    venue_cache: dict[str, int] = {}
+    pub_type_cache: dict[str, int] = {}
     pending_pub_authors: list[tuple[int, int]] = []
     pending_titles: list[tuple[int, str]] = []
     pending_authors: list[tuple[int, str]] = []
@@ -275,19 +409,17 @@ def _build_db(
                 return self.resolve_filename(system_url, context)
             return self.resolve_string("", context)
 
-    parser = ET.XMLParser(
+    # iterparse builds its own parser, so the options and resolver go on it
+    # directly (lxml rejects a ``parser=`` argument here).
+    context = ET.iterparse(
+        str(xml_path),
+        events=("end",),
         load_dtd=True,
         resolve_entities=True,
         huge_tree=True,
         no_network=True,
     )
-    parser.resolvers.add(_SafeResolver())
-
-    context = ET.iterparse(
-        str(xml_path),
-        events=("end",),
-        parser=parser,
-    )
+    context.resolvers.add(_SafeResolver())
 
     count = 0
     start = time.time()
@@ -306,7 +438,9 @@ def _build_db(
             title = _normalize(title_elem.text)
             year, venue = _extract_year_venue(elem)
             raw_xml = ET.tostring(elem, encoding="unicode")
-            cur.execute(insert_pub, (title, year, venue, elem.tag, raw_xml))
+            venue_id = _intern(cur, "venues", venue_cache, venue)
+            pub_type_id = _intern(cur, "pub_types", pub_type_cache, elem.tag)
+            cur.execute(insert_pub, (title, year, venue_id, pub_type_id, raw_xml))
 
             pub_id = cur.lastrowid
             pending_titles.append((pub_id, title))
@@ -363,6 +497,8 @@ def _build_db(
             cur.executemany(insert_author_fts, pending_authors)
 
         conn.commit()
+        if clustered_pub_authors:
+            _load_clustered_pub_authors(conn, log)
     finally:
         conn.close()
 
@@ -375,9 +511,113 @@ def _build_db(
         "elapsed_seconds": round(elapsed, 2),
         "records_per_sec": rate,
         "db_path": str(db_path),
+        "pub_authors_layout": "clustered" if clustered_pub_authors else "rowid",
     }
 
 
+def _source_dump_date(xml_gz_path: Path) -> str | None:
+    try:
+        mtime = xml_gz_path.stat().st_mtime
+    except OSError:
+        return None
+    return datetime.fromtimestamp(mtime, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _write_dataset_meta(
+    db_path: Path,
+    generation: str,
+    build_seconds: float,
+    source_date: str | None,
+    log: LogCallback,
+) -> dict[str, Any]:
+    """Record dataset statistics in ``dataset_meta`` so the service never counts rows itself.
+
+    Values are JSON-encoded; the table is rewritten on every build.
+    """
+    started = time.time()
+    conn = sqlite3.connect(str(db_path))
+    try:
+        counts = {
+            table: int(conn.execute(f"SELECT COUNT(*) FROM {table};").fetchone()[0])
+            for table in ("publications", "authors", "pub_authors", "venues")
+        }
+        pub_types: dict[str, int] = {}
+        year_min: int | None = None
+        year_max: int | None = None
+        for name, count, low, high in conn.execute(
+            """
+            SELECT pt.name, COUNT(*), MIN(p.year), MAX(p.year)
+            FROM publications p
+            LEFT JOIN pub_types pt ON pt.id = p.pub_type_id
+            GROUP BY p.pub_type_id;
+            """
+        ):
+            pub_types[name or "unknown"] = int(count)
+            if low is not None:
+                year_min = low if year_min is None else min(year_min, low)
+            if high is not None:
+                year_max = high if year_max is None else max(year_max, high)
+        meta = {
+            "generation": generation,
+            "built_at": datetime.now(tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "build_seconds": build_seconds,
+            "source_date": source_date,
+            "counts": counts,
+            "pub_types": pub_types,
+            "year_min": year_min,
+            "year_max": year_max,
+        }
+        with conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS dataset_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                ) WITHOUT ROWID;
+                """
+            )
+            conn.execute("DELETE FROM dataset_meta;")
+            conn.executemany(
+                "INSERT INTO dataset_meta(key, value) VALUES (?, ?);",
+                [(key, json.dumps(value, ensure_ascii=False)) for key, value in meta.items()],
+            )
+    finally:
+        conn.close()
+    log(
+        f"Dataset meta written in {round(time.time() - started, 2)}s: "
+        f"{counts['publications']} publications, {counts['authors']} authors"
+    )
+    return meta
+
+
+def load_dataset_meta(conn: sqlite3.Connection) -> dict[str, Any] | None:
+    """Read ``dataset_meta`` back into a dict; ``None`` for databases built without it."""
+    try:
+        rows = conn.execute("SELECT key, value FROM dataset_meta;").fetchall()
+    except sqlite3.OperationalError:
+        return None
+    return {str(key): json.loads(value) for key, value in rows} or None
+
+
+def manifest_path(db_path: Path) -> Path:
+    return Path(f"{db_path}{MANIFEST_SUFFIX}")
+
+
+def db_fingerprint(db_path: Path) -> dict[str, int]:
+    """Identity of the database file used to detect changes after finalize."""
+    st = db_path.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "inode": st.st_ino}
+
+
+def load_manifest(db_path: Path) -> dict[str, Any] | None:
+    try:
+        with manifest_path(db_path).open(encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
 def _cleanup_db_files(db_path: Path, log: LogCallback) -> None:
     for suffix in ("", "-wal", "-shm"):
         path = Path(f"{db_path}{suffix}")
@@ -386,6 +626,146 @@ def _cleanup_db_files(db_path: Path, log: LogCallback) -> None:
             log(f"Removed existing file: {path}")
 
 
+def _prepare_staging_db(db_path: Path, staging_path: Path, rebuild: bool, log: LogCallback) -> None:
+    """Start the build in ``staging_path``; the served database is never opened for writing.
+
+    Readers may hold ``db_path`` open with ``immutable=1``, which does no
+    locking at all, so an incremental build copies it through a read-only
+    connection and works on the copy.
+    """
+    _cleanup_db_files(staging_path, log)
+    Path(f"{db_path}.finalize").unlink(missing_ok=True)
+    if rebuild or not db_path.exists():
+        return
+    source = sqlite3.connect(f"{db_path.as_uri()}?mode=ro", uri=True)
+    target = sqlite3.connect(str(staging_path))
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    log(f"Copied {db_path} -> {staging_path} for an incremental build")
+
+
+def _swap_in_db(source_path: Path, db_path: Path, log: LogCallback) -> None:
+    """Atomically replace the served database with ``source_path`` (rollback-journal mode).
+
+    Connections still open on the old file keep reading the old inode. The
+    WAL/SHM files left beside ``db_path`` belong to the old file and are removed.
+    """
+    os.replace(source_path, db_path)
+    for suffix in ("-wal", "-shm"):
+        Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+        Path(f"{source_path}{suffix}").unlink(missing_ok=True)
+    log(f"Swapped in {db_path}")
+
+
+def _publish_db(staging_path: Path, db_path: Path, log: LogCallback) -> None:
+    """Swap an unfinalized build into place."""
+    conn = sqlite3.connect(str(staging_path))
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+        # A WAL-mode file would pick up a stale -wal left next to db_path.
+        conn.execute("PRAGMA journal_mode = DELETE;")
+    finally:
+        conn.close()
+    _swap_in_db(staging_path, db_path, log)
+    marker = manifest_path(db_path)
+    if marker.exists():
+        marker.unlink(missing_ok=True)
+        log(f"Removed finalize manifest: {marker}")
+
+
+def _finalize_db(
+    staging_path: Path,
+    db_path: Path,
+    generation: str,
+    log: LogCallback,
+    progress: ProgressCallback,
+    should_stop: ShouldStopCallback,
+) -> dict[str, Any]:
+    """Swap a compact, analyzed, rollback-journal copy of the build into ``db_path`` read-only.
+
+    The service opens a finalized generation with ``immutable=1`` (no locking,
+    no WAL index), trusting it only while the file still matches the
+    fingerprint recorded in the manifest.
+    """
+    log(f"Finalizing {staging_path} -> {db_path}")
+    started = time.time()
+    size_before = sum(
+        Path(f"{staging_path}{suffix}").stat().st_size
+        for suffix in ("", "-wal")
+        if Path(f"{staging_path}{suffix}").exists()
+    )
+
+    conn = sqlite3.connect(str(staging_path))
+    try:
+        conn.execute("ANALYZE;")
+        conn.execute("PRAGMA optimize;")
+        conn.commit()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+    finally:
+        conn.close()
+    analyze_seconds = round(time.time() - started, 2)
+    progress("finalize_db", {"analyze_seconds": analyze_seconds, "db_size_before": size_before})
+
+    _raise_if_stopped(should_stop)
+    compact_path = Path(f"{db_path}.finalize")
+    compact_path.unlink(missing_ok=True)
+    vacuum_started = time.time()
+    conn = sqlite3.connect(str(staging_path))
+    try:
+        conn.execute("VACUUM INTO ?;", (str(compact_path),))
+    finally:
+        conn.close()
+
+    conn = sqlite3.connect(str(compact_path))
+    try:
+        conn.execute("PRAGMA journal_mode = DELETE;")
+        page_count = int(conn.execute("PRAGMA page_count;").fetchone()[0])
+        page_size = int(conn.execute("PRAGMA page_size;").fetchone()[0])
+    finally:
+        conn.close()
+    vacuum_seconds = round(time.time() - vacuum_started, 2)
+
+    if should_stop():
+        compact_path.unlink(missing_ok=True)
+        _raise_if_stopped(should_stop)
+
+    compact_path.chmod(stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+    _swap_in_db(compact_path, db_path, log)
+    _cleanup_db_files(staging_path, log)
+
+    size_after = db_path.stat().st_size
+    manifest = {
+        "generation": generation,
+        "finalized_at": datetime.now(tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "journal_mode": "delete",
+        "page_size": page_size,
+        "page_count": page_count,
+        "fingerprint": db_fingerprint(db_path),
+    }
+    tmp_manifest = Path(f"{manifest_path(db_path)}.tmp")
+    tmp_manifest.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp_manifest, manifest_path(db_path))
+
+    elapsed = round(time.time() - started, 2)
+    stats = {
+        "generation": generation,
+        "finalize_seconds": elapsed,
+        "analyze_seconds": analyze_seconds,
+        "vacuum_seconds": vacuum_seconds,
+        "db_size_before": size_before,
+        "db_size_after": size_after,
+    }
+    progress("finalize_db", stats)
+    log(
+        f"Finalize complete: {size_before} -> {size_after} bytes in {elapsed}s "
+        f"(generation {generation})"
+    )
+    return stats
+
+
 def run_pipeline(
     config: PipelineConfig,
     log: LogCallback,
@@ -395,9 +775,9 @@ def run_pipeline(
     started = time.time()
     config.data_dir.mkdir(parents=True, exist_ok=True)
     log(f"Pipeline start (data_dir={config.data_dir})")
+    generation = f"{datetime.now(tz=timezone.utc):%Y%m%dT%H%M%SZ}-{secrets.token_hex(4)}"
 
-    if config.rebuild:
-        _cleanup_db_files(config.db_path, log)
+    _prepare_staging_db(config.db_path, config.staging_db_path, config.rebuild, log)
 
     _raise_if_stopped(should_stop)
     _download_file(
@@ -407,6 +787,7 @@ def run_pipeline(
         log,
         progress,
         should_stop,
+        config.allowed_download_hosts,
     )
 
     _raise_if_stopped(should_stop)
@@ -417,6 +798,7 @@ def run_pipeline(
         log,
         progress,
         should_stop,
+        config.allowed_download_hosts,
     )
 
     _raise_if_stopped(should_stop)
@@ -431,14 +813,39 @@ def run_pipeline(
     _raise_if_stopped(should_stop)
     build_stats = _build_db(
         xml_path=config.xml_path,
-        db_path=config.db_path,
+        db_path=config.staging_db_path,
         batch_size=config.batch_size,
         progress_every=config.progress_every,
+        clustered_pub_authors=config.clustered_pub_authors,
         log=log,
         progress=progress,
         should_stop=should_stop,
     )
 
+    _raise_if_stopped(should_stop)
+    _write_dataset_meta(
+        db_path=config.staging_db_path,
+        generation=generation,
+        build_seconds=build_stats["elapsed_seconds"],
+        source_date=_source_dump_date(config.xml_gz_path),
+        log=log,
+    )
+
+    finalize_stats: dict[str, Any] = {}
+    if config.finalize:
+        _raise_if_stopped(should_stop)
+        finalize_stats = _finalize_db(
+            staging_path=config.staging_db_path,
+            db_path=config.db_path,
+            generation=generation,
+            log=log,
+            progress=progress,
+            should_stop=should_stop,
+        )
+    else:
+        _raise_if_stopped(should_stop)
+        _publish_db(config.staging_db_path, config.db_path, log)
+
     elapsed = round(time.time() - started, 2)
     result = {
         "status": "completed",
@@ -447,6 +854,8 @@ def run_pipeline(
         "xml_path": str(config.xml_path),
         "dtd_path": str(config.dtd_path),
         **build_stats,
+        **finalize_stats,
+        "db_path": str(config.db_path),
     }
     log(f"Pipeline finished in {elapsed}s")
     return result
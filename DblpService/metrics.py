@@ -0,0 +1,187 @@
+"""In-process metrics rendered in the Prometheus text exposition format (0.0.4).
+
+Recording is a dict lookup, a bisect and a few additions under a per-metric
+lock, cheap enough to stay on for every request. Values are per process:
+with ``uvicorn --workers N`` each worker keeps and exposes its own.
+"""
+
+from __future__ import annotations
+
+import abc
+import bisect
+import logging
+import math
+import threading
+from typing import Callable, Iterable, TypeVar
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Sample = tuple[str, dict[str, str], float]
+MetricT = TypeVar("MetricT", bound="_Metric")
+
+logger = logging.getLogger("dblp_service.metrics")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_sample(name: str, labels: dict[str, str], value: float) -> str:
+    if not labels:
+        return f"{name} {_format_value(value)}"
+    rendered = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+    return f"{name}{{{rendered}}} {_format_value(value)}"
+
+
+class _Metric(abc.ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _labels(self, values: tuple[str, ...]) -> dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    @abc.abstractmethod
+    def samples(self) -> Iterable[Sample]:
+        """Yield ``(name, labels, value)`` for every exposed series."""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for labelvalues, value in items:
+            yield self.name, self._labels(labelvalues), value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, *labelvalues: str) -> None:
+        with self._lock:
+            self._values[labelvalues] = float(value)
+
+    def replace(self, values: dict[tuple[str, ...], float]) -> None:
+        """Swap in a complete set of label values, dropping ones no longer reported."""
+        with self._lock:
+            self._values = {labels: float(value) for labels, value in values.items()}
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for labelvalues, value in items:
+            yield self.name, self._labels(labelvalues), value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket (+Inf last), sum]
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0])
+                self._series[labelvalues] = series
+            series[0][index] += 1
+            series[1][0] += value
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = sorted(
+                (labels, (list(counts), total[0])) for labels, (counts, total) in self._series.items()
+            )
+        for labelvalues, (counts, total) in items:
+            labels = self._labels(labelvalues)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class Registry:
+    """Holds metrics plus collectors that refresh gauges right before each scrape."""
+
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+        self._collectors: list[Callable[[], None]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self._add(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def _add(self, metric: MetricT) -> MetricT:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception:
+                # Serve the other metrics; the collector's gauges keep their last values.
+                logger.exception("Metrics collector %s failed", getattr(collector, "__name__", collector))
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(_format_sample(*sample) for sample in metric.samples())
+        return "\n".join(lines) + "\n"
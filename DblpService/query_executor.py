@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+WAIT_SAMPLE_SIZE = 1000
+
+
+class QueueFullError(Exception):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("Query queue is full.")
+        self.retry_after = retry_after
+
+
+class QueryTimeoutError(Exception):
+    pass
+
+
+class QueryContext:
+    """Per-request handle that lets the deadline interrupt the running SQLite work."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self.cancelled = False
+
+    def attach(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            self._conn = conn
+            if self.cancelled:
+                conn.interrupt()
+
+    def detach(self) -> None:
+        with self._lock:
+            self._conn = None
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            if self._conn is not None:
+                self._conn.interrupt()
+
+    def check(self) -> None:
+        if self.cancelled:
+            raise QueryTimeoutError("Query cancelled.")
+
+
+class QueryExecutor:
+    """Dedicated thread pool for heavy queries with a bounded admission queue.
+
+    Work runs outside FastAPI's shared threadpool so cheap endpoints keep
+    responding while large matrices are being computed. Requests beyond
+    ``max_workers + max_queue`` are rejected immediately, and each request's
+    deadline covers both queue wait and execution.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, timeout_seconds: float) -> None:
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.timeout_seconds = timeout_seconds
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="query")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._wait_ms: deque[float] = deque(maxlen=WAIT_SAMPLE_SIZE)
+        self._run_ms: deque[float] = deque(maxlen=WAIT_SAMPLE_SIZE)
+
+    def _retry_after_locked(self) -> int:
+        if not self._run_ms:
+            return 1
+        mean_run_s = sum(self._run_ms) / len(self._run_ms) / 1000.0
+        backlog = self._queued + self._running
+        return max(1, math.ceil(mean_run_s * backlog / self.max_workers))
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run ``fn(ctx, *args)`` on the query pool, enforcing admission and deadline."""
+        with self._lock:
+            if self._queued + self._running >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise QueueFullError(self._retry_after_locked())
+            self._queued += 1
+            self._submitted += 1
+
+        ctx = QueryContext()
+        enqueued_at = time.monotonic()
+
+        def _invoke() -> T:
+            started = time.monotonic()
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._wait_ms.append((started - enqueued_at) * 1000.0)
+            try:
+                ctx.check()
+                result = fn(ctx, *args)
+            except BaseException:
+                # Interrupted (deadline, client gone) or errored: a failure, not a completion.
+                with self._lock:
+                    self._failed += 1
+                raise
+            else:
+                with self._lock:
+                    self._completed += 1
+                return result
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._run_ms.append((time.monotonic() - started) * 1000.0)
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._pool, _invoke)
+        # Abandoned futures (deadline hit) must not log "exception never retrieved".
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout_seconds)
+        except asyncio.TimeoutError as exc:
+            ctx.cancel()
+            with self._lock:
+                self._timed_out += 1
+            raise QueryTimeoutError("Query deadline exceeded.") from exc
+        except asyncio.CancelledError:
+            # Client went away: stop the SQLite work instead of finishing it for nobody.
+            ctx.cancel()
+            raise
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._wait_ms)
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "timeout_seconds": self.timeout_seconds,
+                "queued": self._queued,
+                "running": self._running,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "wait_ms": {
+                    "samples": len(waits),
+                    "mean": round(sum(waits) / len(waits), 2) if waits else None,
+                    "p50": round(_pick(waits, 0.50), 2) if waits else None,
+                    "p95": round(_pick(waits, 0.95), 2) if waits else None,
+                    "max": round(waits[-1], 2) if waits else None,
+                },
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _pick(ordered: list[float], q: float) -> float:
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1))]
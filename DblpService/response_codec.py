@@ -0,0 +1,71 @@
+"""JSON encoding and Content-Encoding negotiation for large API responses."""
+
+from __future__ import annotations
+
+import gzip
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder is used when orjson is not installed
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip is offered when brotli is not installed
+    brotli = None
+
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 5
+
+
+def json_backend() -> str:
+    return "orjson" if orjson is not None else "json"
+
+
+def dumps_bytes(payload: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def supported_encodings() -> tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Pick ``br`` or ``gzip`` from an Accept-Encoding header, honouring ``q`` values.
+
+    Brotli wins ties because it compresses JSON noticeably better at similar cost.
+    """
+    weights: dict[str, float] = {}
+    for item in (accept_encoding or "").split(","):
+        token, _, params = item.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[token] = weight
+    best: str | None = None
+    best_weight = 0.0
+    for encoding in supported_encodings():
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
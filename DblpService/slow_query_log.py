@@ -0,0 +1,113 @@
+"""Bounded in-memory log of slow SQLite queries with their query plans."""
+
+from __future__ import annotations
+
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any
+
+logger = logging.getLogger("dblp_service.slow_query")
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+def sql_shape(sql: str) -> str:
+    """The statement with whitespace collapsed and ``?, ?, ...`` lists replaced by their length."""
+    shape = _WHITESPACE.sub(" ", sql).strip()
+    return _PLACEHOLDER_LIST.sub(lambda m: f"<{m.group(0).count('?')} params>", shape)
+
+
+def explain_query_plan(conn: sqlite3.Connection, sql: str, params: tuple[Any, ...]) -> list[str] | None:
+    """``EXPLAIN QUERY PLAN`` as indented lines, or None if it cannot be produced."""
+    try:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {sql.strip().rstrip(';')}", params).fetchall()
+    except sqlite3.Error:
+        return None
+    depth: dict[int, int] = {0: -1}
+    lines: list[str] = []
+    for node_id, parent, _, detail in rows:
+        level = depth.get(parent, -1) + 1
+        depth[node_id] = level
+        lines.append(f"{'  ' * level}{detail}")
+    return lines
+
+
+class SlowQueryLog:
+    """Keeps the last ``capacity`` queries that took at least ``threshold_ms``.
+
+    ``record`` is only called for queries already known to be slow, so the
+    extra ``EXPLAIN QUERY PLAN`` it runs never touches the fast path. A
+    ``threshold_ms`` of 0 or less disables the log.
+    """
+
+    def __init__(self, threshold_ms: float, capacity: int) -> None:
+        self.threshold_seconds = max(0.0, threshold_ms) / 1000.0
+        self.capacity = max(1, capacity)
+        self._entries: deque[dict[str, Any]] = deque(maxlen=self.capacity)
+        self._lock = threading.Lock()
+        self._recorded = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_seconds > 0
+
+    def is_slow(self, elapsed_seconds: float) -> bool:
+        return self.enabled and elapsed_seconds >= self.threshold_seconds
+
+    def record(
+        self,
+        conn: sqlite3.Connection,
+        kind: str,
+        sql: str,
+        params: tuple[Any, ...],
+        elapsed_seconds: float,
+        rows: int,
+        context: dict[str, Any],
+    ) -> None:
+        started = time.perf_counter()
+        entry = {
+            "at": datetime.now(tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "kind": kind,
+            "elapsed_ms": round(elapsed_seconds * 1000.0, 2),
+            "rows": rows,
+            "sql": sql_shape(sql),
+            "context": context,
+            "plan": explain_query_plan(conn, sql, params),
+        }
+        entry["explain_ms"] = round((time.perf_counter() - started) * 1000.0, 2)
+        with self._lock:
+            self._entries.append(entry)
+            self._recorded += 1
+        logger.warning(
+            "Slow %s query: %.1f ms, %d rows, %s",
+            kind,
+            entry["elapsed_ms"],
+            rows,
+            context,
+        )
+
+    def snapshot(self, limit: int | None = None) -> dict[str, Any]:
+        with self._lock:
+            entries = list(self._entries)
+            recorded = self._recorded
+        entries.reverse()
+        if limit is not None:
+            entries = entries[: max(0, limit)]
+        return {
+            "threshold_ms": round(self.threshold_seconds * 1000.0, 3),
+            "capacity": self.capacity,
+            "recorded": recorded,
+            "entries": entries,
+        }
+
+    def clear(self) -> int:
+        with self._lock:
+            cleared = len(self._entries)
+            self._entries.clear()
+        return cleared
@@ -0,0 +1,566 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+ACTIVE_STATUSES = ("running", "stopping")
+# How often buffered counter increments are written and other workers' increments read.
+COUNTER_FLUSH_SECONDS = 2.0
+
+logger = logging.getLogger("dblp_service.state")
+
+
+@dataclass(slots=True)
+class PipelineState:
+    status: str = "idle"
+    step: str = "idle"
+    message: str = ""
+    started_at: str | None = None
+    finished_at: str | None = None
+    progress: dict[str, Any] = field(default_factory=dict)
+    logs: list[str] = field(default_factory=list)
+    owner: str | None = None
+    heartbeat_at: float | None = None
+    stop_requested: bool = False
+    version: int = 0
+    log_seq: int = 0
+    log_reset: bool = False
+
+
+class StateStore:
+    """Pipeline state, logs and counters shared by every worker process.
+
+    Backed by a small WAL-mode SQLite file next to the data, so any uvicorn
+    worker returns the same ``/api/state`` snapshot, only one worker can own a
+    build at a time, and a stop request reaches the owning worker.
+    """
+
+    def __init__(self, db_path: Path, max_log_lines: int, owner_ttl_seconds: float) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_log_lines = max(1, max_log_lines)
+        self.owner_ttl_seconds = owner_ttl_seconds
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._counter_lock = threading.Lock()
+        # Committed values of counters read by this process, and increments not yet written.
+        self._counter_cache: dict[str, int] = {}
+        self._pending_counters: dict[str, int] = {}
+        self._flusher: threading.Thread | None = None
+        self._closed = threading.Event()
+        self._ensure_initialized()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _ensure_initialized(self) -> None:
+        if self._initialized:
+            return
+        with self._init_lock:
+            if self._initialized:
+                return
+            conn = self._connect()
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS pipeline_state (
+                        id INTEGER PRIMARY KEY CHECK (id = 1),
+                        status TEXT NOT NULL DEFAULT 'idle',
+                        step TEXT NOT NULL DEFAULT 'idle',
+                        message TEXT NOT NULL DEFAULT '',
+                        started_at TEXT,
+                        finished_at TEXT,
+                        progress_json TEXT NOT NULL DEFAULT '{}',
+                        owner TEXT,
+                        heartbeat_at REAL,
+                        stop_requested INTEGER NOT NULL DEFAULT 0,
+                        version INTEGER NOT NULL DEFAULT 0
+                    )
+                    """
+                )
+                conn.execute("INSERT OR IGNORE INTO pipeline_state (id) VALUES (1)")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS pipeline_logs (
+                        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                        line TEXT NOT NULL
+                    )
+                    """
+                )
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS counters (
+                        name TEXT PRIMARY KEY,
+                        value INTEGER NOT NULL DEFAULT 0
+                    )
+                    """
+                )
+                self._initialized = True
+            finally:
+                conn.close()
+
+    def _is_live_locked(self, row: sqlite3.Row, now: float) -> bool:
+        if row["status"] not in ACTIVE_STATUSES:
+            return False
+        heartbeat = row["heartbeat_at"]
+        return heartbeat is not None and now - float(heartbeat) <= self.owner_ttl_seconds
+
+    def _clear_logs_locked(self, conn: sqlite3.Connection) -> None:
+        # Remember where the cleared run ended so cursors from it are told to reset.
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO counters (name, value)
+            SELECT 'log_cleared_seq', COALESCE(MAX(seq), 0) FROM sqlite_sequence
+            WHERE name = 'pipeline_logs'
+            """
+        )
+        conn.execute("DELETE FROM pipeline_logs")
+
+    def _append_log_locked(self, conn: sqlite3.Connection, line: str) -> None:
+        cur = conn.execute("INSERT INTO pipeline_logs (line) VALUES (?)", (line,))
+        seq = int(cur.lastrowid or 0)
+        if seq > self.max_log_lines:
+            conn.execute("DELETE FROM pipeline_logs WHERE seq <= ?", (seq - self.max_log_lines,))
+
+    def poll(self) -> tuple[int, str, float | None]:
+        """Cheap change check: ``(version, status, heartbeat_at)``."""
+        self._ensure_initialized()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT version, status, heartbeat_at FROM pipeline_state WHERE id = 1"
+            ).fetchone()
+        finally:
+            conn.close()
+        return int(row["version"]), row["status"], row["heartbeat_at"]
+
+    def load_status(self) -> PipelineState:
+        """Read the state row alone; ``logs`` is left empty."""
+        self._ensure_initialized()
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM pipeline_state WHERE id = 1").fetchone()
+        finally:
+            conn.close()
+        return self._state_from_row(row)
+
+    def load(self, since: int | None = None) -> PipelineState:
+        """Read the state with all retained logs, or only those after ``since``.
+
+        ``log_reset`` is set when the cursor cannot be continued (logs were
+        cleared by a new run or trimmed past it) and the returned logs replace
+        whatever the caller holds.
+        """
+        self._ensure_initialized()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN")
+            row = conn.execute("SELECT * FROM pipeline_state WHERE id = 1").fetchone()
+            seq_row = conn.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = 'pipeline_logs'"
+            ).fetchone()
+            log_seq = int(seq_row["seq"]) if seq_row else 0
+            log_reset = False
+            if since is not None:
+                cleared_row = conn.execute(
+                    "SELECT value FROM counters WHERE name = 'log_cleared_seq'"
+                ).fetchone()
+                first_row = conn.execute("SELECT MIN(seq) AS seq FROM pipeline_logs").fetchone()
+                cleared = int(cleared_row["value"]) if cleared_row else 0
+                first = first_row["seq"]
+                log_reset = (
+                    (cleared > 0 and since <= cleared)
+                    or since > log_seq
+                    or (first is not None and since < int(first) - 1)
+                )
+            if since is None or log_reset:
+                cursor = conn.execute("SELECT line FROM pipeline_logs ORDER BY seq")
+            else:
+                cursor = conn.execute(
+                    "SELECT line FROM pipeline_logs WHERE seq > ? ORDER BY seq", (since,)
+                )
+            logs = [r["line"] for r in cursor]
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        state = self._state_from_row(row)
+        state.logs = logs
+        state.log_seq = log_seq
+        state.log_reset = log_reset
+        return state
+
+    @staticmethod
+    def _state_from_row(row: sqlite3.Row) -> PipelineState:
+        return PipelineState(
+            status=row["status"],
+            step=row["step"],
+            message=row["message"],
+            started_at=row["started_at"],
+            finished_at=row["finished_at"],
+            progress=json.loads(row["progress_json"] or "{}"),
+            owner=row["owner"],
+            heartbeat_at=row["heartbeat_at"],
+            stop_requested=bool(row["stop_requested"]),
+            version=int(row["version"]),
+        )
+
+    def try_acquire(self, owner: str, started_at: str, first_log: str) -> bool:
+        """Become the build owner unless another live owner holds the pipeline."""
+        self._ensure_initialized()
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT * FROM pipeline_state WHERE id = 1").fetchone()
+            if self._is_live_locked(row, now):
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute(
+                """
+                UPDATE pipeline_state SET
+                    status = 'running', step = 'starting', message = '',
+                    started_at = ?, finished_at = NULL, progress_json = '{}',
+                    owner = ?, heartbeat_at = ?, stop_requested = 0,
+                    version = version + 1
+                WHERE id = 1
+                """,
+                (started_at, owner, now),
+            )
+            self._clear_logs_locked(conn)
+            self._append_log_locked(conn, first_log)
+            conn.execute("COMMIT")
+            return True
+        finally:
+            conn.close()
+
+    def reset(self, log_line: str) -> bool:
+        self._ensure_initialized()
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT * FROM pipeline_state WHERE id = 1").fetchone()
+            if self._is_live_locked(row, now):
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute(
+                """
+                UPDATE pipeline_state SET
+                    status = 'idle', step = 'idle', message = '',
+                    started_at = NULL, finished_at = NULL, progress_json = '{}',
+                    owner = NULL, heartbeat_at = NULL, stop_requested = 0,
+                    version = version + 1
+                WHERE id = 1
+                """
+            )
+            self._clear_logs_locked(conn)
+            self._append_log_locked(conn, log_line)
+            conn.execute("COMMIT")
+            return True
+        finally:
+            conn.close()
+
+    def request_stop(self, log_line: str) -> None:
+        self._ensure_initialized()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            cur = conn.execute(
+                """
+                UPDATE pipeline_state SET
+                    status = 'stopping', message = ?, stop_requested = 1,
+                    version = version + 1
+                WHERE id = 1 AND status = 'running'
+                """,
+                (log_line,),
+            )
+            if cur.rowcount:
+                self._append_log_locked(conn, log_line)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def stop_requested(self, owner: str) -> bool:
+        self._ensure_initialized()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT stop_requested FROM pipeline_state WHERE id = 1 AND owner = ?",
+                (owner,),
+            ).fetchone()
+        finally:
+            conn.close()
+        # Losing ownership (reaped as stale) also means this worker must stop.
+        return row is None or bool(row["stop_requested"])
+
+    def update(
+        self,
+        owner: str,
+        *,
+        status: str | None = None,
+        step: str | None = None,
+        message: str | None = None,
+        finished_at: str | None = None,
+        progress: dict[str, Any] | None = None,
+        log_line: str | None = None,
+    ) -> bool:
+        """Apply an owner's state change; returns False if ownership was lost."""
+        self._ensure_initialized()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT progress_json FROM pipeline_state WHERE id = 1 AND owner = ?",
+                (owner,),
+            ).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return False
+            merged = json.loads(row["progress_json"] or "{}")
+            if progress:
+                merged.update(progress)
+            conn.execute(
+                """
+                UPDATE pipeline_state SET
+                    status = COALESCE(?, status),
+                    step = COALESCE(?, step),
+                    message = COALESCE(?, message),
+                    finished_at = COALESCE(?, finished_at),
+                    progress_json = ?,
+                    heartbeat_at = ?,
+                    version = version + 1
+                WHERE id = 1
+                """,
+                (
+                    status,
+                    step,
+                    message,
+                    finished_at,
+                    json.dumps(merged, ensure_ascii=False, separators=(",", ":")),
+                    time.time(),
+                ),
+            )
+            if log_line is not None:
+                self._append_log_locked(conn, log_line)
+            conn.execute("COMMIT")
+            return True
+        finally:
+            conn.close()
+
+    def heartbeat(self, owner: str) -> None:
+        self._ensure_initialized()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE pipeline_state SET heartbeat_at = ? WHERE id = 1 AND owner = ?",
+                (time.time(), owner),
+            )
+        finally:
+            conn.close()
+
+    def reap_stale_owner(self, finished_at: str) -> None:
+        """Mark a build as failed when its owning worker stopped heartbeating."""
+        self._ensure_initialized()
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT * FROM pipeline_state WHERE id = 1").fetchone()
+            if row["status"] not in ACTIVE_STATUSES or self._is_live_locked(row, now):
+                conn.execute("ROLLBACK")
+                return
+            message = "Pipeline owner stopped responding."
+            conn.execute(
+                """
+                UPDATE pipeline_state SET
+                    status = 'error', step = 'error', message = ?,
+                    finished_at = ?, owner = NULL, version = version + 1
+                WHERE id = 1
+                """,
+                (message, finished_at),
+            )
+            self._append_log_locked(conn, f"Pipeline error: {message}")
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def increment_counter(self, name: str, delta: int = 1) -> int:
+        """Count in memory and return the shared total; increments are written in batches.
+
+        Only the first call per counter and process reads SQLite. A background
+        thread writes the buffered increments every ``COUNTER_FLUSH_SECONDS``
+        and picks up other workers' increments, so a page view never takes the
+        database write lock.
+        """
+        self._ensure_initialized()
+        with self._counter_lock:
+            committed = self._counter_cache.get(name)
+        if committed is None:
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+            finally:
+                conn.close()
+            committed = int(row["value"]) if row else 0
+        with self._counter_lock:
+            committed = self._counter_cache.setdefault(name, committed)
+            pending = self._pending_counters.get(name, 0) + delta
+            self._pending_counters[name] = pending
+            if self._flusher is None and not self._closed.is_set():
+                self._flusher = threading.Thread(
+                    target=self._flush_loop, name="state-counters", daemon=True
+                )
+                self._flusher.start()
+        return committed + pending
+
+    def _flush_loop(self) -> None:
+        while not self._closed.wait(COUNTER_FLUSH_SECONDS):
+            self.flush_counters()
+
+    def flush_counters(self) -> None:
+        """Write buffered increments and refresh the cached committed values."""
+        with self._counter_lock:
+            pending = dict(self._pending_counters)
+            names = list(self._counter_cache)
+        if not names:
+            return
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE" if pending else "BEGIN")
+            conn.executemany(
+                """
+                INSERT INTO counters (name, value) VALUES (?, ?)
+                ON CONFLICT(name) DO UPDATE SET value = counters.value + excluded.value
+                """,
+                list(pending.items()),
+            )
+            placeholders = ",".join("?" for _ in names)
+            values = {name: 0 for name in names}
+            for row in conn.execute(
+                f"SELECT name, value FROM counters WHERE name IN ({placeholders})", names
+            ):
+                values[row["name"]] = int(row["value"])
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            logger.exception("Counter flush failed; keeping %d increments buffered", len(pending))
+            return
+        finally:
+            conn.close()
+        # Swap in the committed values and drop the written increments together,
+        # so a concurrent read never counts an increment twice or not at all.
+        with self._counter_lock:
+            self._counter_cache.update(values)
+            for name, delta in pending.items():
+                remaining = self._pending_counters.get(name, 0) - delta
+                if remaining:
+                    self._pending_counters[name] = remaining
+                else:
+                    self._pending_counters.pop(name, None)
+
+    def close(self) -> None:
+        """Stop the counter thread and write whatever is still buffered."""
+        self._closed.set()
+        flusher = self._flusher
+        if flusher is not None:
+            flusher.join(timeout=COUNTER_FLUSH_SECONDS + 5)
+        self.flush_counters()
+
+
+class StateBroadcaster:
+    """Fans pipeline state changes out to SSE subscribers from one poller.
+
+    However many consoles are open, a single task per worker checks the
+    store's version and reads only the log lines added since its last event,
+    then hands the same delta to every subscriber queue.
+    """
+
+    def __init__(
+        self,
+        poll_version: Callable[[], int],
+        load: Callable[[int | None], dict[str, Any]],
+        interval_seconds: float,
+        max_pending: int = 64,
+    ) -> None:
+        self._poll_version = poll_version
+        self._load = load
+        self.interval_seconds = interval_seconds
+        self.max_pending = max_pending
+        self._subscribers: set[asyncio.Queue[dict[str, Any] | None]] = set()
+        self._task: asyncio.Task[None] | None = None
+        self._version: int | None = None
+        self._log_seq: int | None = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue[dict[str, Any] | None]:
+        queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue(maxsize=self.max_pending)
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue[dict[str, Any] | None]) -> None:
+        self._subscribers.discard(queue)
+
+    async def _run(self) -> None:
+        self._version = None
+        self._log_seq = None
+        while self._subscribers:
+            try:
+                version = await asyncio.to_thread(self._poll_version)
+                if version != self._version:
+                    event = await asyncio.to_thread(self._load, self._log_seq)
+                    event["log_base"] = self._log_seq
+                    first_poll = self._version is None
+                    self._version = version
+                    self._log_seq = int(event["log_seq"])
+                    # Subscribers send their own full snapshot on connect, so
+                    # the poller's first read only establishes its cursor.
+                    if not first_poll:
+                        self._publish(event)
+            except Exception:
+                logger.exception("State broadcaster poll failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    def _publish(self, event: dict[str, Any]) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A stalled client is dropped; its EventSource reconnects and resyncs.
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    @staticmethod
+    def catch_up(event: dict[str, Any], cursor: int) -> dict[str, Any] | None:
+        """Trim a broadcast delta to the lines a subscriber at ``cursor`` lacks."""
+        if event.get("log_reset") or event.get("log_base") is None:
+            return dict(event)
+        log_seq = int(event["log_seq"])
+        base = int(event["log_base"])
+        logs = event.get("logs", [])
+        if log_seq <= cursor:
+            logs = []
+        elif base < cursor:
+            logs = logs[cursor - base :]
+        elif base > cursor:
+            # The subscriber missed lines between its snapshot and this delta.
+            return None
+        return {**event, "logs": logs}
@@ -3,6 +3,11 @@
 const LANG_STORAGE_KEY = "dblpservice_lang";
 const SUPPORTED_LANGS = new Set(["en", "zh"]);
 let currentLang = "en";
+const MAX_CLIENT_LOG_LINES = 1000;
+let logLines = [];
+let logCursor = null;
+let lastStep = null;
+let streaming = false;
 const sidebarEl = document.getElementById("sidebar");
 const sidebarToggleEl = document.getElementById("sidebar-toggle");
 const sidebarOverlayEl = document.getElementById("sidebar-overlay");
@@ -25,6 +30,7 @@ const I18N = {
     bootstrap_batch: "Batch Size",
     bootstrap_progress_every: "Progress Every",
     bootstrap_rebuild: "Rebuild database (remove existing sqlite/wal/shm)",
+    bootstrap_clustered: "Clustered pub_authors layout (WITHOUT ROWID, index-only pair joins)",
     bootstrap_start: "Start",
     bootstrap_stop: "Stop",
     bootstrap_reset: "Reset",
@@ -95,6 +101,7 @@ const I18N = {
     bootstrap_batch: "批处理大小",
     bootstrap_progress_every: "进度上报间隔",
     bootstrap_rebuild: "重建数据库（删除已有 sqlite/wal/shm）",
+    bootstrap_clustered: "聚簇 pub_authors 布局（WITHOUT ROWID，作者对连接仅走索引）",
     bootstrap_start: "开始",
     bootstrap_stop: "停止",
     bootstrap_reset: "重置",
@@ -235,11 +242,14 @@ function initLanguage() {
   }
 }
 
-async function fetchJson(url, options = {}) {
+function apiUrl(url) {
   const apiBaseRaw = String(window.__API_BASE__ || "").trim();
   const apiBase = apiBaseRaw.endsWith("/") ? apiBaseRaw.slice(0, -1) : apiBaseRaw;
-  const fullUrl = apiBase ? `${apiBase}${url}` : url;
-  const resp = await fetch(fullUrl, options);
+  return apiBase ? `${apiBase}${url}` : url;
+}
+
+async function fetchJson(url, options = {}) {
+  const resp = await fetch(apiUrl(url), options);
   const data = await resp.json().catch(() => ({}));
   if (!resp.ok) {
     throw new Error(data.detail || `HTTP ${resp.status}`);
@@ -283,11 +293,26 @@ function updateState(state) {
   fillText("records-rate", p.records_per_sec !== undefined ? `${p.records_per_sec} rec/s` : "-");
 
   const logs = Array.isArray(state.logs) ? state.logs : [];
+  // Cursor responses carry log_reset=false and only the new lines.
+  const replace = state.log_reset !== false;
+  if (replace) {
+    logLines = logs.slice(-MAX_CLIENT_LOG_LINES);
+  } else if (logs.length) {
+    logLines = logLines.concat(logs).slice(-MAX_CLIENT_LOG_LINES);
+  }
+  if (state.log_seq !== undefined) {
+    logCursor = state.log_seq;
+  }
   const logBox = document.getElementById("logs");
-  if (logBox) {
-    logBox.textContent = logs.join("\n");
+  if (logBox && (replace || logs.length)) {
+    logBox.textContent = logLines.join("\n");
     logBox.scrollTop = logBox.scrollHeight;
   }
+
+  if (state.step !== lastStep) {
+    lastStep = state.step;
+    refreshFiles();
+  }
 }
 
 function updateFiles(data) {
@@ -309,16 +334,43 @@ function updateFiles(data) {
   }
 }
 
-async function refreshAll() {
+async function refreshState() {
   try {
-    const [state, files] = await Promise.all([fetchJson("/api/state"), fetchJson("/api/files")]);
-    updateState(state);
-    updateFiles(files);
+    const url = logCursor === null ? "/api/state" : `/api/state?since=${logCursor}`;
+    updateState(await fetchJson(url));
   } catch (err) {
     fillText("message", t("msg_refresh_failed", { err: err.message }));
   }
 }
 
+async function refreshFiles() {
+  try {
+    updateFiles(await fetchJson("/api/files"));
+  } catch (err) {
+    fillText("message", t("msg_refresh_failed", { err: err.message }));
+  }
+}
+
+async function refreshAll() {
+  await Promise.all([refreshState(), refreshFiles()]);
+}
+
+function startStateStream() {
+  if (!window.EventSource) return;
+  const source = new EventSource(apiUrl("/api/state/stream"));
+  source.addEventListener("state", (ev) => {
+    streaming = true;
+    updateState(JSON.parse(ev.data));
+  });
+  source.addEventListener("error", () => {
+    // EventSource reconnects on its own; poll with the cursor until it does.
+    streaming = false;
+    if (source.readyState === EventSource.CLOSED) {
+      setTimeout(startStateStream, 5000);
+    }
+  });
+}
+
 const startFormEl = document.getElementById("start-form");
 if (startFormEl) {
   startFormEl.addEventListener("submit", async (ev) => {
@@ -327,6 +379,7 @@ if (startFormEl) {
       xml_gz_url: document.getElementById("xml-gz-url")?.value?.trim(),
       dtd_url: document.getElementById("dtd-url")?.value?.trim(),
       rebuild: Boolean(document.getElementById("rebuild")?.checked),
+      clustered_pub_authors: Boolean(document.getElementById("clustered-pub-authors")?.checked),
       batch_size: Number(document.getElementById("batch-size")?.value || 1000),
       progress_every: Number(document.getElementById("progress-every")?.value || 10000),
     };
@@ -369,6 +422,10 @@ if (resetBtnEl) {
 }
 
 initLanguage();
-refreshAll();
-setInterval(refreshAll, 2000);
+refreshState();
+startStateStream();
+setInterval(() => {
+  if (!streaming) refreshState();
+}, 2000);
+setInterval(refreshFiles, 10000);
 
@@ -1,19 +1,32 @@
 from __future__ import annotations
 
+import asyncio
+import atexit
+import json
 import os
 from pathlib import Path
-from typing import Any
+from typing import Annotated, Any
 
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel, Field
 
-from runtime_store import RuntimeStore
+from pairs_proxy import BackendError, PairsProxy, key_generation
+from prewarm import CachePrewarmer
+from runtime_store import STATS_WINDOWS, RuntimeStore
 
 APP_VERSION = "1.0.0"
 
+
+def _env_flag(name: str, default: bool) -> bool:
+    raw = os.getenv(name, "").strip().lower()
+    if not raw:
+        return default
+    return raw in {"1", "true", "yes", "on"}
+
+
 BASE_DIR = Path(__file__).resolve().parent
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 
@@ -22,7 +35,63 @@ DATA_DIR = Path(os.getenv("COAUTHORS_DATA_DIR", str(BASE_DIR / "data"))).expandu
 RUNTIME_DB_PATH = Path(
     os.getenv("COAUTHORS_RUNTIME_DB", str(DATA_DIR / "runtime.sqlite"))
 ).expanduser().resolve()
-runtime_store = RuntimeStore(RUNTIME_DB_PATH)
+RUNTIME_FLUSH_MS = int(os.getenv("COAUTHORS_RUNTIME_FLUSH_MS", "500"))
+RUNTIME_QUEUE_SIZE = int(os.getenv("COAUTHORS_RUNTIME_QUEUE_SIZE", "10000"))
+CACHE_TTL_SECONDS = int(os.getenv("COAUTHORS_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("COAUTHORS_CACHE_MAX_ENTRIES", "5000"))
+CACHE_MAX_BYTES = int(os.getenv("COAUTHORS_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+CACHE_EVICT_INTERVAL_SECONDS = float(os.getenv("COAUTHORS_CACHE_EVICT_INTERVAL_SECONDS", "60"))
+CACHE_MEMORY_MAX_ENTRIES = int(os.getenv("COAUTHORS_CACHE_MEMORY_MAX_ENTRIES", "256"))
+CACHE_MEMORY_MAX_BYTES = int(os.getenv("COAUTHORS_CACHE_MEMORY_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_COMPRESSION = os.getenv("COAUTHORS_CACHE_COMPRESSION", "auto")
+TELEMETRY_RETENTION_DAYS = int(os.getenv("COAUTHORS_TELEMETRY_RETENTION_DAYS", "30"))
+TELEMETRY_MAINTENANCE_SECONDS = float(os.getenv("COAUTHORS_TELEMETRY_MAINTENANCE_SECONDS", "3600"))
+WAL_CHECKPOINT_SECONDS = float(os.getenv("COAUTHORS_WAL_CHECKPOINT_SECONDS", "60"))
+PROXY_TIMEOUT_SECONDS = float(os.getenv("COAUTHORS_PROXY_TIMEOUT_SECONDS", "120"))
+PROXY_MAX_CONNECTIONS = int(os.getenv("COAUTHORS_PROXY_MAX_CONNECTIONS", "20"))
+PROXY_GENERATION_CHECK_SECONDS = float(
+    os.getenv("COAUTHORS_PROXY_GENERATION_CHECK_SECONDS", "30")
+)
+PREWARM_TOP_N = int(os.getenv("COAUTHORS_PREWARM_TOP_N", "50"))
+PREWARM_CONCURRENCY = int(os.getenv("COAUTHORS_PREWARM_CONCURRENCY", "2"))
+PREWARM_WINDOW_DAYS = int(os.getenv("COAUTHORS_PREWARM_WINDOW_DAYS", "30"))
+PREWARM_ON_REBUILD = _env_flag("COAUTHORS_PREWARM_ON_REBUILD", True)
+MAX_AUTHORS_PER_SIDE = 50
+MAX_EVENTS_PER_BATCH = 200
+MAX_CACHE_KEYS_PER_BATCH = 100
+runtime_store = RuntimeStore(
+    RUNTIME_DB_PATH,
+    flush_interval_seconds=max(RUNTIME_FLUSH_MS, 10) / 1000.0,
+    max_pending_writes=RUNTIME_QUEUE_SIZE,
+    cache_ttl_seconds=CACHE_TTL_SECONDS,
+    cache_max_entries=CACHE_MAX_ENTRIES,
+    cache_max_bytes=CACHE_MAX_BYTES,
+    eviction_interval_seconds=CACHE_EVICT_INTERVAL_SECONDS,
+    memory_max_entries=CACHE_MEMORY_MAX_ENTRIES,
+    memory_max_bytes=CACHE_MEMORY_MAX_BYTES,
+    compression=CACHE_COMPRESSION,
+    retention_days=TELEMETRY_RETENTION_DAYS,
+    maintenance_interval_seconds=TELEMETRY_MAINTENANCE_SECONDS,
+    wal_checkpoint_seconds=WAL_CHECKPOINT_SECONDS,
+)
+# Flushes queued telemetry even if the server exits without running shutdown handlers.
+atexit.register(runtime_store.close)
+pairs_proxy = PairsProxy(
+    runtime_store,
+    API_BASE_URL,
+    timeout_seconds=PROXY_TIMEOUT_SECONDS,
+    max_connections=PROXY_MAX_CONNECTIONS,
+    generation_check_seconds=PROXY_GENERATION_CHECK_SECONDS,
+)
+cache_prewarmer = CachePrewarmer(
+    runtime_store,
+    pairs_proxy,
+    top_n=PREWARM_TOP_N,
+    concurrency=PREWARM_CONCURRENCY,
+    window_days=PREWARM_WINDOW_DAYS,
+)
+if PREWARM_ON_REBUILD:
+    pairs_proxy.on_generation_change = cache_prewarmer.on_generation_change
 
 
 class RuntimeCacheGetRequest(BaseModel):
@@ -34,6 +103,27 @@ class RuntimeCachePutRequest(BaseModel):
     data: dict[str, Any]
 
 
+class RuntimeCacheMultiGetRequest(BaseModel):
+    keys: list[Annotated[str, Field(min_length=1, max_length=256)]] = Field(
+        ..., min_length=1, max_length=MAX_CACHE_KEYS_PER_BATCH
+    )
+
+
+class RuntimeCacheMultiPutRequest(BaseModel):
+    entries: list[RuntimeCachePutRequest] = Field(
+        ..., min_length=1, max_length=MAX_CACHE_KEYS_PER_BATCH
+    )
+
+
+class PairsQueryRequest(BaseModel):
+    left: list[str] = Field(default_factory=list, max_length=MAX_AUTHORS_PER_SIDE)
+    right: list[str] = Field(default_factory=list, max_length=MAX_AUTHORS_PER_SIDE)
+    exact_base_match: bool = True
+    limit_per_pair: int | None = Field(default=None, ge=1)
+    author_limit: int | None = Field(default=None, ge=1)
+    year_min: int | None = None
+
+
 class RuntimeQueryEventRequest(BaseModel):
     event_type: str = Field(default="pairs_lookup", min_length=1, max_length=64)
     query_hash: str | None = Field(default=None, max_length=128)
@@ -47,6 +137,10 @@ class RuntimeQueryEventRequest(BaseModel):
     extra: dict[str, Any] | None = None
 
 
+class RuntimeQueryEventBatchRequest(BaseModel):
+    events: list[RuntimeQueryEventRequest] = Field(..., min_length=1, max_length=MAX_EVENTS_PER_BATCH)
+
+
 app = FastAPI(
     title="CoAuthors Frontend",
     description="Frontend renderer for CoAuthors. Backend APIs are served by DblpService.",
@@ -56,6 +150,13 @@ app = FastAPI(
 app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
 
 
+@app.on_event("shutdown")
+async def _close_runtime_store() -> None:
+    await cache_prewarmer.aclose()
+    await pairs_proxy.aclose()
+    runtime_store.close()
+
+
 @app.get("/", response_class=HTMLResponse)
 def index(request: Request) -> HTMLResponse:
     visit_count = runtime_store.record_page_visit(
@@ -75,14 +176,145 @@ def index(request: Request) -> HTMLResponse:
 
 
 @app.get("/api/runtime/stats")
-def api_runtime_stats() -> JSONResponse:
-    return JSONResponse(runtime_store.stats())
+def api_runtime_stats(window: str = "1h") -> JSONResponse:
+    if window not in STATS_WINDOWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"window must be one of: {', '.join(STATS_WINDOWS)}",
+        )
+    return JSONResponse(runtime_store.stats(window))
 
 
 @app.post("/api/runtime/cache/get")
-def api_runtime_cache_get(payload: RuntimeCacheGetRequest) -> JSONResponse:
-    data = runtime_store.cache_get(payload.key.strip())
-    return JSONResponse({"hit": data is not None, "data": data})
+def api_runtime_cache_get(payload: RuntimeCacheGetRequest) -> Response:
+    # The cached payload is already serialized JSON; splice it in instead of re-encoding.
+    data = runtime_store.cache_get_raw(payload.key.strip())
+    if data is None:
+        return Response(b'{"hit":false,"data":null}', media_type="application/json")
+    return Response(b'{"hit":true,"data":' + data + b"}", media_type="application/json")
+
+
+@app.post("/api/runtime/cache/mget")
+def api_runtime_cache_mget(payload: RuntimeCacheMultiGetRequest) -> Response:
+    """Look up several keys at once; ``misses`` lists the keys the caller still has to fetch."""
+    keys = list(dict.fromkeys(key.strip() for key in payload.keys if key.strip()))
+    found = runtime_store.cache_get_many_raw(keys)
+    hits = b",".join(
+        json.dumps(key, ensure_ascii=False).encode("utf-8") + b":" + found[key]
+        for key in keys
+        if key in found
+    )
+    misses = [key for key in keys if key not in found]
+    body = (
+        b'{"hits":{'
+        + hits
+        + b'},"misses":'
+        + json.dumps(misses, ensure_ascii=False).encode("utf-8")
+        + b"}"
+    )
+    return Response(body, media_type="application/json")
+
+
+@app.post("/api/runtime/cache/mput")
+def api_runtime_cache_mput(payload: RuntimeCacheMultiPutRequest) -> JSONResponse:
+    items = [
+        (
+            entry.key.strip(),
+            json.dumps(entry.data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+        )
+        for entry in payload.entries
+    ]
+    if any(not key for key, _ in items):
+        raise HTTPException(status_code=400, detail="Cache key is required.")
+    stored = runtime_store.cache_put_many_raw(items)
+    return JSONResponse({"ok": True, "stored": stored})
+
+
+def _accepts_encoding(accept_encoding: str | None, encoding: str) -> bool:
+    for item in (accept_encoding or "").split(","):
+        token, _, params = item.strip().partition(";")
+        if token.strip().lower() not in (encoding, "*"):
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+@app.get("/api/runtime/cache/entry")
+def api_runtime_cache_entry(key: str, request: Request) -> Response:
+    """Return a cached response body, passing stored compression through when accepted."""
+    key = key.strip()
+    if not key or len(key) > 256:
+        raise HTTPException(status_code=400, detail="Cache key must be 1..256 characters.")
+    entry = runtime_store.cache_get_stored(key)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Cache miss.")
+    payload_format, payload = entry
+    headers = {"Vary": "Accept-Encoding", "X-Payload-Format": payload_format}
+    if payload_format != "json" and _accepts_encoding(
+        request.headers.get("accept-encoding"), payload_format
+    ):
+        headers["Content-Encoding"] = payload_format
+        return Response(payload, media_type="application/json", headers=headers)
+    return Response(
+        runtime_store.decoded_payload(key, payload_format, payload),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+@app.post("/api/coauthors/pairs")
+async def api_coauthors_pairs(payload: PairsQueryRequest, request: Request) -> Response:
+    left = [entry.strip() for entry in payload.left if entry.strip()]
+    right = [entry.strip() for entry in payload.right if entry.strip()]
+    if not left or not right:
+        raise HTTPException(status_code=400, detail="Both left and right author lists are required.")
+    query = payload.model_dump(exclude_none=True)
+    query["left"] = left
+    query["right"] = right
+    try:
+        cache_key, cache_status, payload_format, body = await pairs_proxy.fetch(query)
+    except BackendError as exc:
+        headers = {"Retry-After": exc.retry_after} if exc.retry_after else None
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail, headers=headers) from exc
+
+    headers = {
+        "X-Cache": cache_status,
+        "X-Cache-Key": cache_key,
+        "X-Query-Hash": cache_key.rsplit(":", 1)[-1],
+        "X-Data-Generation": key_generation(cache_key),
+        "Vary": "Accept-Encoding",
+    }
+    if payload_format != "json":
+        if _accepts_encoding(request.headers.get("accept-encoding"), payload_format):
+            headers["Content-Encoding"] = payload_format
+        else:
+            body = await asyncio.to_thread(
+                runtime_store.decoded_payload, cache_key, payload_format, body
+            )
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@app.get("/api/runtime/proxy/stats")
+def api_runtime_proxy_stats() -> JSONResponse:
+    return JSONResponse(pairs_proxy.stats())
+
+
+@app.get("/api/runtime/prewarm")
+def api_runtime_prewarm_progress() -> JSONResponse:
+    return JSONResponse(cache_prewarmer.progress())
+
+
+@app.post("/api/runtime/prewarm")
+async def api_runtime_prewarm_start() -> JSONResponse:
+    if not cache_prewarmer.start("manual"):
+        raise HTTPException(status_code=409, detail="Cache prewarming is disabled (COAUTHORS_PREWARM_TOP_N=0).")
+    return JSONResponse(cache_prewarmer.progress(), status_code=202)
 
 
 @app.post("/api/runtime/cache/put")
@@ -94,18 +326,29 @@ def api_runtime_cache_put(payload: RuntimeCachePutRequest) -> JSONResponse:
     return JSONResponse({"ok": True})
 
 
+def _query_event_fields(payload: RuntimeQueryEventRequest) -> dict[str, Any]:
+    return {
+        "event_type": payload.event_type.strip() or "pairs_lookup",
+        "query_hash": (payload.query_hash or "").strip() or None,
+        "left_count": payload.left_count,
+        "right_count": payload.right_count,
+        "total_pairs": payload.total_pairs,
+        "cache_hit": payload.cache_hit,
+        "success": payload.success,
+        "duration_ms": payload.duration_ms,
+        "error_message": (payload.error_message or "").strip() or None,
+        "extra": payload.extra,
+    }
+
+
 @app.post("/api/runtime/query/event")
 def api_runtime_query_event(payload: RuntimeQueryEventRequest) -> JSONResponse:
-    runtime_store.record_query_event(
-        event_type=payload.event_type.strip() or "pairs_lookup",
-        query_hash=(payload.query_hash or "").strip() or None,
-        left_count=payload.left_count,
-        right_count=payload.right_count,
-        total_pairs=payload.total_pairs,
-        cache_hit=payload.cache_hit,
-        success=payload.success,
-        duration_ms=payload.duration_ms,
-        error_message=(payload.error_message or "").strip() or None,
-        extra=payload.extra,
-    )
+    runtime_store.record_query_event(**_query_event_fields(payload))
     return JSONResponse({"ok": True})
+
+
+@app.post("/api/runtime/query/events")
+def api_runtime_query_events(payload: RuntimeQueryEventBatchRequest) -> JSONResponse:
+    # One queued executemany for the whole batch; also the target of navigator.sendBeacon.
+    queued = runtime_store.record_query_events([_query_event_fields(event) for event in payload.events])
+    return JSONResponse({"ok": True, "accepted": len(payload.events) if queued else 0})
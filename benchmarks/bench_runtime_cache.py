@@ -0,0 +1,117 @@
+"""Compare runtime cache size and hit latency across payload formats.
+
+Fills one runtime database per payload format (``json``, ``gzip`` and, when
+``zstandard`` is installed, ``zstd``) with the same synthetic pair responses,
+then reads every key back through SQLite with the in-process memory cache
+disabled. Reports database size, mean stored payload size and hit latency
+both for decoded JSON (``cache/get``) and for the stored bytes that
+``cache/entry`` passes through to clients accepting the encoding.
+
+    python -m benchmarks.bench_runtime_cache --entries 200 --output bench/runtime_cache.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from benchmarks.common import db_size_bytes, summarize_ms, synthetic_pairs_response, write_results
+from runtime_store import RuntimeStore, zstandard
+
+
+def measure_format(
+    workdir: Path,
+    payload_format: str,
+    responses: list[dict[str, Any]],
+    rounds: int,
+) -> dict[str, Any]:
+    db_path = workdir / f"runtime-{payload_format}.sqlite"
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+
+    store = RuntimeStore(db_path, compression="none" if payload_format == "json" else payload_format)
+    put_ms: list[float] = []
+    try:
+        for index, response in enumerate(responses):
+            started = time.perf_counter()
+            store.cache_put(f"bench:{index}", response)
+            put_ms.append((time.perf_counter() - started) * 1000.0)
+    finally:
+        store.close()
+
+    conn = sqlite3.connect(str(db_path))
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+        stored_bytes = conn.execute("SELECT SUM(size_bytes), COUNT(1) FROM query_cache").fetchone()
+    finally:
+        conn.close()
+
+    decoded_ms: list[float] = []
+    stored_ms: list[float] = []
+    store = RuntimeStore(db_path, compression="none" if payload_format == "json" else payload_format)
+    try:
+        for _ in range(rounds):
+            for index in range(len(responses)):
+                key = f"bench:{index}"
+                started = time.perf_counter()
+                store.cache_get_raw(key)
+                decoded_ms.append((time.perf_counter() - started) * 1000.0)
+                started = time.perf_counter()
+                store.cache_get_stored(key)
+                stored_ms.append((time.perf_counter() - started) * 1000.0)
+    finally:
+        store.close()
+
+    return {
+        "db_size_bytes": db_size_bytes(db_path),
+        "stored_payload_mean_bytes": round(int(stored_bytes[0] or 0) / max(1, int(stored_bytes[1])), 1),
+        "put": summarize_ms(put_ms),
+        "hit_decoded": summarize_ms(decoded_ms),
+        "hit_stored": summarize_ms(stored_ms),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=200)
+    parser.add_argument("--side", type=int, default=20, help="authors per matrix side")
+    parser.add_argument("--items-per-pair", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--workdir", type=Path, default=None)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="coauthors-bench-cache-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    responses = [
+        synthetic_pairs_response(args.side, args.items_per_pair, args.seed + index)
+        for index in range(args.entries)
+    ]
+
+    formats = ["json", "gzip"] + (["zstd"] if zstandard is not None else [])
+    results = {}
+    for payload_format in formats:
+        started = time.perf_counter()
+        results[payload_format] = measure_format(workdir, payload_format, responses, args.rounds)
+        print(f"Measured {payload_format} in {time.perf_counter() - started:.1f}s")
+
+    write_results(
+        args.output,
+        {
+            "benchmark": "runtime_cache_formats",
+            "entries": args.entries,
+            "matrix": f"{args.side}x{args.side}",
+            "items_per_pair": args.items_per_pair,
+            "rounds": args.rounds,
+            "formats": results,
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Shared helpers for the CoAuthors frontend benchmark scripts."""
+
+from __future__ import annotations
+
+import importlib.util
+import random
+import sys
+from pathlib import Path
+from typing import Any
+
+# Both benchmark trees are packages named ``benchmarks``, so the shared
+# reporting helpers are loaded from DblpService's copy by path.
+_REPORTING_PATH = Path(__file__).resolve().parent.parent / "DblpService" / "benchmarks" / "reporting.py"
+_spec = importlib.util.spec_from_file_location("coauthors_benchmark_reporting", _REPORTING_PATH)
+_reporting = importlib.util.module_from_spec(_spec)
+sys.modules[_spec.name] = _reporting
+_spec.loader.exec_module(_reporting)
+
+db_size_bytes = _reporting.db_size_bytes
+percentile = _reporting.percentile
+summarize_ms = _reporting.summarize_ms
+write_results = _reporting.write_results
+
+VENUES = ("NeurIPS", "ICML", "ICLR", "CVPR", "ACL", "KDD", "SIGMOD", "VLDB", "OSDI", "SOSP")
+PUB_TYPES = ("inproceedings", "article")
+WORDS = (
+    "learning", "graph", "neural", "efficient", "scalable", "distributed", "query",
+    "optimization", "representation", "robust", "adaptive", "transformer", "storage",
+    "index", "retrieval", "privacy", "systems", "networks", "language", "models",
+)
+
+
+def synthetic_pairs_response(side: int, items_per_pair: int, seed: int) -> dict[str, Any]:
+    """Build a response shaped like DblpService's ``/api/coauthors/pairs`` output."""
+    rng = random.Random(seed)
+    left = [f"Left Author {seed}-{i}" for i in range(side)]
+    right = [f"Right Author {seed}-{i}" for i in range(side)]
+    matrix: dict[str, dict[str, int]] = {name: {} for name in left}
+    pair_pubs = []
+    for left_name in left:
+        for right_name in right:
+            count = rng.randint(0, items_per_pair)
+            items = [
+                {
+                    "title": " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 12))).capitalize() + ".",
+                    "year": rng.randint(1995, 2025),
+                    "venue": rng.choice(VENUES),
+                    "pub_type": rng.choice(PUB_TYPES),
+                }
+                for _ in range(count)
+            ]
+            matrix[left_name][right_name] = count
+            pair_pubs.append({"left": left_name, "right": right_name, "count": count, "items": items})
+    return {
+        "limit_per_pair": items_per_pair,
+        "exact_base_match": True,
+        "left_authors": left,
+        "right_authors": right,
+        "matrix": matrix,
+        "pair_pubs": pair_pubs,
+        "pair_count": len(pair_pubs),
+    }
@@ -0,0 +1,366 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from typing import Any, Callable
+
+import httpx
+
+from runtime_store import RuntimeStore
+
+logger = logging.getLogger("coauthors.proxy")
+
+PAIRS_PATH = "/api/coauthors/pairs"
+HEALTH_PATH = "/api/health"
+STATS_PATH = "/api/stats"
+GENERATION_HEADER = "X-Data-Generation"
+PAIRS_KEY_FAMILY = "pairs:"
+PAIRS_KEY_VERSION = "pairs:v2:"
+UNKNOWN_GENERATION = "unknown"
+# Lookup events are handed to RuntimeStore.record_query_events in batches.
+EVENT_FLUSH_SECONDS = 0.5
+MAX_EVENT_BATCH = 200
+
+
+class BackendError(Exception):
+    def __init__(self, status_code: int, detail: str, retry_after: str | None = None) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        # DblpService's Retry-After on 429/503, passed on so clients keep its backpressure.
+        self.retry_after = retry_after
+
+
+def normalize_generation(value: Any) -> str | None:
+    """Make a backend generation id safe to embed in a cache key."""
+    if value is None:
+        return None
+    text = re.sub(r"[^A-Za-z0-9._-]", "_", str(value).strip())[:64]
+    return text or None
+
+
+def pairs_namespace(generation: str | None) -> str:
+    return f"{PAIRS_KEY_VERSION}{generation or UNKNOWN_GENERATION}:"
+
+
+def pairs_cache_key(payload: dict[str, Any], generation: str | None) -> str:
+    """Stable key for a pairs request: same inputs and data generation, same key,
+    whatever the field order."""
+    canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+    return f"{pairs_namespace(generation)}{digest}"
+
+
+def key_generation(cache_key: str) -> str:
+    return cache_key[len(PAIRS_KEY_VERSION):].split(":", 1)[0]
+
+
+def key_digest(cache_key: str) -> str:
+    """The generation-independent part of a key, recorded as ``query_hash``."""
+    return cache_key.rsplit(":", 1)[-1]
+
+
+class PairsProxy:
+    """Answers pairs queries from RuntimeStore or DblpService, once per distinct query.
+
+    Misses go to ``API_BASE_URL`` over one pooled keep-alive client. Identical
+    requests that arrive while a query is in flight wait for the same result
+    instead of calling the backend again; the result is written to the
+    runtime cache in the background.
+
+    Keys embed DblpService's data generation (``X-Data-Generation``), re-read
+    from ``/api/health`` at most every ``generation_check_seconds`` and from
+    every pairs response. A new generation switches the runtime cache
+    namespace, which invalidates all older ``pairs:`` entries at once.
+    """
+
+    def __init__(
+        self,
+        store: RuntimeStore,
+        api_base_url: str,
+        timeout_seconds: float,
+        max_connections: int,
+        generation_check_seconds: float = 30.0,
+        on_generation_change: Callable[[str | None, str], None] | None = None,
+    ) -> None:
+        self.store = store
+        self.api_base_url = api_base_url.rstrip("/")
+        self.timeout_seconds = timeout_seconds
+        self.max_connections = max(1, max_connections)
+        self._client: httpx.AsyncClient | None = None
+        self._inflight: dict[str, asyncio.Task[bytes]] = {}
+        self._background: set[asyncio.Task[None]] = set()
+        self._pending_events: list[dict[str, Any]] = []
+        self._event_flush: asyncio.TimerHandle | None = None
+        self.generation_check_seconds = max(0.0, generation_check_seconds)
+        namespace = store.cache_namespace(PAIRS_KEY_FAMILY)
+        self.generation: str | None = None
+        if namespace and namespace.startswith(PAIRS_KEY_VERSION):
+            stored = key_generation(namespace)
+            self.generation = None if stored == UNKNOWN_GENERATION else stored
+        self._generation_checked_at: float | None = None
+        self._generation_lock: asyncio.Lock | None = None
+        self.generation_changes = 0
+        self.on_generation_change = on_generation_change
+        self.coalesced = 0
+        self.backend_calls = 0
+        self.backend_errors = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.api_base_url,
+                timeout=httpx.Timeout(self.timeout_seconds, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        self._flush_events()
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch(self, payload: dict[str, Any]) -> tuple[str, str, str, bytes]:
+        """Return ``(cache_key, cache_status, payload_format, body)``.
+
+        ``cache_status`` is ``HIT``, ``MISS`` or ``COALESCED``; ``body`` is in
+        ``payload_format`` (compressed for stored hits, ``json`` otherwise).
+        """
+        started = time.perf_counter()
+        await self._refresh_generation()
+        cache_key = pairs_cache_key(payload, self.generation)
+
+        inflight = self._inflight.get(cache_key)
+        if inflight is None:
+            try:
+                stored = await asyncio.to_thread(self.store.cache_get_stored, cache_key)
+            except Exception:
+                # A broken cache degrades to a backend call rather than failing the query.
+                logger.exception("Runtime cache read failed for %s", cache_key)
+                stored = None
+            if stored is not None:
+                self._record_event(payload, cache_key, "HIT", started, None)
+                return cache_key, "HIT", stored[0], stored[1]
+            # Re-check: another request may have become the leader while we read the cache.
+            inflight = self._inflight.get(cache_key)
+
+        if inflight is not None:
+            self.coalesced += 1
+            body = await asyncio.shield(inflight)
+            self._record_event(payload, cache_key, "COALESCED", started, None)
+            return cache_key, "COALESCED", "json", body
+
+        # The backend call runs as its own task so a disconnecting leader does
+        # not cancel it for the requests coalesced onto it.
+        task = asyncio.get_running_loop().create_task(self._resolve(cache_key, payload, started))
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._inflight[cache_key] = task
+        body = await asyncio.shield(task)
+        return cache_key, "MISS", "json", body
+
+    async def _refresh_generation(self) -> None:
+        """Re-read the backend generation if the last check is too old; one check at a time."""
+        checked_at = self._generation_checked_at
+        if checked_at is not None and time.monotonic() - checked_at < self.generation_check_seconds:
+            return
+        if self._generation_lock is None:
+            self._generation_lock = asyncio.Lock()
+        async with self._generation_lock:
+            if self._generation_checked_at != checked_at:
+                return
+            try:
+                generation = await self._fetch_generation()
+            except httpx.HTTPError as exc:
+                # Keep the last known generation; the next pairs response may carry it.
+                logger.warning("Could not read DblpService data generation: %s", exc)
+                generation = None
+            self._generation_checked_at = time.monotonic()
+            if generation:
+                await self._set_generation(generation)
+
+    async def _fetch_generation(self) -> str | None:
+        client = self._get_client()
+        resp = await client.get(HEALTH_PATH)
+        generation = normalize_generation(resp.headers.get(GENERATION_HEADER))
+        if generation or resp.status_code != 200:
+            return generation
+        # Backends without the header: fall back to the stats fields.
+        resp = await client.get(STATS_PATH)
+        if resp.status_code != 200:
+            return None
+        try:
+            stats = resp.json()
+        except ValueError:
+            return None
+        return normalize_generation(stats.get("generation") or stats.get("data_date"))
+
+    async def _set_generation(self, generation: str) -> None:
+        if generation == self.generation:
+            return
+        try:
+            await asyncio.to_thread(
+                self.store.set_cache_namespace, PAIRS_KEY_FAMILY, pairs_namespace(generation)
+            )
+        except Exception:
+            logger.exception("Failed to switch runtime cache namespace to %s", generation)
+            return
+        logger.info("DblpService data generation changed: %s -> %s", self.generation, generation)
+        previous, self.generation = self.generation, generation
+        self.generation_changes += 1
+        if self.on_generation_change is not None:
+            self.on_generation_change(previous, generation)
+
+    async def warm(self, payload: dict[str, Any]) -> str:
+        """Make sure ``payload``'s result is cached without recording a lookup.
+
+        Returns ``cached`` if it already was, ``coalesced`` if an identical
+        query was in flight, ``warmed`` after a backend call, or ``failed``.
+        """
+        await self._refresh_generation()
+        cache_key = pairs_cache_key(payload, self.generation)
+        inflight = self._inflight.get(cache_key)
+        if inflight is None:
+            if await asyncio.to_thread(self.store.cache_contains, cache_key):
+                return "cached"
+            inflight = self._inflight.get(cache_key)
+        status = "coalesced"
+        if inflight is None:
+            inflight = asyncio.get_running_loop().create_task(
+                self._resolve(cache_key, payload, time.perf_counter(), record=False)
+            )
+            inflight.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[cache_key] = inflight
+            status = "warmed"
+        try:
+            await asyncio.shield(inflight)
+        except BackendError:
+            return "failed"
+        return status
+
+    async def _resolve(
+        self, cache_key: str, payload: dict[str, Any], started: float, record: bool = True
+    ) -> bytes:
+        try:
+            body, generation = await self._call_backend(payload)
+        except BackendError as exc:
+            self._inflight.pop(cache_key, None)
+            if record:
+                self._record_event(payload, cache_key, "MISS", started, exc.detail)
+            raise
+        except BaseException:
+            self._inflight.pop(cache_key, None)
+            raise
+        if record:
+            self._record_event(payload, cache_key, "MISS", started, None)
+            self.store.remember_query_request(key_digest(cache_key), payload)
+        store_key = cache_key
+        if generation and generation != key_generation(cache_key):
+            # The backend was rebuilt since the last check: file the result under the new generation.
+            await self._set_generation(generation)
+            store_key = pairs_cache_key(payload, generation)
+        # Keep serving this result to identical requests until it is in the cache.
+        store_task = asyncio.get_running_loop().create_task(
+            self._store_result(cache_key, store_key, body)
+        )
+        self._background.add(store_task)
+        store_task.add_done_callback(self._background.discard)
+        return body
+
+    async def _call_backend(self, payload: dict[str, Any]) -> tuple[bytes, str | None]:
+        self.backend_calls += 1
+        try:
+            resp = await self._get_client().post(PAIRS_PATH, json=payload)
+        except httpx.TimeoutException as exc:
+            self.backend_errors += 1
+            raise BackendError(504, "DblpService request timed out.") from exc
+        except httpx.HTTPError as exc:
+            self.backend_errors += 1
+            raise BackendError(502, f"DblpService request failed: {exc}") from exc
+        if resp.status_code != 200:
+            self.backend_errors += 1
+            try:
+                body = resp.json()
+            except ValueError:
+                body = None
+            # Error pages from a proxy in between may be JSON but not an object.
+            detail = body.get("detail") if isinstance(body, dict) else None
+            raise BackendError(
+                resp.status_code,
+                str(detail or f"HTTP {resp.status_code}"),
+                retry_after=resp.headers.get("Retry-After"),
+            )
+        return resp.content, normalize_generation(resp.headers.get(GENERATION_HEADER))
+
+    async def _store_result(self, cache_key: str, store_key: str, body: bytes) -> None:
+        try:
+            await asyncio.to_thread(self.store.cache_put_raw, store_key, body)
+        except Exception:
+            logger.exception("Failed to cache pairs result %s", store_key)
+        finally:
+            self._inflight.pop(cache_key, None)
+
+    def _record_event(
+        self,
+        payload: dict[str, Any],
+        cache_key: str,
+        cache_status: str,
+        started: float,
+        error_message: str | None,
+    ) -> None:
+        left_count = len(payload.get("left", []))
+        right_count = len(payload.get("right", []))
+        self._pending_events.append(
+            {
+                "event_type": "pairs_lookup",
+                "query_hash": key_digest(cache_key),
+                "left_count": left_count,
+                "right_count": right_count,
+                "total_pairs": left_count * right_count,
+                "cache_hit": cache_status != "MISS",
+                "success": error_message is None,
+                "duration_ms": int((time.perf_counter() - started) * 1000),
+                "error_message": error_message,
+                "extra": {
+                    "source": "proxy",
+                    "cache_status": cache_status,
+                    "generation": key_generation(cache_key),
+                    "year_min": payload.get("year_min"),
+                    "exact_base_match": payload.get("exact_base_match", True),
+                },
+            }
+        )
+        if len(self._pending_events) >= MAX_EVENT_BATCH:
+            self._flush_events()
+        elif self._event_flush is None:
+            self._event_flush = asyncio.get_running_loop().call_later(
+                EVENT_FLUSH_SECONDS, self._flush_events
+            )
+
+    def _flush_events(self) -> None:
+        """Queue the buffered lookup events as one batch (one ``executemany`` in the writer)."""
+        if self._event_flush is not None:
+            self._event_flush.cancel()
+            self._event_flush = None
+        events, self._pending_events = self._pending_events, []
+        if events:
+            self.store.record_query_events(events)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "inflight": len(self._inflight),
+            "coalesced": self.coalesced,
+            "backend_calls": self.backend_calls,
+            "backend_errors": self.backend_errors,
+            "generation": self.generation,
+            "generation_changes": self.generation_changes,
+        }
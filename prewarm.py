@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+from pairs_proxy import PairsProxy
+from runtime_store import RuntimeStore
+
+logger = logging.getLogger("coauthors.prewarm")
+
+WARM_RESULTS = ("warmed", "cached", "coalesced", "failed")
+
+
+def _utc_now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+class CachePrewarmer:
+    """Refills the pairs cache with the queries users ask most, after a data rebuild.
+
+    Candidates come from ``query_events`` joined to the canonical requests in
+    ``query_requests``, ranked by lookups in the last ``window_days`` times
+    their cold-query duration. They are replayed through ``PairsProxy.warm``
+    with at most ``concurrency`` backend calls at a time, so live queries
+    keep most of the connection pool. One job runs at a time; starting a new
+    one cancels the previous job.
+    """
+
+    def __init__(
+        self,
+        store: RuntimeStore,
+        proxy: PairsProxy,
+        top_n: int,
+        concurrency: int,
+        window_days: int,
+    ) -> None:
+        self.store = store
+        self.proxy = proxy
+        self.top_n = max(0, top_n)
+        self.concurrency = max(1, concurrency)
+        self.window_days = max(1, window_days)
+        self._task: asyncio.Task[None] | None = None
+        self._progress: dict[str, Any] = self._new_progress("idle", None)
+
+    @staticmethod
+    def _new_progress(status: str, reason: str | None) -> dict[str, Any]:
+        return {
+            "status": status,
+            "reason": reason,
+            "generation": None,
+            "total": 0,
+            "done": 0,
+            **{result: 0 for result in WARM_RESULTS},
+            "started_at": None,
+            "finished_at": None,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, reason: str) -> bool:
+        """Start a job on the running loop; returns False if prewarming is disabled."""
+        if self.top_n == 0:
+            return False
+        if self.running:
+            self._task.cancel()
+        self._progress = self._new_progress("running", reason)
+        self._progress["started_at"] = _utc_now()
+        self._task = asyncio.get_running_loop().create_task(self._run(self._progress))
+        return True
+
+    def on_generation_change(self, previous: str | None, generation: str) -> None:
+        # The first generation seen after a fresh start is not a rebuild.
+        if previous is not None:
+            self.start(f"generation {previous} -> {generation}")
+
+    async def aclose(self) -> None:
+        if self.running:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _run(self, progress: dict[str, Any]) -> None:
+        try:
+            candidates = await asyncio.to_thread(
+                self.store.top_query_requests, "pairs_lookup", self.top_n, self.window_days
+            )
+            progress["total"] = len(candidates)
+            progress["generation"] = self.proxy.generation
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def warm_one(candidate: dict[str, Any]) -> None:
+                async with semaphore:
+                    try:
+                        result = await self.proxy.warm(candidate["request"])
+                    except Exception:
+                        logger.exception("Prewarming %s failed", candidate["query_hash"])
+                        result = "failed"
+                progress[result] += 1
+                progress["done"] += 1
+
+            await asyncio.gather(*(warm_one(candidate) for candidate in candidates))
+            progress["status"] = "done"
+            logger.info(
+                "Prewarmed %d of %d queries (%d already cached, %d failed)",
+                progress["warmed"],
+                progress["total"],
+                progress["cached"],
+                progress["failed"],
+            )
+        except asyncio.CancelledError:
+            progress["status"] = "cancelled"
+            raise
+        except Exception:
+            logger.exception("Cache prewarm job failed")
+            progress["status"] = "failed"
+        finally:
+            progress["finished_at"] = _utc_now()
+
+    def progress(self) -> dict[str, Any]:
+        return {
+            **self._progress,
+            "top_n": self.top_n,
+            "concurrency": self.concurrency,
+            "window_days": self.window_days,
+        }
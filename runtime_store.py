@@ -1,23 +1,438 @@
 from __future__ import annotations
 
+import gzip
 import json
+import logging
+import queue
 import sqlite3
 import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any
 
+try:
+    import zstandard
+except ImportError:  # optional: gzip is used when zstandard is not installed
+    zstandard = None
+
+logger = logging.getLogger("coauthors.runtime")
+
+# payload_format values; the compressed ones double as HTTP Content-Encoding tokens.
+PAYLOAD_FORMATS = ("json", "gzip", "zstd")
+
+COUNTER_UPSERT_SQL = """
+INSERT INTO runtime_counters (name, value, updated_at)
+VALUES (?, ?, datetime('now'))
+ON CONFLICT(name) DO UPDATE SET
+    value = runtime_counters.value + excluded.value,
+    updated_at = datetime('now')
+"""
+
+_STOP = object()
+
+EVICTION_REASONS = ("ttl", "entries", "bytes", "stale")
+
+
+# Upper bounds (ms) of the latency histogram bins; the last bin is open-ended.
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+# Rollup windows: name -> (seconds, resolution). Long windows read hourly rows
+# so every window touches a bounded number of buckets.
+STATS_WINDOWS = {
+    "15m": (15 * 60, "minute"),
+    "1h": (3600, "minute"),
+    "6h": (6 * 3600, "minute"),
+    "24h": (24 * 3600, "hour"),
+    "7d": (7 * 24 * 3600, "hour"),
+    "30d": (30 * 24 * 3600, "hour"),
+}
+
+ROLLUP_RESOLUTIONS = {"minute": 60, "hour": 3600}
+
+# query_cache entry count and size are refreshed this often by the writer.
+CACHE_GAUGE_REFRESH_SECONDS = 5.0
+
+# Keys per IN (...) query of a multi-key cache read.
+CACHE_BATCH_KEYS = 500
+
+# Minute rollups only back windows up to 6h; hourly rows are kept.
+MINUTE_ROLLUP_RETENTION_SECONDS = 2 * 24 * 3600
+
+# Raw telemetry tables. New rows go to one partition per UTC day
+# (``<table>_dYYYYMMDD``) that retention drops whole; the unpartitioned
+# table only holds rows written before partitioning and is drained in batches.
+RAW_TABLE_COLUMNS = {
+    "page_visits": """
+        route TEXT NOT NULL,
+        client_ip TEXT,
+        user_agent TEXT,
+        created_at TEXT NOT NULL DEFAULT (datetime('now'))
+    """,
+    "query_events": """
+        event_type TEXT NOT NULL,
+        query_hash TEXT,
+        left_count INTEGER NOT NULL DEFAULT 0,
+        right_count INTEGER NOT NULL DEFAULT 0,
+        total_pairs INTEGER NOT NULL DEFAULT 0,
+        cache_hit INTEGER NOT NULL DEFAULT 0,
+        success INTEGER NOT NULL DEFAULT 1,
+        duration_ms INTEGER,
+        error_message TEXT,
+        extra_json TEXT,
+        created_at TEXT NOT NULL DEFAULT (datetime('now'))
+    """,
+}
+
+
+# Keep query_cache_totals in step with query_cache.
+CACHE_TOTALS_TRIGGERS = {
+    "query_cache_totals_insert": """
+        AFTER INSERT ON query_cache BEGIN
+            UPDATE query_cache_totals
+            SET entries = entries + 1, bytes = bytes + NEW.size_bytes WHERE id = 1;
+        END
+    """,
+    "query_cache_totals_delete": """
+        AFTER DELETE ON query_cache BEGIN
+            UPDATE query_cache_totals
+            SET entries = entries - 1, bytes = bytes - OLD.size_bytes WHERE id = 1;
+        END
+    """,
+    "query_cache_totals_resize": """
+        AFTER UPDATE OF size_bytes ON query_cache BEGIN
+            UPDATE query_cache_totals
+            SET bytes = bytes + NEW.size_bytes - OLD.size_bytes WHERE id = 1;
+        END
+    """,
+}
+
+
+def latency_bin(duration_ms: int) -> int:
+    for index, upper in enumerate(LATENCY_BUCKETS_MS):
+        if duration_ms <= upper:
+            return index
+    return len(LATENCY_BUCKETS_MS)
+
+
+def histogram_percentile(counts: list[int], quantile: float) -> float | None:
+    """Estimate a percentile by linear interpolation inside the matching bin."""
+    total = sum(counts)
+    if not total:
+        return None
+    rank = quantile * total
+    seen = 0
+    for index, count in enumerate(counts):
+        if count and seen + count >= rank:
+            lower = LATENCY_BUCKETS_MS[index - 1] if index > 0 else 0
+            if index >= len(LATENCY_BUCKETS_MS):
+                return float(lower)
+            upper = LATENCY_BUCKETS_MS[index]
+            return lower + (upper - lower) * (rank - seen) / count
+        seen += count
+    return float(LATENCY_BUCKETS_MS[-1])
+
+
+def _partition_ddl(name: str, table: str) -> str:
+    return f"CREATE TABLE IF NOT EXISTS {name} (id INTEGER PRIMARY KEY, {RAW_TABLE_COLUMNS[table]})"
+
+
+def _bucket_start(timestamp: float, seconds: int) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(timestamp - timestamp % seconds))
+
+
+def _sql_time(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(timestamp))
+
+
+def partition_name(table: str, timestamp: float) -> str:
+    return f"{table}_d{time.strftime('%Y%m%d', time.gmtime(timestamp))}"
+
+
+def _add_to_rollups(
+    rollups: dict[tuple[str, str, str], list[Any]],
+    resolution: str,
+    bucket_start: str,
+    event_type: str,
+    cache_hit: bool,
+    success: bool,
+    duration_ms: int | None,
+) -> None:
+    key = (resolution, bucket_start, event_type)
+    entry = rollups.get(key)
+    if entry is None:
+        entry = [0, 0, 0, 0, 0, 0, [0] * (len(LATENCY_BUCKETS_MS) + 1)]
+        rollups[key] = entry
+    entry[0] += 1
+    entry[1] += 1 if cache_hit else 0
+    entry[2] += 0 if success else 1
+    if duration_ms is not None:
+        entry[3] += 1
+        entry[4] += int(duration_ms)
+        entry[5] = max(entry[5], int(duration_ms))
+        entry[6][latency_bin(int(duration_ms))] += 1
+
+
+def prefix_upper_bound(prefix: str) -> str:
+    """Smallest string greater than every string starting with ``prefix``."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def resolve_payload_format(compression: str) -> str:
+    """Map a ``COAUTHORS_CACHE_COMPRESSION`` value to a stored payload format."""
+    name = compression.strip().lower()
+    if name == "auto":
+        return "zstd" if zstandard is not None else "gzip"
+    if name == "none":
+        return "json"
+    if name not in PAYLOAD_FORMATS:
+        raise ValueError(f"Unsupported cache compression: {compression}")
+    if name == "zstd" and zstandard is None:
+        logger.warning("zstandard is not installed; storing cache payloads as gzip")
+        return "gzip"
+    return name
+
+
+def encode_payload(raw: bytes, payload_format: str) -> bytes:
+    if payload_format == "gzip":
+        return gzip.compress(raw, compresslevel=6, mtime=0)
+    if payload_format == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(raw)
+    return raw
+
+
+def decode_payload(data: bytes, payload_format: str) -> bytes:
+    if payload_format == "gzip":
+        return gzip.decompress(data)
+    if payload_format == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd cache payloads")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+
+class MemoryCache:
+    """Bounded in-process LRU of cache payloads.
+
+    Entries keep the stored (possibly compressed) form, which responses pass
+    through to clients that accept it, plus the decoded JSON once something
+    has needed it, so a hot key is decompressed at most once while it stays
+    cached. Both forms count towards ``max_bytes``.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max(0, max_entries)
+        self.max_bytes = max(0, max_bytes)
+        self._lock = threading.Lock()
+        # key -> (payload, payload_format, expires_at, decoded JSON or None)
+        self._entries: OrderedDict[str, tuple[bytes, str, float | None, bytes | None]] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, key: str) -> tuple[str, bytes] | None:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] <= time.time():
+                self._drop_locked(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[0]
+
+    def put(
+        self,
+        key: str,
+        payload: bytes,
+        payload_format: str,
+        expires_at: float | None,
+        decoded: bytes | None = None,
+    ) -> None:
+        if payload_format == "json":
+            decoded = None
+        if not self.enabled or len(payload) + len(decoded or b"") > self.max_bytes:
+            self.discard([key])
+            return
+        with self._lock:
+            self._drop_locked(key)
+            self._entries[key] = (payload, payload_format, expires_at, decoded)
+            self._bytes += self._entry_size(self._entries[key])
+            self._evict_locked()
+
+    def decoded(self, key: str, payload_format: str, payload: bytes) -> bytes:
+        """Return ``payload`` as JSON bytes, reusing the copy kept for ``key`` if it has one."""
+        if payload_format == "json":
+            return payload
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is payload and entry[3] is not None:
+                return entry[3]
+        raw = decode_payload(payload, payload_format)
+        with self._lock:
+            entry = self._entries.get(key)
+            # Only attach to the entry the payload came from, not to a newer write.
+            if (
+                entry is not None
+                and entry[0] is payload
+                and entry[3] is None
+                and len(payload) + len(raw) <= self.max_bytes
+            ):
+                self._entries[key] = (*entry[:3], raw)
+                self._bytes += len(raw)
+                self._evict_locked()
+        return raw
+
+    def discard(self, keys: list[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._drop_locked(key)
+
+    def discard_matching(self, predicate: Any) -> int:
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._drop_locked(key)
+        return len(keys)
+
+    def _evict_locked(self) -> None:
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            self._drop_locked(next(iter(self._entries)))
+
+    @staticmethod
+    def _entry_size(entry: tuple[bytes, str, float | None, bytes | None]) -> int:
+        return len(entry[0]) + len(entry[3] or b"")
+
+    def _drop_locked(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= self._entry_size(entry)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
 
 class RuntimeStore:
-    def __init__(self, db_path: Path) -> None:
+    """Runtime cache and telemetry backed by one SQLite file.
+
+    Reads use long-lived per-thread connections. Writes (telemetry, counters,
+    cache hit counts, eviction, retention) go through one background thread
+    that commits everything queued in a flush interval as one transaction;
+    the queue is bounded and overflowing writes are counted as dropped.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        flush_interval_seconds: float = 0.5,
+        max_pending_writes: int = 10000,
+        max_batch_writes: int = 2000,
+        cache_ttl_seconds: int = 0,
+        cache_max_entries: int = 0,
+        cache_max_bytes: int = 0,
+        eviction_interval_seconds: float = 60.0,
+        eviction_batch_size: int = 200,
+        memory_max_entries: int = 0,
+        memory_max_bytes: int = 0,
+        compression: str = "auto",
+        retention_days: int = 0,
+        maintenance_interval_seconds: float = 3600.0,
+        wal_checkpoint_seconds: float = 0.0,
+    ) -> None:
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_batch_writes = max(1, max_batch_writes)
+        self.cache_ttl_seconds = max(0, cache_ttl_seconds)
+        self.cache_max_entries = max(0, cache_max_entries)
+        self.cache_max_bytes = max(0, cache_max_bytes)
+        self.eviction_interval_seconds = eviction_interval_seconds
+        self.eviction_batch_size = max(1, eviction_batch_size)
+        self.payload_format = resolve_payload_format(compression)
+        self.retention_days = max(0, retention_days)
+        self.maintenance_interval_seconds = maintenance_interval_seconds
+        self.wal_checkpoint_seconds = max(0.0, wal_checkpoint_seconds)
+        self._partitions: set[str] = set()
+        # Partitions a request queued rows for before the writer created them.
+        self._missing_partitions: dict[str, str] = {}
+        self._partition_lock = threading.Lock()
+        self._rollups_since: str | None = None
+        self._retention = {
+            "dropped_partitions": 0,
+            "drained_rows": 0,
+            "backfilled_rows": 0,
+            "rolled_up_visits": 0,
+            "pruned_rollups": 0,
+            "last_maintenance_at": None,
+        }
+        self._checkpoint: dict[str, Any] = {"last_at": None, "busy": None, "log": None, "checkpointed": None}
         self._init_lock = threading.Lock()
         self._initialized = False
+        self.incremental_vacuum = False
+        self._local = threading.local()
+        self._conns_lock = threading.Lock()
+        self._conns: list[sqlite3.Connection] = []
+        self._pending: queue.Queue[Any] = queue.Queue(maxsize=max(1, max_pending_writes))
+        self._stats_lock = threading.Lock()
+        self._unflushed_counters: dict[str, int] = {}
+        # Committed values of counters that have been read, kept current by the writer.
+        self._counter_cache: dict[str, int] = {}
+        self._dropped_writes = 0
+        self._flushed_batches = 0
+        self._flushed_writes = 0
+        self._failed_batches = 0
+        self._evicted = {reason: 0 for reason in EVICTION_REASONS}
+        self._vacuumed_pages = 0
+        self._last_eviction_at: str | None = None
+        self._pending_hits: dict[str, list[Any]] = {}
+        self._pending_rollups: dict[tuple[str, str, str], list[Any]] = {}
+        self._cache_gauges: dict[str, Any] = {"entries": 0, "bytes": 0, "as_of": None}
+        self._namespaces: dict[str, str] = {}
+        self._stale_pending = False
+        self._memory = MemoryCache(memory_max_entries, memory_max_bytes)
+        self._closed = False
         self._ensure_initialized()
+        self._load_namespaces()
+        self._refresh_cache_gauges(self._conn())
+        self._writer = threading.Thread(
+            target=self._writer_loop, name="runtime-store-writer", daemon=True
+        )
+        self._writer.start()
 
     def _connect(self) -> sqlite3.Connection:
         conn = sqlite3.connect(str(self.db_path), timeout=30)
         conn.row_factory = sqlite3.Row
+        if self.wal_checkpoint_seconds:
+            # Checkpoints run on the writer's schedule, not whenever a commit crosses 1000 pages.
+            conn.execute("PRAGMA wal_autocheckpoint=0")
+            conn.execute(f"PRAGMA journal_size_limit={64 * 1024 * 1024}")
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._conns_lock:
+                self._conns.append(conn)
         return conn
 
     def _ensure_initialized(self) -> None:
@@ -28,6 +443,26 @@ class RuntimeStore:
                 return
             conn = self._connect()
             try:
+                # Incremental auto-vacuum lets eviction hand pages back to the
+                # filesystem. A new file gets it for free; an existing one needs
+                # a full VACUUM, which is left to the offline command so no
+                # worker blocks startup on it.
+                self.incremental_vacuum = int(conn.execute("PRAGMA auto_vacuum").fetchone()[0]) == 2
+                if not self.incremental_vacuum:
+                    has_tables = conn.execute(
+                        "SELECT 1 FROM sqlite_master WHERE type = 'table' LIMIT 1"
+                    ).fetchone()
+                    if has_tables:
+                        logger.warning(
+                            "%s uses auto_vacuum=NONE: evicted pages are reused but not returned "
+                            "to the filesystem. Stop the service and run "
+                            "`python runtime_store.py enable-incremental-vacuum %s` to convert it.",
+                            self.db_path,
+                            self.db_path,
+                        )
+                    else:
+                        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                        self.incremental_vacuum = True
                 conn.execute("PRAGMA journal_mode=WAL")
                 conn.execute("PRAGMA synchronous=NORMAL")
                 conn.execute(
@@ -54,6 +489,8 @@ class RuntimeStore:
                     """
                     CREATE TABLE IF NOT EXISTS query_cache (
                         cache_key TEXT PRIMARY KEY,
+                        size_bytes INTEGER NOT NULL DEFAULT 0,
+                        payload_format TEXT NOT NULL DEFAULT 'json',
                         response_json TEXT NOT NULL,
                         created_at TEXT NOT NULL DEFAULT (datetime('now')),
                         updated_at TEXT NOT NULL DEFAULT (datetime('now')),
@@ -62,6 +499,38 @@ class RuntimeStore:
                     )
                     """
                 )
+                cache_columns = {
+                    row["name"] for row in conn.execute("PRAGMA table_info(query_cache)")
+                }
+                if "size_bytes" not in cache_columns:
+                    conn.execute(
+                        "ALTER TABLE query_cache ADD COLUMN size_bytes INTEGER NOT NULL DEFAULT 0"
+                    )
+                    conn.execute("UPDATE query_cache SET size_bytes = length(CAST(response_json AS BLOB))")
+                if "payload_format" not in cache_columns:
+                    conn.execute(
+                        "ALTER TABLE query_cache ADD COLUMN payload_format TEXT NOT NULL DEFAULT 'json'"
+                    )
+                # Covers recency-ordered eviction without touching the (large)
+                # response rows.
+                conn.execute(
+                    """
+                    CREATE INDEX IF NOT EXISTS idx_query_cache_recency
+                    ON query_cache(COALESCE(last_hit_at, updated_at), hit_count, size_bytes)
+                    """
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_query_cache_updated ON query_cache(updated_at)"
+                )
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS runtime_meta (
+                        name TEXT PRIMARY KEY,
+                        value TEXT NOT NULL,
+                        updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+                    )
+                    """
+                )
                 conn.execute(
                     """
                     CREATE TABLE IF NOT EXISTS query_events (
@@ -80,6 +549,45 @@ class RuntimeStore:
                     )
                     """
                 )
+                # Canonical request per query hash, so popular queries can be replayed.
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS query_requests (
+                        query_hash TEXT PRIMARY KEY,
+                        request_json TEXT NOT NULL,
+                        created_at TEXT NOT NULL DEFAULT (datetime('now')),
+                        last_seen_at TEXT NOT NULL DEFAULT (datetime('now'))
+                    )
+                    """
+                )
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS query_rollups (
+                        resolution TEXT NOT NULL,
+                        bucket_start TEXT NOT NULL,
+                        event_type TEXT NOT NULL,
+                        requests INTEGER NOT NULL DEFAULT 0,
+                        cache_hits INTEGER NOT NULL DEFAULT 0,
+                        errors INTEGER NOT NULL DEFAULT 0,
+                        duration_count INTEGER NOT NULL DEFAULT 0,
+                        duration_sum_ms INTEGER NOT NULL DEFAULT 0,
+                        duration_max_ms INTEGER NOT NULL DEFAULT 0,
+                        PRIMARY KEY (resolution, bucket_start, event_type)
+                    ) WITHOUT ROWID
+                    """
+                )
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS query_rollup_latency (
+                        resolution TEXT NOT NULL,
+                        bucket_start TEXT NOT NULL,
+                        event_type TEXT NOT NULL,
+                        bin INTEGER NOT NULL,
+                        count INTEGER NOT NULL DEFAULT 0,
+                        PRIMARY KEY (resolution, bucket_start, event_type, bin)
+                    ) WITHOUT ROWID
+                    """
+                )
                 conn.execute(
                     """
                     CREATE TABLE IF NOT EXISTS event_logs (
@@ -91,132 +599,920 @@ class RuntimeStore:
                     )
                     """
                 )
+                # Daily visit counts per route, kept after raw visits expire.
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS page_visit_rollups (
+                        day TEXT NOT NULL,
+                        route TEXT NOT NULL,
+                        visits INTEGER NOT NULL DEFAULT 0,
+                        PRIMARY KEY (day, route)
+                    ) WITHOUT ROWID
+                    """
+                )
+                # Entry and byte totals of query_cache, kept exact by triggers so
+                # size checks never scan the table (whichever process writes).
+                # Seeded once, in the same transaction that adds the triggers.
+                conn.commit()
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS query_cache_totals (
+                        id INTEGER PRIMARY KEY CHECK (id = 1),
+                        entries INTEGER NOT NULL,
+                        bytes INTEGER NOT NULL
+                    )
+                    """
+                )
+                if conn.execute("SELECT 1 FROM query_cache_totals WHERE id = 1").fetchone() is None:
+                    conn.execute(
+                        """
+                        INSERT INTO query_cache_totals (id, entries, bytes)
+                        SELECT 1, COUNT(1), COALESCE(SUM(size_bytes), 0) FROM query_cache
+                        """
+                    )
+                for trigger, body in CACHE_TOTALS_TRIGGERS.items():
+                    conn.execute(f"CREATE TRIGGER IF NOT EXISTS {trigger} {body}")
+                # Query events before this point were never rolled up; retention
+                # summarizes them before deleting.
+                conn.execute(
+                    """
+                    INSERT OR IGNORE INTO runtime_meta (name, value)
+                    VALUES ('rollups_since', COALESCE(
+                        (SELECT MIN(bucket_start) FROM query_rollups WHERE resolution = 'minute'),
+                        datetime('now')
+                    ))
+                    """
+                )
+                self._rollups_since = str(
+                    conn.execute(
+                        "SELECT value FROM runtime_meta WHERE name = 'rollups_since'"
+                    ).fetchone()[0]
+                )
                 conn.commit()
                 self._initialized = True
             finally:
                 conn.close()
 
-    def increment_counter(self, name: str, delta: int = 1) -> int:
-        self._ensure_initialized()
+    def _enqueue(self, op: Any) -> bool:
+        if self._closed:
+            return False
+        try:
+            self._pending.put_nowait(op)
+        except queue.Full:
+            with self._stats_lock:
+                self._dropped_writes += 1
+            return False
+        return True
+
+    def _adjust_unflushed_locked(self, name: str, delta: int) -> None:
+        value = self._unflushed_counters.get(name, 0) + delta
+        if value:
+            self._unflushed_counters[name] = value
+        else:
+            self._unflushed_counters.pop(name, None)
+
+    def _enqueue_write(
+        self,
+        sql: str | None,
+        params: tuple[Any, ...] | list[tuple[Any, ...]] = (),
+        counter: str | None = None,
+        delta: int = 1,
+    ) -> bool:
+        """Queue a statement and/or counter bump; both land or are dropped together.
+
+        A list of parameter tuples runs the statement with ``executemany``.
+        """
+        # Count it as pending first so the writer can never settle it before we do.
+        if counter is not None:
+            with self._stats_lock:
+                self._adjust_unflushed_locked(counter, delta)
+        if self._enqueue((sql, params, counter, delta)):
+            return True
+        if counter is not None:
+            with self._stats_lock:
+                self._adjust_unflushed_locked(counter, -delta)
+        return False
+
+    def _writer_loop(self) -> None:
         conn = self._connect()
+        next_eviction = time.monotonic()
+        next_gauges = time.monotonic() + CACHE_GAUGE_REFRESH_SECONDS
+        next_maintenance = time.monotonic()
+        next_checkpoint = time.monotonic() + self.wal_checkpoint_seconds
         try:
-            cur = conn.cursor()
-            cur.execute(
-                """
-                INSERT INTO runtime_counters (name, value, updated_at)
-                VALUES (?, ?, datetime('now'))
-                ON CONFLICT(name) DO UPDATE SET
-                    value = runtime_counters.value + excluded.value,
-                    updated_at = datetime('now')
-                """,
-                (name, delta),
-            )
-            cur.execute("SELECT value FROM runtime_counters WHERE name = ?", (name,))
-            row = cur.fetchone()
-            conn.commit()
-            return int(row["value"]) if row else 0
+            self._create_upcoming_partitions(conn)
+            stopping = False
+            while not stopping:
+                if time.monotonic() >= next_maintenance:
+                    self._maintain(conn)
+                    next_maintenance = time.monotonic() + self.maintenance_interval_seconds
+                    if self.wal_checkpoint_seconds:
+                        self._checkpoint_wal(conn, "TRUNCATE")
+                        next_checkpoint = time.monotonic() + self.wal_checkpoint_seconds
+                if self.wal_checkpoint_seconds and time.monotonic() >= next_checkpoint:
+                    self._checkpoint_wal(conn)
+                    next_checkpoint = time.monotonic() + self.wal_checkpoint_seconds
+                if self._eviction_enabled() and time.monotonic() >= next_eviction:
+                    self._evict(conn)
+                    next_eviction = time.monotonic() + self.eviction_interval_seconds
+                    next_gauges = 0.0
+                if time.monotonic() >= next_gauges:
+                    self._refresh_cache_gauges(conn)
+                    self._refresh_counter_cache(conn)
+                    self._create_upcoming_partitions(conn)
+                    next_gauges = time.monotonic() + CACHE_GAUGE_REFRESH_SECONDS
+                try:
+                    first = self._pending.get(timeout=self.flush_interval_seconds)
+                except queue.Empty:
+                    if self._pending_hits or self._pending_rollups:
+                        self._flush(conn, [])
+                    continue
+                batch = [first]
+                while len(batch) < self.max_batch_writes:
+                    try:
+                        batch.append(self._pending.get_nowait())
+                    except queue.Empty:
+                        break
+                if any(op is _STOP for op in batch):
+                    stopping = True
+                    batch = [op for op in batch if op is not _STOP]
+                    # Drain whatever was queued before close() so nothing is lost.
+                    while True:
+                        try:
+                            op = self._pending.get_nowait()
+                        except queue.Empty:
+                            break
+                        if op is not _STOP:
+                            batch.append(op)
+                if batch or self._pending_hits or self._pending_rollups:
+                    self._flush(conn, batch)
         finally:
             conn.close()
 
-    def get_counter(self, name: str) -> int:
-        self._ensure_initialized()
-        conn = self._connect()
+    def _flush(self, conn: sqlite3.Connection, batch: list[Any]) -> None:
+        counters: dict[str, int] = {}
+        refreshed: dict[str, int] = {}
+        with self._stats_lock:
+            hits, self._pending_hits = self._pending_hits, {}
+            rollups, self._pending_rollups = self._pending_rollups, {}
+            cached_counters = list(self._counter_cache)
+        # Every queued row was registered before it was queued, so the batch's
+        # partitions are all in here.
+        with self._partition_lock:
+            missing, self._missing_partitions = self._missing_partitions, {}
+        if hits:
+            counters["cache_hit_count"] = sum(count for count, _ in hits.values())
         try:
-            row = conn.execute(
-                "SELECT value FROM runtime_counters WHERE name = ?",
-                (name,),
-            ).fetchone()
-            return int(row["value"]) if row else 0
+            conn.execute("BEGIN IMMEDIATE")
+            for name, table in missing.items():
+                conn.execute(_partition_ddl(name, table))
+            if hits:
+                conn.executemany(
+                    """
+                    UPDATE query_cache
+                    SET hit_count = hit_count + ?, last_hit_at = ?
+                    WHERE cache_key = ?
+                    """,
+                    [(count, last_hit_at, key) for key, (count, last_hit_at) in hits.items()],
+                )
+            for sql, params, counter, delta in batch:
+                if isinstance(params, list):
+                    conn.executemany(sql, params)
+                elif sql is not None:
+                    conn.execute(sql, params)
+                if counter is not None:
+                    counters[counter] = counters.get(counter, 0) + delta
+            for name, delta in counters.items():
+                conn.execute(COUNTER_UPSERT_SQL, (name, delta))
+            if rollups:
+                self._write_rollups(conn, rollups)
+            if cached_counters and counters:
+                refreshed = self._read_counters(conn, cached_counters)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            logger.exception("Runtime store flush of %d writes failed", len(batch))
+            with self._stats_lock:
+                self._failed_batches += 1
+                self._dropped_writes += len(batch)
+        else:
+            with self._partition_lock:
+                self._partitions.update(missing)
+            with self._stats_lock:
+                self._flushed_batches += 1
+                self._flushed_writes += len(batch)
         finally:
-            conn.close()
+            # Read inside the transaction, so swapping the cached committed
+            # value and the pending delta together never counts a write twice.
+            with self._stats_lock:
+                self._counter_cache.update(refreshed)
+                for name, delta in counters.items():
+                    self._adjust_unflushed_locked(name, -delta)
 
-    def record_page_visit(self, route: str, client_ip: str | None, user_agent: str | None) -> int:
-        self._ensure_initialized()
-        conn = self._connect()
+    def _write_rollups(
+        self, conn: sqlite3.Connection, rollups: dict[tuple[str, str, str], list[Any]]
+    ) -> None:
+        """Add per-minute/per-hour query counts and latency bins, so stats never scan raw events."""
+        conn.executemany(
+            """
+            INSERT INTO query_rollups (
+                resolution, bucket_start, event_type, requests, cache_hits, errors,
+                duration_count, duration_sum_ms, duration_max_ms
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(resolution, bucket_start, event_type) DO UPDATE SET
+                requests = requests + excluded.requests,
+                cache_hits = cache_hits + excluded.cache_hits,
+                errors = errors + excluded.errors,
+                duration_count = duration_count + excluded.duration_count,
+                duration_sum_ms = duration_sum_ms + excluded.duration_sum_ms,
+                duration_max_ms = MAX(duration_max_ms, excluded.duration_max_ms)
+            """,
+            [(*key, *values[:6]) for key, values in rollups.items()],
+        )
+        conn.executemany(
+            """
+            INSERT INTO query_rollup_latency (resolution, bucket_start, event_type, bin, count)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(resolution, bucket_start, event_type, bin) DO UPDATE SET
+                count = count + excluded.count
+            """,
+            [
+                (*key, index, count)
+                for key, values in rollups.items()
+                for index, count in enumerate(values[6])
+                if count
+            ],
+        )
+
+    @staticmethod
+    def _read_counters(conn: sqlite3.Connection, names: list[str]) -> dict[str, int]:
+        placeholders = ",".join("?" for _ in names)
+        values = {name: 0 for name in names}
+        for row in conn.execute(
+            f"SELECT name, value FROM runtime_counters WHERE name IN ({placeholders})", names
+        ):
+            values[row["name"]] = int(row["value"])
+        return values
+
+    def _refresh_counter_cache(self, conn: sqlite3.Connection) -> None:
+        """Pick up increments committed by other processes sharing the file."""
+        with self._stats_lock:
+            names = list(self._counter_cache)
+        if not names:
+            return
         try:
-            conn.execute(
+            values = self._read_counters(conn, names)
+        except sqlite3.Error:
+            logger.exception("Runtime counter refresh failed")
+            return
+        with self._stats_lock:
+            self._counter_cache.update(values)
+
+    @staticmethod
+    def _cache_totals(conn: sqlite3.Connection) -> tuple[int, int]:
+        """``(entries, bytes)`` of query_cache from the trigger-maintained totals row."""
+        row = conn.execute("SELECT entries, bytes FROM query_cache_totals WHERE id = 1").fetchone()
+        return (int(row["entries"]), int(row["bytes"])) if row else (0, 0)
+
+    def _refresh_cache_gauges(self, conn: sqlite3.Connection) -> None:
+        try:
+            entries, total_bytes = self._cache_totals(conn)
+        except sqlite3.Error:
+            logger.exception("Runtime cache size refresh failed")
+            return
+        with self._stats_lock:
+            self._cache_gauges = {
+                "entries": entries,
+                "bytes": total_bytes,
+                "as_of": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            }
+
+    def _partition(self, table: str, timestamp: float) -> str:
+        """Name of the day partition for ``timestamp``; never runs DDL.
+
+        The writer creates each day's partitions a day ahead. One it has not
+        created yet is noted here and created by the writer in the same
+        transaction as the rows queued for it.
+        """
+        name = partition_name(table, timestamp)
+        if name not in self._partitions:
+            with self._partition_lock:
+                if name not in self._partitions:
+                    self._missing_partitions[name] = table
+        return name
+
+    def _create_upcoming_partitions(self, conn: sqlite3.Connection) -> None:
+        """Create today's and tomorrow's partitions before any request needs them."""
+        now = time.time()
+        self._create_partitions(
+            conn,
+            {
+                partition_name(table, timestamp): table
+                for table in RAW_TABLE_COLUMNS
+                for timestamp in (now, now + 86400)
+            },
+        )
+
+    def _create_partitions(self, conn: sqlite3.Connection, names: dict[str, str]) -> None:
+        """Create the partitions in ``{name: table}`` not known to exist; writer thread only."""
+        with self._partition_lock:
+            names = {name: table for name, table in names.items() if name not in self._partitions}
+        if not names:
+            return
+        try:
+            with conn:
+                for name, table in names.items():
+                    conn.execute(_partition_ddl(name, table))
+        except sqlite3.Error:
+            logger.exception("Creating telemetry partitions failed")
+            return
+        with self._partition_lock:
+            self._partitions.update(names)
+
+    def _list_partitions(self, conn: sqlite3.Connection, table: str) -> list[str]:
+        return [
+            row["name"]
+            for row in conn.execute(
                 """
-                INSERT INTO page_visits (route, client_ip, user_agent)
-                VALUES (?, ?, ?)
+                SELECT name FROM sqlite_master
+                WHERE type = 'table' AND name GLOB ?
+                ORDER BY name
                 """,
-                (route, client_ip, user_agent),
+                (f"{table}_d[0-9][0-9][0-9][0-9][0-9][0-9][0-9][0-9]",),
+            )
+        ]
+
+    def _raw_tables(self, conn: sqlite3.Connection, table: str, since: float) -> list[str]:
+        """The unpartitioned table plus every partition that can hold rows newer than ``since``."""
+        first = partition_name(table, since)
+        return [table] + [name for name in self._list_partitions(conn, table) if name >= first]
+
+    def _maintain(self, conn: sqlite3.Connection, max_batches: int = 50) -> None:
+        """Apply retention to raw telemetry and prune minute rollups.
+
+        Day partitions older than ``retention_days`` (0 keeps everything) are
+        removed with one DROP TABLE each; their visits are first added to the
+        daily per-route counts in ``page_visit_rollups``. Expired rows of the
+        unpartitioned tables are drained in small batches.
+        """
+        dropped = drained = backfilled = pruned = visits = 0
+        try:
+            now = time.time()
+            if self.retention_days:
+                cutoff = now - self.retention_days * 86400
+                keep_from = partition_name("", cutoff)
+                for table in RAW_TABLE_COLUMNS:
+                    for name in self._list_partitions(conn, table):
+                        if name[len(table):] < keep_from:
+                            with conn:
+                                # Query events were rolled up when written; visits are
+                                # summarized now, in the transaction that drops them.
+                                if table == "page_visits":
+                                    visits += self._roll_up_visits(conn, name)
+                                conn.execute(f"DROP TABLE IF EXISTS {name}")
+                            with self._partition_lock:
+                                self._partitions.discard(name)
+                            dropped += 1
+                batch_size = self.eviction_batch_size * 5
+                for table in RAW_TABLE_COLUMNS:
+                    for _ in range(max_batches):
+                        count, summarized = self._drain_legacy(
+                            conn, table, _sql_time(cutoff), batch_size
+                        )
+                        drained += count
+                        if table == "page_visits":
+                            visits += summarized
+                        else:
+                            backfilled += summarized
+                        if count < batch_size:
+                            break
+            with conn:
+                for table in ("query_rollups", "query_rollup_latency"):
+                    cur = conn.execute(
+                        f"DELETE FROM {table} WHERE resolution = 'minute' AND bucket_start < ?",
+                        (_sql_time(now - MINUTE_ROLLUP_RETENTION_SECONDS),),
+                    )
+                    pruned += max(cur.rowcount, 0)
+            if dropped or drained or pruned:
+                conn.execute("PRAGMA incremental_vacuum").fetchall()
+        except sqlite3.Error:
+            logger.exception("Runtime telemetry maintenance failed")
+        with self._stats_lock:
+            self._retention["dropped_partitions"] += dropped
+            self._retention["drained_rows"] += drained
+            self._retention["backfilled_rows"] += backfilled
+            self._retention["rolled_up_visits"] += visits
+            self._retention["pruned_rollups"] += pruned
+            self._retention["last_maintenance_at"] = time.strftime(
+                "%Y-%m-%dT%H:%M:%SZ", time.gmtime()
             )
+        if dropped or drained:
+            logger.info(
+                "Telemetry retention dropped %d partitions and %d legacy rows", dropped, drained
+            )
+
+    def _drain_legacy(
+        self, conn: sqlite3.Connection, table: str, cutoff: str, batch_size: int
+    ) -> tuple[int, int]:
+        """Delete the oldest expired rows of an unpartitioned table; returns (deleted, rolled up).
+
+        Rows are append-only, so walking the rowid from the start finds the
+        expired ones without an index on ``created_at``.
+        """
+        columns = "id, created_at"
+        if table == "query_events":
+            columns += ", event_type, cache_hit, success, duration_ms"
+        rows = conn.execute(
+            f"SELECT {columns} FROM {table} ORDER BY id LIMIT ?", (batch_size,)
+        ).fetchall()
+        expired = []
+        for row in rows:
+            if str(row["created_at"]) >= cutoff:
+                break
+            expired.append(row)
+        if not expired:
+            return 0, 0
+        if table == "page_visits":
+            with conn:
+                visits = self._roll_up_visits(
+                    conn, table, "id BETWEEN ? AND ?", (expired[0]["id"], expired[-1]["id"])
+                )
+                conn.execute(
+                    f"DELETE FROM {table} WHERE id BETWEEN ? AND ?",
+                    (expired[0]["id"], expired[-1]["id"]),
+                )
+            return len(expired), visits
+        rollups: dict[tuple[str, str, str], list[Any]] = {}
+        if table == "query_events" and self._rollups_since:
+            for row in expired:
+                created_at = str(row["created_at"])
+                if created_at >= self._rollups_since:
+                    continue
+                # Old enough that only the hourly rollup is kept.
+                _add_to_rollups(
+                    rollups,
+                    "hour",
+                    created_at[:14] + "00:00",
+                    str(row["event_type"]),
+                    bool(row["cache_hit"]),
+                    bool(row["success"]),
+                    row["duration_ms"],
+                )
+        with conn:
+            if rollups:
+                self._write_rollups(conn, rollups)
             conn.execute(
-                """
-                INSERT INTO runtime_counters (name, value, updated_at)
-                VALUES ('visit_count', 1, datetime('now'))
-                ON CONFLICT(name) DO UPDATE SET
-                    value = runtime_counters.value + 1,
-                    updated_at = datetime('now')
-                """
+                f"DELETE FROM {table} WHERE id BETWEEN ? AND ?",
+                (expired[0]["id"], expired[-1]["id"]),
             )
-            row = conn.execute(
-                "SELECT value FROM runtime_counters WHERE name = 'visit_count'"
-            ).fetchone()
-            conn.commit()
-            return int(row["value"]) if row else 0
+        return len(expired), sum(values[0] for values in rollups.values())
+
+    @staticmethod
+    def _roll_up_visits(
+        conn: sqlite3.Connection, table: str, where: str = "1", params: tuple[Any, ...] = ()
+    ) -> int:
+        """Add ``table``'s visits (matching ``where``) to the daily per-route counts; returns how many."""
+        rows = conn.execute(
+            f"""
+            SELECT substr(created_at, 1, 10) AS day, route, COUNT(1) AS visits
+            FROM {table} WHERE {where}
+            GROUP BY 1, 2
+            """,
+            params,
+        ).fetchall()
+        conn.executemany(
+            """
+            INSERT INTO page_visit_rollups (day, route, visits) VALUES (?, ?, ?)
+            ON CONFLICT(day, route) DO UPDATE SET visits = visits + excluded.visits
+            """,
+            [(row["day"], row["route"], row["visits"]) for row in rows],
+        )
+        return sum(int(row["visits"]) for row in rows)
+
+    def _checkpoint_wal(self, conn: sqlite3.Connection, mode: str = "PASSIVE") -> None:
+        """Run with ``wal_checkpoint_seconds`` set, in place of SQLite's automatic checkpoints."""
+        try:
+            conn.execute("PRAGMA busy_timeout=1000")
+            busy, log, checkpointed = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+        except sqlite3.Error:
+            logger.exception("WAL checkpoint failed")
+            return
         finally:
-            conn.close()
+            conn.execute("PRAGMA busy_timeout=30000")
+        with self._stats_lock:
+            self._checkpoint = {
+                "last_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "mode": mode,
+                "busy": int(busy),
+                "log": int(log),
+                "checkpointed": int(checkpointed),
+            }
 
-    def cache_get(self, cache_key: str) -> dict[str, Any] | None:
+    def _eviction_enabled(self) -> bool:
+        return bool(
+            self.cache_ttl_seconds
+            or self.cache_max_entries
+            or self.cache_max_bytes
+            or self._stale_pending
+        )
+
+    def _load_namespaces(self) -> None:
+        rows = self._conn().execute(
+            "SELECT name, value FROM runtime_meta WHERE name LIKE 'cache_namespace:%'"
+        ).fetchall()
+        with self._stats_lock:
+            for row in rows:
+                self._namespaces[row["name"].split(":", 1)[1]] = str(row["value"])
+            # Leftovers from a namespace switch before the last shutdown.
+            self._stale_pending = bool(self._namespaces)
+
+    def _is_stale_key(self, cache_key: str) -> bool:
+        with self._stats_lock:
+            namespaces = list(self._namespaces.items())
+        for family, namespace in namespaces:
+            if cache_key.startswith(family):
+                return not cache_key.startswith(namespace)
+        return False
+
+    def cache_namespace(self, family: str) -> str | None:
+        with self._stats_lock:
+            return self._namespaces.get(family)
+
+    def set_cache_namespace(self, family: str, namespace: str) -> bool:
+        """Make ``namespace`` the only live prefix of keys starting with ``family``.
+
+        Returns True if the namespace changed. Older entries of the family stop
+        being served at once; their rows are removed by the eviction pass.
+        """
+        if not namespace.startswith(family) or namespace == family:
+            raise ValueError("Cache namespace must extend its key family")
         self._ensure_initialized()
-        conn = self._connect()
-        try:
-            row = conn.execute(
-                "SELECT response_json FROM query_cache WHERE cache_key = ?",
-                (cache_key,),
-            ).fetchone()
-            if row is None:
-                return None
+        with self._stats_lock:
+            if self._namespaces.get(family) == namespace:
+                return False
+        conn = self._conn()
+        with conn:
             conn.execute(
                 """
-                UPDATE query_cache
-                SET hit_count = hit_count + 1, last_hit_at = datetime('now')
-                WHERE cache_key = ?
-                """,
-                (cache_key,),
-            )
-            conn.execute(
-                """
-                INSERT INTO runtime_counters (name, value, updated_at)
-                VALUES ('cache_hit_count', 1, datetime('now'))
+                INSERT INTO runtime_meta (name, value, updated_at)
+                VALUES (?, ?, datetime('now'))
                 ON CONFLICT(name) DO UPDATE SET
-                    value = runtime_counters.value + 1,
+                    value = excluded.value,
                     updated_at = datetime('now')
-                """
+                """,
+                (f"cache_namespace:{family}", namespace),
             )
-            conn.commit()
-            return json.loads(str(row["response_json"]))
-        finally:
-            conn.close()
+        with self._stats_lock:
+            self._namespaces[family] = namespace
+            self._stale_pending = True
+        self._memory.discard_matching(
+            lambda key: key.startswith(family) and not key.startswith(namespace)
+        )
+        logger.info("Cache namespace for %s switched to %s", family, namespace)
+        return True
+
+    def _delete_cache_keys(self, conn: sqlite3.Connection, keys: list[str]) -> int:
+        if not keys:
+            return 0
+        self._memory.discard(keys)
+        placeholders = ",".join("?" for _ in keys)
+        with conn:
+            cur = conn.execute(
+                f"DELETE FROM query_cache WHERE cache_key IN ({placeholders})", keys
+            )
+        return max(cur.rowcount, 0)
+
+    def _evict(self, conn: sqlite3.Connection, max_batches: int = 50) -> dict[str, int]:
+        """Delete expired, stale-namespace and over-limit cache rows in small transactions.
+
+        Size limits evict least recently used rows first; 0 disables a limit.
+
+        At most ``max_batches`` batches run per pass so queued telemetry is
+        never held up for long; anything left is picked up next interval.
+        """
+        evicted = {reason: 0 for reason in EVICTION_REASONS}
+        batches = 0
+        try:
+            if self._stale_pending:
+                with self._stats_lock:
+                    namespaces = list(self._namespaces.items())
+                stale_left = False
+                for family, namespace in namespaces:
+                    # Two primary-key range scans: [family, namespace) and past the namespace.
+                    ranges = (
+                        (family, namespace),
+                        (prefix_upper_bound(namespace), prefix_upper_bound(family)),
+                    )
+                    for low, high in ranges:
+                        while batches < max_batches:
+                            keys = [
+                                row["cache_key"]
+                                for row in conn.execute(
+                                    """
+                                    SELECT cache_key FROM query_cache
+                                    WHERE cache_key >= ? AND cache_key < ?
+                                    LIMIT ?
+                                    """,
+                                    (low, high, self.eviction_batch_size),
+                                )
+                            ]
+                            batches += 1
+                            evicted["stale"] += self._delete_cache_keys(conn, keys)
+                            if len(keys) < self.eviction_batch_size:
+                                break
+                        else:
+                            stale_left = True
+                if not stale_left:
+                    with self._stats_lock:
+                        if self._namespaces == dict(namespaces):
+                            self._stale_pending = False
+
+            if self.cache_ttl_seconds:
+                cutoff = f"-{self.cache_ttl_seconds} seconds"
+                while batches < max_batches:
+                    keys = [
+                        row["cache_key"]
+                        for row in conn.execute(
+                            """
+                            SELECT cache_key FROM query_cache
+                            WHERE updated_at < datetime('now', ?)
+                            LIMIT ?
+                            """,
+                            (cutoff, self.eviction_batch_size),
+                        )
+                    ]
+                    batches += 1
+                    evicted["ttl"] += self._delete_cache_keys(conn, keys)
+                    if len(keys) < self.eviction_batch_size:
+                        break
+
+            if self.cache_max_entries:
+                while batches < max_batches:
+                    excess = self._cache_totals(conn)[0] - self.cache_max_entries
+                    if excess <= 0:
+                        break
+                    keys = [
+                        row["cache_key"]
+                        for row in conn.execute(
+                            """
+                            SELECT cache_key FROM query_cache
+                            ORDER BY COALESCE(last_hit_at, updated_at), hit_count
+                            LIMIT ?
+                            """,
+                            (min(excess, self.eviction_batch_size),),
+                        )
+                    ]
+                    batches += 1
+                    evicted["entries"] += self._delete_cache_keys(conn, keys)
+
+            if self.cache_max_bytes:
+                while batches < max_batches:
+                    excess = self._cache_totals(conn)[1] - self.cache_max_bytes
+                    if excess <= 0:
+                        break
+                    keys = []
+                    freed = 0
+                    for row in conn.execute(
+                        """
+                        SELECT cache_key, size_bytes FROM query_cache
+                        ORDER BY COALESCE(last_hit_at, updated_at), hit_count
+                        LIMIT ?
+                        """,
+                        (self.eviction_batch_size,),
+                    ):
+                        keys.append(row["cache_key"])
+                        freed += int(row["size_bytes"])
+                        if freed >= excess:
+                            break
+                    batches += 1
+                    evicted["bytes"] += self._delete_cache_keys(conn, keys)
+
+            vacuumed = 0
+            if any(evicted.values()):
+                free_pages = int(conn.execute("PRAGMA freelist_count").fetchone()[0])
+                if free_pages:
+                    conn.execute("PRAGMA incremental_vacuum").fetchall()
+                    vacuumed = free_pages - int(conn.execute("PRAGMA freelist_count").fetchone()[0])
+                with conn:
+                    for reason, count in evicted.items():
+                        if count:
+                            conn.execute(COUNTER_UPSERT_SQL, (f"cache_evicted_{reason}", count))
+        except sqlite3.Error:
+            logger.exception("Runtime cache eviction failed")
+            return evicted
+
+        with self._stats_lock:
+            for reason, count in evicted.items():
+                self._evicted[reason] += count
+            self._vacuumed_pages += vacuumed
+            self._last_eviction_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        return evicted
+
+    def close(self) -> None:
+        """Flush queued writes and close all connections."""
+        if self._closed:
+            return
+        self._closed = True
+        self._pending.put(_STOP)
+        self._writer.join()
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def increment_counter(self, name: str, delta: int = 1) -> int:
+        self._ensure_initialized()
+        self._enqueue_write(None, counter=name, delta=delta)
+        return self.get_counter(name)
+
+    def get_counter(self, name: str) -> int:
+        """Committed value plus this process's increments still in the queue.
+
+        After the first read the committed value comes from memory: the writer
+        refreshes it with every flush and every few seconds (for increments
+        from other processes), so hot counters cost no SQLite access.
+        """
+        self._ensure_initialized()
+        with self._stats_lock:
+            if name in self._counter_cache:
+                return self._counter_cache[name] + self._unflushed_counters.get(name, 0)
+        row = self._conn().execute(
+            "SELECT value FROM runtime_counters WHERE name = ?",
+            (name,),
+        ).fetchone()
+        with self._stats_lock:
+            committed = self._counter_cache.setdefault(name, int(row["value"]) if row else 0)
+            return committed + self._unflushed_counters.get(name, 0)
+
+    def record_page_visit(self, route: str, client_ip: str | None, user_agent: str | None) -> int:
+        """Queue the visit and return the visit count without touching SQLite."""
+        self._ensure_initialized()
+        now = time.time()
+        self._enqueue_write(
+            f"""
+            INSERT INTO {self._partition("page_visits", now)} (route, client_ip, user_agent, created_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            (route, client_ip, user_agent, _sql_time(now)),
+            counter="visit_count",
+        )
+        return self.get_counter("visit_count")
+
+    def _record_hit(self, cache_key: str) -> None:
+        now = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+        with self._stats_lock:
+            entry = self._pending_hits.get(cache_key)
+            if entry is None:
+                self._pending_hits[cache_key] = [1, now]
+            else:
+                entry[0] += 1
+                entry[1] = now
+            self._adjust_unflushed_locked("cache_hit_count", 1)
+
+    def cache_get_stored(self, cache_key: str) -> tuple[str, bytes] | None:
+        """Return ``(payload_format, payload)`` as stored, or None on a miss."""
+        return self.cache_get_many_stored([cache_key]).get(cache_key)
+
+    def cache_get_many_stored(self, cache_keys: list[str]) -> dict[str, tuple[str, bytes]]:
+        """Return ``{key: (payload_format, payload)}`` for the keys that hit.
+
+        Memory hits are served first; the rest are read with one ``IN (...)``
+        query per chunk of keys. Missing keys are simply absent.
+        """
+        self._ensure_initialized()
+        found: dict[str, tuple[str, bytes]] = {}
+        missing: list[str] = []
+        for cache_key in dict.fromkeys(cache_keys):
+            if self._is_stale_key(cache_key):
+                continue
+            entry = self._memory.get(cache_key)
+            if entry is None:
+                missing.append(cache_key)
+            else:
+                found[cache_key] = entry
+        conn = self._conn()
+        for start in range(0, len(missing), CACHE_BATCH_KEYS):
+            chunk = missing[start : start + CACHE_BATCH_KEYS]
+            placeholders = ",".join("?" for _ in chunk)
+            if self.cache_ttl_seconds:
+                rows = conn.execute(
+                    f"""
+                    SELECT cache_key, payload_format, response_json,
+                           CAST(strftime('%s', updated_at) AS INTEGER) AS updated
+                    FROM query_cache
+                    WHERE cache_key IN ({placeholders}) AND updated_at >= datetime('now', ?)
+                    """,
+                    (*chunk, f"-{self.cache_ttl_seconds} seconds"),
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    f"""
+                    SELECT cache_key, payload_format, response_json, NULL AS updated
+                    FROM query_cache WHERE cache_key IN ({placeholders})
+                    """,
+                    chunk,
+                ).fetchall()
+            for row in rows:
+                stored = row["response_json"]
+                payload = stored if isinstance(stored, bytes) else str(stored).encode("utf-8")
+                entry = (str(row["payload_format"]), payload)
+                expires_at = (
+                    float(row["updated"]) + self.cache_ttl_seconds
+                    if row["updated"] is not None
+                    else None
+                )
+                self._memory.put(row["cache_key"], entry[1], entry[0], expires_at)
+                found[row["cache_key"]] = entry
+        for cache_key in found:
+            self._record_hit(cache_key)
+        return found
+
+    def cache_contains(self, cache_key: str) -> bool:
+        """Whether a live entry exists, without counting a hit."""
+        self._ensure_initialized()
+        if self._is_stale_key(cache_key):
+            return False
+        if self.cache_ttl_seconds:
+            row = self._conn().execute(
+                """
+                SELECT 1 FROM query_cache
+                WHERE cache_key = ? AND updated_at >= datetime('now', ?)
+                """,
+                (cache_key, f"-{self.cache_ttl_seconds} seconds"),
+            ).fetchone()
+        else:
+            row = self._conn().execute(
+                "SELECT 1 FROM query_cache WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+        return row is not None
+
+    def decoded_payload(self, cache_key: str, payload_format: str, payload: bytes) -> bytes:
+        """Decode a payload returned by ``cache_get_many_stored``, at most once per memory entry."""
+        return self._memory.decoded(cache_key, payload_format, payload)
+
+    def cache_get_many_raw(self, cache_keys: list[str]) -> dict[str, bytes]:
+        """Return ``{key: serialized JSON}`` for the keys that hit."""
+        return {
+            cache_key: self.decoded_payload(cache_key, payload_format, payload)
+            for cache_key, (payload_format, payload) in self.cache_get_many_stored(cache_keys).items()
+        }
+
+    def cache_get_raw(self, cache_key: str) -> bytes | None:
+        """Return the cached response as serialized JSON bytes, or None on a miss."""
+        return self.cache_get_many_raw([cache_key]).get(cache_key)
+
+    def cache_get(self, cache_key: str) -> dict[str, Any] | None:
+        payload = self.cache_get_raw(cache_key)
+        return json.loads(payload) if payload is not None else None
 
     def cache_put(self, cache_key: str, response_data: dict[str, Any]) -> None:
+        raw = json.dumps(response_data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.cache_put_raw(cache_key, raw)
+
+    def cache_put_raw(self, cache_key: str, raw: bytes) -> None:
+        """Store an already serialized JSON response; keys of a superseded namespace are ignored."""
+        self.cache_put_many_raw([(cache_key, raw)])
+
+    def cache_put_many_raw(self, items: list[tuple[str, bytes]]) -> int:
+        """Store several serialized responses with one ``executemany``; returns how many were stored."""
         self._ensure_initialized()
-        conn = self._connect()
-        try:
-            payload = json.dumps(response_data, ensure_ascii=False, separators=(",", ":"))
-            conn.execute(
+        rows = []
+        for cache_key, raw in dict(items).items():
+            if self._is_stale_key(cache_key):
+                continue
+            payload = encode_payload(raw, self.payload_format)
+            # Uncompressed rows stay TEXT so older readers of the file still work.
+            stored: bytes | str = (
+                payload.decode("utf-8") if self.payload_format == "json" else payload
+            )
+            rows.append((cache_key, len(payload), self.payload_format, stored, payload, raw))
+        if not rows:
+            return 0
+        conn = self._conn()
+        with conn:
+            conn.executemany(
                 """
-                INSERT INTO query_cache (cache_key, response_json, created_at, updated_at)
-                VALUES (?, ?, datetime('now'), datetime('now'))
+                INSERT INTO query_cache (
+                    cache_key, size_bytes, payload_format, response_json, created_at, updated_at
+                )
+                VALUES (?, ?, ?, ?, datetime('now'), datetime('now'))
                 ON CONFLICT(cache_key) DO UPDATE SET
+                    size_bytes = excluded.size_bytes,
+                    payload_format = excluded.payload_format,
                     response_json = excluded.response_json,
                     updated_at = datetime('now')
                 """,
-                (cache_key, payload),
+                [row[:4] for row in rows],
             )
-            conn.execute(
-                """
-                INSERT INTO runtime_counters (name, value, updated_at)
-                VALUES ('cache_write_count', 1, datetime('now'))
-                ON CONFLICT(name) DO UPDATE SET
-                    value = runtime_counters.value + 1,
-                    updated_at = datetime('now')
-                """
-            )
-            conn.commit()
-        finally:
-            conn.close()
+        expires_at = time.time() + self.cache_ttl_seconds if self.cache_ttl_seconds else None
+        for cache_key, _, payload_format, _, payload, raw in rows:
+            self._memory.put(cache_key, payload, payload_format, expires_at, decoded=raw)
+        self._enqueue_write(None, counter="cache_write_count", delta=len(rows))
+        return len(rows)
 
     def record_query_event(
         self,
@@ -232,85 +1528,371 @@ class RuntimeStore:
         error_message: str | None,
         extra: dict[str, Any] | None,
     ) -> None:
+        self.record_query_events(
+            [
+                {
+                    "event_type": event_type,
+                    "query_hash": query_hash,
+                    "left_count": left_count,
+                    "right_count": right_count,
+                    "total_pairs": total_pairs,
+                    "cache_hit": cache_hit,
+                    "success": success,
+                    "duration_ms": duration_ms,
+                    "error_message": error_message,
+                    "extra": extra,
+                }
+            ]
+        )
+
+    def record_query_events(self, events: list[dict[str, Any]]) -> bool:
+        """Queue several query events as one ``executemany``; all land or are dropped together.
+
+        Each event carries the keyword arguments of ``record_query_event``.
+        """
+        if not events:
+            return True
         self._ensure_initialized()
-        conn = self._connect()
-        try:
-            conn.execute(
-                """
-                INSERT INTO query_events (
+        now = time.time()
+        created_at = _sql_time(now)
+        rows = [
+            (
+                event["event_type"],
+                event["query_hash"],
+                int(event["left_count"]),
+                int(event["right_count"]),
+                int(event["total_pairs"]),
+                1 if event["cache_hit"] else 0,
+                1 if event["success"] else 0,
+                int(event["duration_ms"]) if event["duration_ms"] is not None else None,
+                event["error_message"],
+                json.dumps(event["extra"] or {}, ensure_ascii=False, separators=(",", ":")),
+                created_at,
+            )
+            for event in events
+        ]
+        queued = self._enqueue_write(
+            f"""
+            INSERT INTO {self._partition("query_events", now)} (
+                event_type,
+                query_hash,
+                left_count,
+                right_count,
+                total_pairs,
+                cache_hit,
+                success,
+                duration_ms,
+                error_message,
+                extra_json,
+                created_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+            counter="query_event_count",
+            delta=len(rows),
+        )
+        if queued:
+            for event in events:
+                self._add_rollup(
+                    now,
+                    event["event_type"],
+                    event["cache_hit"],
+                    event["success"],
+                    event["duration_ms"],
+                )
+        return queued
+
+    def _add_rollup(
+        self,
+        timestamp: float,
+        event_type: str,
+        cache_hit: bool,
+        success: bool,
+        duration_ms: int | None,
+    ) -> None:
+        with self._stats_lock:
+            for resolution, seconds in ROLLUP_RESOLUTIONS.items():
+                _add_to_rollups(
+                    self._pending_rollups,
+                    resolution,
+                    _bucket_start(timestamp, seconds),
                     event_type,
-                    query_hash,
-                    left_count,
-                    right_count,
-                    total_pairs,
                     cache_hit,
                     success,
                     duration_ms,
-                    error_message,
-                    extra_json
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    event_type,
+                )
+
+    def remember_query_request(self, query_hash: str, request: dict[str, Any]) -> None:
+        """Keep the canonical request behind ``query_hash`` for later replay (queued)."""
+        self._ensure_initialized()
+        self._enqueue_write(
+            """
+            INSERT INTO query_requests (query_hash, request_json)
+            VALUES (?, ?)
+            ON CONFLICT(query_hash) DO UPDATE SET last_seen_at = datetime('now')
+            """,
+            (
+                query_hash,
+                json.dumps(request, ensure_ascii=False, sort_keys=True, separators=(",", ":")),
+            ),
+        )
+
+    def top_query_requests(
+        self, event_type: str, limit: int, window_days: int
+    ) -> list[dict[str, Any]]:
+        """Rank remembered requests by lookups in the window times their cold (miss) cost."""
+        self._ensure_initialized()
+        conn = self._conn()
+        window_days = max(1, window_days)
+        since = _sql_time(time.time() - window_days * 86400)
+        tables = self._raw_tables(conn, "query_events", time.time() - window_days * 86400)
+        events = " UNION ALL ".join(
+            f"""
+                SELECT query_hash, cache_hit, duration_ms FROM {table}
+                WHERE event_type = ? AND success = 1 AND query_hash IS NOT NULL
+                  AND created_at >= ?
+            """
+            for table in tables
+        )
+        rows = conn.execute(
+            f"""
+            SELECT r.query_hash, r.request_json, e.lookups, e.miss_ms, e.avg_ms
+            FROM (
+                SELECT
                     query_hash,
-                    int(left_count),
-                    int(right_count),
-                    int(total_pairs),
-                    1 if cache_hit else 0,
-                    1 if success else 0,
-                    int(duration_ms) if duration_ms is not None else None,
-                    error_message,
-                    json.dumps(extra or {}, ensure_ascii=False, separators=(",", ":")),
-                ),
-            )
-            conn.execute(
-                """
-                INSERT INTO runtime_counters (name, value, updated_at)
-                VALUES ('query_event_count', 1, datetime('now'))
-                ON CONFLICT(name) DO UPDATE SET
-                    value = runtime_counters.value + 1,
-                    updated_at = datetime('now')
-                """
-            )
-            conn.commit()
-        finally:
-            conn.close()
+                    COUNT(1) AS lookups,
+                    AVG(CASE WHEN cache_hit = 0 THEN duration_ms END) AS miss_ms,
+                    AVG(duration_ms) AS avg_ms
+                FROM ({events})
+                GROUP BY query_hash
+            ) e
+            JOIN query_requests r ON r.query_hash = e.query_hash
+            ORDER BY e.lookups * MAX(1, COALESCE(e.miss_ms, e.avg_ms, 1)) DESC
+            LIMIT ?
+            """,
+            (*[value for _ in tables for value in (event_type, since)], max(0, limit)),
+        ).fetchall()
+        return [
+            {
+                "query_hash": row["query_hash"],
+                "request": json.loads(row["request_json"]),
+                "lookups": int(row["lookups"]),
+                "miss_ms": float(row["miss_ms"]) if row["miss_ms"] is not None else None,
+                "avg_ms": float(row["avg_ms"]) if row["avg_ms"] is not None else None,
+            }
+            for row in rows
+        ]
 
     def log_event(self, level: str, message: str, detail: dict[str, Any] | None = None) -> None:
         self._ensure_initialized()
-        conn = self._connect()
-        try:
-            conn.execute(
-                """
-                INSERT INTO event_logs (level, message, detail_json)
-                VALUES (?, ?, ?)
-                """,
-                (
-                    level.upper(),
-                    message,
-                    json.dumps(detail or {}, ensure_ascii=False, separators=(",", ":")),
-                ),
-            )
-            conn.commit()
-        finally:
-            conn.close()
+        self._enqueue_write(
+            """
+            INSERT INTO event_logs (level, message, detail_json)
+            VALUES (?, ?, ?)
+            """,
+            (
+                level.upper(),
+                message,
+                json.dumps(detail or {}, ensure_ascii=False, separators=(",", ":")),
+            ),
+        )
 
-    def stats(self) -> dict[str, Any]:
+    def writer_stats(self) -> dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "pending": self._pending.qsize(),
+                "dropped": self._dropped_writes,
+                "flushed_batches": self._flushed_batches,
+                "flushed_writes": self._flushed_writes,
+                "failed_batches": self._failed_batches,
+            }
+
+    def retention_stats(self) -> dict[str, Any]:
+        conn = self._conn()
+        partitions = {table: len(self._list_partitions(conn, table)) for table in RAW_TABLE_COLUMNS}
+        with self._stats_lock:
+            return {
+                "retention_days": self.retention_days,
+                "partitions": partitions,
+                **self._retention,
+                "rollups_since": self._rollups_since,
+                "wal_checkpoint_seconds": self.wal_checkpoint_seconds,
+                "last_checkpoint": dict(self._checkpoint),
+            }
+
+    def cache_policy_stats(self) -> dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "bytes": self._cache_gauges["bytes"],
+                "size_as_of": self._cache_gauges["as_of"],
+                "payload_format": self.payload_format,
+                "ttl_seconds": self.cache_ttl_seconds,
+                "max_entries": self.cache_max_entries,
+                "max_bytes": self.cache_max_bytes,
+                "namespaces": dict(self._namespaces),
+                "evicted": dict(self._evicted),
+                "auto_vacuum": "incremental" if self.incremental_vacuum else "none",
+                "vacuumed_pages": self._vacuumed_pages,
+                "last_eviction_at": self._last_eviction_at,
+            }
+
+    def rollup_stats(self, window: str) -> dict[str, Any]:
+        """Aggregate query rollups over one of ``STATS_WINDOWS``.
+
+        Reads at most one row per bucket and event type (plus histogram bins),
+        however many events the window holds. Events still queued for the
+        writer are not included yet.
+        """
+        if window not in STATS_WINDOWS:
+            raise ValueError(f"Unknown stats window: {window}")
+        seconds, resolution = STATS_WINDOWS[window]
         self._ensure_initialized()
-        conn = self._connect()
-        try:
-            counters = {
-                row["name"]: int(row["value"])
-                for row in conn.execute("SELECT name, value FROM runtime_counters")
+        conn = self._conn()
+        since = _bucket_start(time.time() - seconds, ROLLUP_RESOLUTIONS[resolution])
+        by_type: dict[str, dict[str, Any]] = {}
+        for row in conn.execute(
+            """
+            SELECT event_type, SUM(requests) AS requests, SUM(cache_hits) AS cache_hits,
+                   SUM(errors) AS errors, SUM(duration_count) AS duration_count,
+                   SUM(duration_sum_ms) AS duration_sum_ms, MAX(duration_max_ms) AS duration_max_ms
+            FROM query_rollups
+            WHERE resolution = ? AND bucket_start >= ?
+            GROUP BY event_type
+            """,
+            (resolution, since),
+        ):
+            by_type[row["event_type"]] = {
+                "requests": int(row["requests"]),
+                "cache_hits": int(row["cache_hits"]),
+                "errors": int(row["errors"]),
+                "duration_count": int(row["duration_count"]),
+                "duration_sum_ms": int(row["duration_sum_ms"]),
+                "duration_max_ms": int(row["duration_max_ms"]),
+                "histogram": [0] * (len(LATENCY_BUCKETS_MS) + 1),
             }
-            cache_size = conn.execute("SELECT COUNT(1) AS c FROM query_cache").fetchone()
-            query_events = conn.execute("SELECT COUNT(1) AS c FROM query_events").fetchone()
-            page_visits = conn.execute("SELECT COUNT(1) AS c FROM page_visits").fetchone()
+        for row in conn.execute(
+            """
+            SELECT event_type, bin, SUM(count) AS count
+            FROM query_rollup_latency
+            WHERE resolution = ? AND bucket_start >= ?
+            GROUP BY event_type, bin
+            """,
+            (resolution, since),
+        ):
+            entry = by_type.get(row["event_type"])
+            if entry is not None and 0 <= int(row["bin"]) < len(entry["histogram"]):
+                entry["histogram"][int(row["bin"])] = int(row["count"])
+
+        def summarize(entry: dict[str, Any]) -> dict[str, Any]:
+            requests = entry["requests"]
+            count = entry["duration_count"]
+            histogram = entry["histogram"]
             return {
-                "counters": counters,
-                "cache_entries": int(cache_size["c"]) if cache_size else 0,
-                "query_events": int(query_events["c"]) if query_events else 0,
-                "page_visits": int(page_visits["c"]) if page_visits else 0,
+                "requests": requests,
+                "cache_hits": entry["cache_hits"],
+                "cache_hit_ratio": entry["cache_hits"] / requests if requests else None,
+                "errors": entry["errors"],
+                "error_ratio": entry["errors"] / requests if requests else None,
+                "duration_ms": {
+                    "count": count,
+                    "avg": entry["duration_sum_ms"] / count if count else None,
+                    "max": entry["duration_max_ms"] if count else None,
+                    **{
+                        name: min(value, entry["duration_max_ms"]) if value is not None else None
+                        for name, value in (
+                            ("p50", histogram_percentile(histogram, 0.50)),
+                            ("p95", histogram_percentile(histogram, 0.95)),
+                            ("p99", histogram_percentile(histogram, 0.99)),
+                        )
+                    },
+                },
             }
-        finally:
-            conn.close()
+
+        total = {
+            "requests": 0,
+            "cache_hits": 0,
+            "errors": 0,
+            "duration_count": 0,
+            "duration_sum_ms": 0,
+            "duration_max_ms": 0,
+            "histogram": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+        }
+        for entry in by_type.values():
+            for name in ("requests", "cache_hits", "errors", "duration_count", "duration_sum_ms"):
+                total[name] += entry[name]
+            total["duration_max_ms"] = max(total["duration_max_ms"], entry["duration_max_ms"])
+            total["histogram"] = [a + b for a, b in zip(total["histogram"], entry["histogram"])]
+        return {
+            "window": window,
+            "resolution": resolution,
+            "since": since,
+            **summarize(total),
+            "by_event_type": {name: summarize(entry) for name, entry in sorted(by_type.items())},
+        }
+
+    def stats(self, window: str = "1h") -> dict[str, Any]:
+        """Counters, cache gauges and the ``window`` rollup; no table is scanned."""
+        self._ensure_initialized()
+        conn = self._conn()
+        counters = {
+            row["name"]: int(row["value"])
+            for row in conn.execute("SELECT name, value FROM runtime_counters")
+        }
+        with self._stats_lock:
+            for name, delta in self._unflushed_counters.items():
+                counters[name] = counters.get(name, 0) + delta
+            cache_entries = self._cache_gauges["entries"]
+        return {
+            "counters": counters,
+            "cache_entries": cache_entries,
+            # Totals ever recorded; retention drops raw rows but not these.
+            "query_events_recorded": counters.get("query_event_count", 0),
+            "page_visits_recorded": counters.get("visit_count", 0),
+            "cache": self.cache_policy_stats(),
+            "memory_cache": self._memory.stats(),
+            "writer": self.writer_stats(),
+            "retention": self.retention_stats(),
+            "rollup": self.rollup_stats(window),
+        }
+
+
+def enable_incremental_vacuum(db_path: Path) -> bool:
+    """Switch an existing runtime DB to ``auto_vacuum=INCREMENTAL``; True if it was converted.
+
+    Runs a full ``VACUUM``, which rewrites the file and holds the write lock
+    throughout, so run it with the service stopped.
+    """
+    conn = sqlite3.connect(str(db_path), timeout=30)
+    try:
+        if int(conn.execute("PRAGMA auto_vacuum").fetchone()[0]) == 2:
+            return False
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        return int(conn.execute("PRAGMA auto_vacuum").fetchone()[0]) == 2
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Offline maintenance for runtime.sqlite.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert = sub.add_parser(
+        "enable-incremental-vacuum",
+        help="convert an existing file to auto_vacuum=INCREMENTAL (stop the service first)",
+    )
+    convert.add_argument("db_path", type=Path)
+    args = parser.parse_args()
+    if not args.db_path.exists():
+        parser.error(f"{args.db_path} does not exist")
+    started = time.monotonic()
+    converted = enable_incremental_vacuum(args.db_path)
+    if converted:
+        print(f"Converted {args.db_path} in {time.monotonic() - started:.1f}s")
+    else:
+        print(f"{args.db_path} already uses auto_vacuum=INCREMENTAL")
+
+
+if __name__ == "__main__":
+    main()
@@ -413,48 +413,61 @@ async function fetchLocalJson(url, options = {}) {
   return data;
 }
 
-function hashText(input) {
-  let hash = 2166136261;
-  for (let i = 0; i < input.length; i += 1) {
-    hash ^= input.charCodeAt(i);
-    hash = Math.imul(hash, 16777619);
+async function fetchPairs(payload) {
+  // The frontend server answers from its cache or asks DblpService once, and
+  // records the query event itself.
+  const resp = await fetch("/api/coauthors/pairs", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(payload),
+  });
+  const data = await resp.json().catch(() => ({}));
+  if (!resp.ok) {
+    const err = new Error(data.detail || `HTTP ${resp.status}`);
+    err.status = resp.status;
+    throw err;
   }
-  return (hash >>> 0).toString(16).padStart(8, "0");
+  return {
+    data,
+    cacheStatus: resp.headers.get("X-Cache") || "MISS",
+    cacheKey: resp.headers.get("X-Cache-Key"),
+  };
 }
 
-function buildPairsCacheKey(payload) {
-  const serialized = JSON.stringify(payload);
-  return `pairs:v1:${hashText(serialized)}`;
+const QUERY_EVENT_FLUSH_MS = 5000;
+const MAX_QUERY_EVENT_BATCH = 200;
+let pendingQueryEvents = [];
+let queryEventTimer = null;
+
+function logRuntimeQueryEvent(event) {
+  pendingQueryEvents.push(event);
+  if (pendingQueryEvents.length >= MAX_QUERY_EVENT_BATCH) {
+    flushQueryEvents();
+  } else if (queryEventTimer === null) {
+    queryEventTimer = setTimeout(flushQueryEvents, QUERY_EVENT_FLUSH_MS);
+  }
 }
 
-async function getRuntimeCache(cacheKey) {
-  try {
-    const data = await fetchLocalJson("/api/runtime/cache/get", {
+function flushQueryEvents(useBeacon = false) {
+  if (queryEventTimer !== null) {
+    clearTimeout(queryEventTimer);
+    queryEventTimer = null;
+  }
+  while (pendingQueryEvents.length) {
+    const events = pendingQueryEvents.splice(0, MAX_QUERY_EVENT_BATCH);
+    const body = JSON.stringify({ events });
+    // sendBeacon survives page unload; fall back to keepalive fetch if it refuses the payload.
+    if (useBeacon && navigator.sendBeacon) {
+      const blob = new Blob([body], { type: "application/json" });
+      if (navigator.sendBeacon("/api/runtime/query/events", blob)) continue;
+    }
+    void fetchLocalJson("/api/runtime/query/events", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ key: cacheKey }),
-    });
-    if (data.hit && data.data && typeof data.data === "object") {
-      return data.data;
-    }
-  } catch (_) {}
-  return null;
-}
-
-function putRuntimeCache(cacheKey, payload) {
-  void fetchLocalJson("/api/runtime/cache/put", {
-    method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ key: cacheKey, data: payload }),
-  }).catch(() => {});
-}
-
-function logRuntimeQueryEvent(event) {
-  void fetchLocalJson("/api/runtime/query/event", {
-    method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify(event),
-  }).catch(() => {});
+      body,
+      keepalive: true,
+    }).catch(() => {});
+  }
 }
 
 function renderPairsResponse(data) {
@@ -646,62 +659,35 @@ if (pairsFormEl) {
         payload.year_min = new Date().getFullYear() - years;
       }
     }
-    const cacheKey = buildPairsCacheKey(payload);
     const startedAt = Date.now();
 
     setQueryLoading(true, totalPairs);
     showMsg(t("msg_matching", { n: fmtNum(totalPairs) }));
 
     try {
-      const cached = await getRuntimeCache(cacheKey);
-      let data = cached;
-      let cacheHit = true;
-
-      if (!data) {
-        cacheHit = false;
-        data = await fetchJson("/api/coauthors/pairs", {
-          method: "POST",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify(payload),
-        });
-        putRuntimeCache(cacheKey, data);
-      }
-
+      const { data } = await fetchPairs(payload);
       renderPairsResponse(data);
       const coauthoredPairCount = countCoauthoredPairs(data);
-      const durationMs = Date.now() - startedAt;
-
-      logRuntimeQueryEvent({
-        event_type: "pairs_lookup",
-        query_hash: cacheKey,
-        left_count: left.length,
-        right_count: right.length,
-        total_pairs: totalPairs,
-        cache_hit: cacheHit,
-        success: true,
-        duration_ms: durationMs,
-        extra: {
-          year_min: payload.year_min ?? null,
-          exact_base_match: exactBaseMatch,
-        },
-      });
-
       showMsg(t("msg_completed", { n: fmtNum(coauthoredPairCount) }));
     } catch (err) {
       clearNode(matrixHeadEl);
       clearNode(matrixBodyEl);
       renderPairSelector([]);
-      logRuntimeQueryEvent({
-        event_type: "pairs_lookup",
-        query_hash: cacheKey,
-        left_count: left.length,
-        right_count: right.length,
-        total_pairs: totalPairs,
-        cache_hit: false,
-        success: false,
-        duration_ms: Date.now() - startedAt,
-        error_message: err?.message || "unknown error",
-      });
+      // Requests that reached the server are already recorded there.
+      if (err.status === undefined) {
+        logRuntimeQueryEvent({
+          event_type: "pairs_lookup",
+          query_hash: null,
+          left_count: left.length,
+          right_count: right.length,
+          total_pairs: totalPairs,
+          cache_hit: false,
+          success: false,
+          duration_ms: Date.now() - startedAt,
+          error_message: err?.message || "unknown error",
+          extra: { source: "browser" },
+        });
+      }
       showMsg(t("msg_query_failed", { err: err.message }), true);
     } finally {
       setQueryLoading(false);
@@ -757,6 +743,11 @@ if (pcConflictToggleEl) {
   pcConflictToggleEl.addEventListener("change", applyPcConflictState);
 }
 
+document.addEventListener("visibilitychange", () => {
+  if (document.visibilityState === "hidden") flushQueryEvents(true);
+});
+window.addEventListener("pagehide", () => flushQueryEvents(true));
+
 initLanguage();
 loadHealth();
 loadStats();